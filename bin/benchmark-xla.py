@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import sys
+import time
+
+import tensorflow as tf
+
+from jack.io.load import loaders
+from jack.readers import readers
+from jack.readers.implementations import create_shared_resources
+
+logger = logging.getLogger(os.path.basename(sys.argv[0]))
+logging.basicConfig(level=logging.INFO)
+
+tf.app.flags.DEFINE_string('dataset', None, 'dataset file')
+tf.app.flags.DEFINE_string('loader', 'jack', 'name of loader')
+tf.app.flags.DEFINE_string('model_dir', None, 'directory to saved model')
+tf.app.flags.DEFINE_integer('batch_size', 64, 'batch size')
+tf.app.flags.DEFINE_integer('num_batches', 50, 'number of timed batches')
+tf.app.flags.DEFINE_integer('warmup_batches', 5, 'number of batches run before timing, e.g., for compilation')
+tf.app.flags.DEFINE_string('xla', 'null,session,scopes', 'comma separated xla settings to compare')
+tf.app.flags.DEFINE_string('output', None, 'json file the throughputs are written to')
+
+FLAGS = tf.app.flags.FLAGS
+
+
+def load_reader(xla):
+    shared_resources = create_shared_resources()
+    shared_resources.load(os.path.join(FLAGS.model_dir, "shared_resources"))
+    shared_resources.config["xla"] = None if xla == "null" else xla
+    reader = readers[shared_resources.config["model"]](shared_resources)
+    reader.load_and_setup_modules(FLAGS.model_dir)
+    return reader
+
+
+dataset = [q for q, _ in loaders[FLAGS.loader](FLAGS.dataset)]
+batches = [dataset[i:i + FLAGS.batch_size] for i in range(0, len(dataset), FLAGS.batch_size)]
+batches = batches[:FLAGS.warmup_batches + FLAGS.num_batches]
+timed_batches = batches[FLAGS.warmup_batches:] or batches
+
+results = dict()
+for xla in FLAGS.xla.split(','):
+    logger.info("Creating and loading reader from {} with xla={}...".format(FLAGS.model_dir, xla))
+    with tf.Graph().as_default():
+        reader = load_reader(xla)
+        for batch in batches[:FLAGS.warmup_batches]:
+            reader(batch)
+        start_time = time.time()
+        for batch in timed_batches:
+            reader(batch)
+        seconds = time.time() - start_time
+        reader.session.close()
+    results[xla] = sum(len(b) for b in timed_batches) / seconds
+
+logger.info("#####################################")
+baseline = results.get('null')
+for xla, throughput in results.items():
+    speedup = " ({:.2f}x)".format(throughput / baseline) if baseline else ""
+    logger.info("xla={}: {:.1f} instances/s{}".format(xla, throughput, speedup))
+logger.info("#####################################")
+
+if FLAGS.output:
+    with open(FLAGS.output, 'w') as f:
+        json.dump({'model_dir': FLAGS.model_dir, 'dataset': FLAGS.dataset, 'batch_size': FLAGS.batch_size,
+                   'num_batches': len(timed_batches), 'instances_per_second': results}, f, indent=2)
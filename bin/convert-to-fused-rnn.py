@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import sys
+
+import tensorflow as tf
+
+from jack.readers import readers, create_shared_resources
+from jack.tf_util.rnn import restore_unfused_lstm_checkpoint
+
+logger = logging.getLogger(os.path.basename(sys.argv[0]))
+logging.basicConfig(level=logging.INFO)
+
+tf.app.flags.DEFINE_string('model_dir', None, 'directory to saved model with LSTMCell encoders (e.g., ESIM or cBiLSTM)')
+tf.app.flags.DEFINE_string('out_dir', None, 'directory to save the model with fused LSTM encoders')
+
+FLAGS = tf.app.flags.FLAGS
+
+shared_resources = create_shared_resources()
+shared_resources.load(os.path.join(FLAGS.model_dir, "shared_resources"))
+shared_resources.config["fused_rnn"] = True
+
+logger.info("Creating fused {} reader...".format(shared_resources.config["model"]))
+reader = readers[shared_resources.config["model"]](shared_resources)
+reader.input_module.setup()
+reader.input_module.load(os.path.join(FLAGS.model_dir, "input_module"))
+reader.model_module.setup(is_training=False)
+
+logger.info("Converting checkpoint from {}...".format(FLAGS.model_dir))
+restore_unfused_lstm_checkpoint(reader.session, os.path.join(FLAGS.model_dir, "model_module"),
+                                reader.model_module.train_variables)
+reader.output_module.setup()
+reader.output_module.load(os.path.join(FLAGS.model_dir, "output_module"))
+
+logger.info("Saving reader to {}...".format(FLAGS.out_dir))
+reader.store(FLAGS.out_dir)
+
+logger.info("Done!")
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import sys
+
+import tensorflow as tf
+
+from jack.core.inference_graph import export_reader
+from jack.readers import reader_from_file
+
+logger = logging.getLogger(os.path.basename(sys.argv[0]))
+logging.basicConfig(level=logging.INFO)
+
+tf.app.flags.DEFINE_string('model_dir', None, 'directory to saved model')
+tf.app.flags.DEFINE_string('out_dir', None, 'directory to save the reader with its inference graph, '
+                                            'load with jack.readers.reader_from_export')
+
+FLAGS = tf.app.flags.FLAGS
+
+logger.info("Creating and loading reader from {}...".format(FLAGS.model_dir))
+reader = reader_from_file(FLAGS.model_dir)
+
+logger.info("Exporting reader to {}...".format(FLAGS.out_dir))
+export_reader(reader, FLAGS.out_dir)
+
+logger.info("Done!")
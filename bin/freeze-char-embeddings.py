@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import sys
+
+import tensorflow as tf
+
+from jack.readers import reader_from_file
+from jack.readers.extractive_qa.shared import freeze_char_embeddings
+
+logger = logging.getLogger(os.path.basename(sys.argv[0]))
+logging.basicConfig(level=logging.INFO)
+
+tf.app.flags.DEFINE_string('model_dir', None, 'directory to saved extractive QA model (e.g., FastQA or BiDAF)')
+tf.app.flags.DEFINE_string('out_dir', None, 'directory to save the model with precomputed character embeddings')
+tf.app.flags.DEFINE_integer('batch_size', 1024, 'number of words embedded at once')
+
+FLAGS = tf.app.flags.FLAGS
+
+logger.info("Creating and loading reader from {}...".format(FLAGS.model_dir))
+reader = reader_from_file(FLAGS.model_dir)
+
+logger.info("Precomputing character embeddings of {} vocabulary words...".format(len(reader.shared_resources.vocab)))
+freeze_char_embeddings(reader, FLAGS.batch_size)
+
+logger.info("Saving reader to {}...".format(FLAGS.out_dir))
+reader.store(FLAGS.out_dir)
+
+logger.info("Done!")
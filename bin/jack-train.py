@@ -14,7 +14,7 @@ from sacred.observers import SqlObserver
 
 from jack import readers
 from jack.core.shared_resources import SharedResources
-from jack.io.embeddings.embeddings import load_embeddings, Embeddings
+from jack.io.embeddings.embeddings import load_embeddings, Embeddings, compress_embeddings, reduce_embeddings
 from jack.io.load import loaders
 from jack.util.vocab import Vocab
 
@@ -70,8 +70,11 @@ def main(batch_size,
          debug,
          debug_examples,
          dev,
+         embedding_compression,
          embedding_file,
          embedding_format,
+         embedding_pca_dim,
+         embedding_pca_remove_top,
          experiments_db,
          epochs,
          l2,
@@ -106,7 +109,6 @@ def main(batch_size,
             emb_file = 'glove.6B.50d.txt'
             embeddings = load_embeddings(path.join('data', 'GloVe', emb_file), 'glove')
             logger.info('loaded pre-trained embeddings ({})'.format(emb_file))
-            ex.current_run.config["repr_dim_input"] = 50
         else:
             embeddings = Embeddings(None, None)
     else:
@@ -118,10 +120,17 @@ def main(batch_size,
         if pretrain:
             embeddings = load_embeddings(embedding_file, embedding_format)
             logger.info('loaded pre-trained embeddings ({})'.format(embedding_file))
-            ex.current_run.config["repr_dim_input"] = embeddings.lookup[0].shape[0]
         else:
             embeddings = Embeddings(None, None)
 
+    if pretrain:
+        if embedding_pca_dim is not None:
+            embeddings = reduce_embeddings(embeddings, embedding_pca_dim, embedding_pca_remove_top)
+            logger.info('reduced pre-trained embeddings to {} dimensions'.format(embedding_pca_dim))
+        if embedding_compression is not None:
+            embeddings = compress_embeddings(embeddings, embedding_compression)
+        ex.current_run.config["repr_dim_input"] = embeddings.lookup[0].shape[0]
+
     emb = embeddings
 
     vocab = Vocab(emb=emb, init_from_embeddings=vocab_from_embeddings)
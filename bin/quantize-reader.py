@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import sys
+
+import tensorflow as tf
+
+from jack.core.quantization import quantize_reader
+from jack.io.load import loaders
+from jack.readers import reader_from_file, eval_hooks
+
+logger = logging.getLogger(os.path.basename(sys.argv[0]))
+logging.basicConfig(level=logging.INFO)
+
+tf.app.flags.DEFINE_string('model_dir', None, 'directory to saved model')
+tf.app.flags.DEFINE_string('out_dir', None, 'directory to save the quantized model')
+tf.app.flags.DEFINE_integer('min_size', 4096, 'minimum number of entries of quantized weights')
+tf.app.flags.DEFINE_string('dataset', None, 'optional dev set for reporting the change in accuracy')
+tf.app.flags.DEFINE_string('loader', 'jack', 'name of loader')
+tf.app.flags.DEFINE_integer('batch_size', 64, 'batch size')
+
+FLAGS = tf.app.flags.FLAGS
+
+
+def model_size(reader_dir):
+    return sum(os.path.getsize(os.path.join(reader_dir, f)) for f in os.listdir(reader_dir)
+               if f.startswith("model_module"))
+
+
+def evaluate(reader_dir, dataset):
+    results = dict()
+
+    def side_effect(metrics, _):
+        results.update(metrics)
+
+    with tf.Graph().as_default():
+        reader = reader_from_file(reader_dir)
+        hook = eval_hooks[reader.shared_resources.config["model"]](
+            reader, dataset, FLAGS.batch_size, epoch_interval=1, side_effect=side_effect)
+        hook.at_test_time(1)
+        reader.session.close()
+    return results
+
+
+logger.info("Quantizing reader from {}...".format(FLAGS.model_dir))
+quantize_reader(FLAGS.model_dir, FLAGS.out_dir, FLAGS.min_size)
+size, quantized_size = model_size(FLAGS.model_dir), model_size(FLAGS.out_dir)
+logger.info("Model size: {:.1f}MB -> {:.1f}MB ({:.2f}x smaller)".format(
+    size / 1e6, quantized_size / 1e6, size / max(quantized_size, 1)))
+
+if FLAGS.dataset is not None:
+    dataset = loaders[FLAGS.loader](FLAGS.dataset)
+    metrics = evaluate(FLAGS.model_dir, dataset)
+    quantized_metrics = evaluate(FLAGS.out_dir, dataset)
+    logger.info("#####################################")
+    for k, v in metrics.items():
+        logger.info("{}: {:.4f} -> {:.4f} (delta {:+.4f})".format(k, v, quantized_metrics[k], quantized_metrics[k] - v))
+    logger.info("#####################################")
+
+logger.info("Done!")
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+
+"""
+Export of readers as self-contained inference graphs.
+
+The exported model module is a single frozen `GraphDef` that contains only what is needed to compute the output ports
+at inference: variables are folded into constants, parameter ports such as `is_eval` or `keep_prob` are fixed to their
+default (inference) values, branches of `tf.cond` that are dead with these values are removed together with
+training-only inputs, and the graph is optimized with tensorflow's graph transforms if available. Loading it only
+imports the graph, no model building code is run.
+"""
+
+import json
+import logging
+import os
+import shutil
+from typing import List, Mapping, Sequence
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.core.framework import types_pb2
+from tensorflow.python.framework import tensor_util
+
+from jack.core.model_module import ModelModule
+from jack.core.reader import JTReader
+from jack.core.shared_resources import SharedResources
+from jack.core.tensorport import TensorPort, TensorPortWithDefault
+
+logger = logging.getLogger(__name__)
+
+_GRAPH_TRANSFORMS = ["strip_unused_nodes", "remove_nodes(op=CheckNumerics)", "fold_constants(ignore_errors=true)",
+                     "fold_batch_norms", "fold_old_batch_norms", "sort_by_execution_order"]
+
+
+def _node_name(tensor_name: str) -> str:
+    return tensor_name.lstrip('^').split(':')[0]
+
+
+def _output_index(tensor_name: str) -> int:
+    return int(tensor_name.split(':')[1]) if ':' in tensor_name else 0
+
+
+def _fix_parameters(graph_def: tf.GraphDef, parameter_names: Sequence[str]) -> tf.GraphDef:
+    """Turns the placeholders with default of the given names into identities of their defaults."""
+    for node in graph_def.node:
+        if node.name in parameter_names and node.op == 'PlaceholderWithDefault':
+            dtype = node.attr['dtype'].type
+            node.op = 'Identity'
+            node.attr.clear()
+            node.attr['T'].type = dtype
+    return graph_def
+
+
+def prune_constant_conds(graph_def: tf.GraphDef) -> tf.GraphDef:
+    """Removes the dead branches of conditionals (`tf.cond`) with constant predicates.
+
+    Switch nodes with a constant predicate become identities of their live output, nodes depending on a dead output
+    are removed and merge nodes with a single live input become identities of it.
+    """
+    nodes = {node.name: node for node in graph_def.node}
+
+    def constant_value(tensor_name):
+        node = nodes.get(_node_name(tensor_name))
+        while node is not None and node.op == 'Identity':
+            node = nodes.get(_node_name(node.input[0]))
+        if node is not None and node.op == 'Const' and node.attr['dtype'].type == types_pb2.DT_BOOL:
+            return bool(tensor_util.MakeNdarray(node.attr['value'].tensor))
+        return None
+
+    # live output index of switches with constant predicates
+    live_outputs = dict()
+    for node in graph_def.node:
+        if node.op == 'Switch':
+            value = constant_value(node.input[1])
+            if value is not None:
+                live_outputs[node.name] = int(value)
+    if not live_outputs:
+        return graph_def
+
+    def is_dead(tensor_name):
+        name = _node_name(tensor_name)
+        if name in dead:
+            return True
+        # control dependencies on switches are not affected by the predicate
+        return not tensor_name.startswith('^') and name in live_outputs and \
+               _output_index(tensor_name) != live_outputs[name]
+
+    dead = set()
+    changed = True
+    while changed:
+        changed = False
+        for node in graph_def.node:
+            if node.name in dead:
+                continue
+            if node.op == 'Merge':
+                node_is_dead = all(is_dead(i) for i in node.input if not i.startswith('^'))
+            else:
+                node_is_dead = any(is_dead(i) for i in node.input)
+            if node_is_dead:
+                dead.add(node.name)
+                changed = True
+
+    merge_value_index_used = {_node_name(i) for node in graph_def.node for i in node.input
+                              if not i.startswith('^') and _output_index(i) == 1}
+    pruned = tf.GraphDef()
+    pruned.versions.CopyFrom(graph_def.versions)
+    pruned.library.CopyFrom(graph_def.library)
+    for node in graph_def.node:
+        if node.name in dead:
+            continue
+        new_node = pruned.node.add()
+        new_node.CopyFrom(node)
+        if node.name in live_outputs:
+            new_node.op = 'Identity'
+            del new_node.input[1:]
+        elif node.op == 'Merge' and node.name not in merge_value_index_used:
+            live_inputs = [i for i in node.input if not i.startswith('^') and not is_dead(i)]
+            if len(live_inputs) == 1:
+                new_node.op = 'Identity'
+                control_inputs = [i for i in node.input if i.startswith('^')]
+                del new_node.input[:]
+                new_node.input.extend(live_inputs + control_inputs)
+                del new_node.attr['N']
+        # live outputs of switches are now the only output of the identity
+        inputs = [_node_name(i) if _node_name(i) in live_outputs and not i.startswith('^') else i
+                  for i in new_node.input]
+        del new_node.input[:]
+        new_node.input.extend(inputs)
+    logger.info("Removed {} nodes of dead branches.".format(len(dead)))
+    return pruned
+
+
+def optimize_inference_graph(graph_def: tf.GraphDef, input_names: List[str], output_names: List[str]) \
+        -> tf.GraphDef:
+    """Strips everything not needed to compute the outputs and applies tensorflow's graph transforms.
+
+    Only `Placeholder` inputs are passed to the transforms as inputs, because `strip_unused_nodes` replaces all other
+    input nodes, e.g., `PlaceholderWithDefault`, by float placeholders without default that must always be fed.
+
+    Args:
+        graph_def: frozen graph
+        input_names: names of input tensors
+        output_names: names of output tensors
+
+    Returns:
+        optimized graph
+    """
+    graph_def = prune_constant_conds(graph_def)
+    graph_def = tf.graph_util.extract_sub_graph(graph_def, [_node_name(n) for n in output_names])
+    for node in graph_def.node:
+        # colocation hints might refer to removed nodes
+        if '_class' in node.attr:
+            del node.attr['_class']
+    try:
+        from tensorflow.tools.graph_transforms import TransformGraph
+    except ImportError:
+        logger.warning("Graph transforms are not available in this tensorflow installation, skipping them.")
+        return graph_def
+    placeholders = {node.name for node in graph_def.node if node.op == 'Placeholder'}
+    return TransformGraph(graph_def, [_node_name(n) for n in input_names if _node_name(n) in placeholders],
+                          [_node_name(n) for n in output_names], _GRAPH_TRANSFORMS)
+
+
+def export_reader(reader, path: str):
+    """Stores a setup reader with its model module as optimized inference graph, see `reader_from_export`.
+
+    Args:
+        reader: a setup `TFReader`
+        path: directory of the exported reader
+    """
+    model_module = reader.model_module
+    placeholders = model_module.placeholders
+    # parameter ports, e.g., is_eval or keep_prob, have their inference values as default
+    parameter_ports = [p for p in model_module.input_ports
+                       if isinstance(p, TensorPortWithDefault) and np.ndim(p.default_value) == 0]
+    input_ports = [p for p in model_module.input_ports if p not in parameter_ports]
+    inputs = {p.name: placeholders[p].name for p in input_ports}
+    outputs = {p.name: model_module.tensors[p].name for p in model_module.output_ports}
+
+    graph_def = tf.graph_util.convert_variables_to_constants(
+        model_module.tf_session, model_module.tf_session.graph.as_graph_def(),
+        [_node_name(n) for n in outputs.values()])
+    graph_def = _fix_parameters(graph_def, [_node_name(placeholders[p].name) for p in parameter_ports])
+    graph_def = optimize_inference_graph(graph_def, list(inputs.values()), list(outputs.values()))
+    remaining = {node.name for node in graph_def.node}
+    inputs = {port: name for port, name in inputs.items() if _node_name(name) in remaining}
+    logger.info("Exported inference graph with {} nodes.".format(len(graph_def.node)))
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+    reader.shared_resources.store(os.path.join(path, "shared_resources"))
+    reader.input_module.store(os.path.join(path, "input_module"))
+    reader.output_module.store(os.path.join(path, "output_module"))
+    with open(os.path.join(path, "model_module.pb"), 'wb') as f:
+        f.write(graph_def.SerializeToString())
+    with open(os.path.join(path, "model_module.json"), 'w') as f:
+        json.dump({"inputs": inputs, "outputs": outputs}, f)
+
+
+class FrozenModelModule(ModelModule):
+    """Model module running an inference graph exported with `export_reader`. It cannot be trained."""
+
+    def __init__(self, shared_resources: SharedResources, input_ports: Sequence[TensorPort],
+                 output_ports: Sequence[TensorPort], sess=None):
+        """
+        Args:
+            shared_resources: shared resources of the reader
+            input_ports: input ports of the exported model module
+            output_ports: output ports of the exported model module
+            sess: optional session, a new session with its own graph is created otherwise
+        """
+        self.shared_resources = shared_resources
+        self._input_ports = list(input_ports)
+        self._output_ports = list(output_ports)
+        if sess is None:
+            session_config = tf.ConfigProto(allow_soft_placement=True)
+            session_config.gpu_options.allow_growth = True
+            sess = tf.Session(graph=tf.Graph(), config=session_config)
+        self.tf_session = sess
+        self._placeholders = None
+        self._tensors = None
+
+    def __call__(self, batch: Mapping[TensorPort, np.ndarray],
+                 goal_ports: List[TensorPort] = None) -> Mapping[TensorPort, np.ndarray]:
+        goal_ports = goal_ports or self.output_ports
+        feed_dict = {t: batch[p] for p, t in self._placeholders.items() if p in batch}
+        # inputs with default, e.g., frozen character embeddings, are optional in batches
+        feed_dict.update({t: p.default_value for p, t in self._placeholders.items()
+                          if p not in batch and isinstance(p, TensorPortWithDefault)})
+        computed_ports = [p for p in goal_ports if p in self._tensors]
+        outputs = self.tf_session.run([self._tensors[p] for p in computed_ports], feed_dict)
+        ret = dict(zip(computed_ports, outputs))
+        for p in goal_ports:
+            if p not in ret and p in batch:
+                ret[p] = batch[p]
+        return ret
+
+    @property
+    def input_ports(self) -> Sequence[TensorPort]:
+        return self._input_ports
+
+    @property
+    def output_ports(self) -> Sequence[TensorPort]:
+        return self._output_ports
+
+    @property
+    def training_input_ports(self) -> Sequence[TensorPort]:
+        return []
+
+    @property
+    def training_output_ports(self) -> Sequence[TensorPort]:
+        return []
+
+    def setup(self, is_training=True):
+        assert not is_training, "Exported inference graphs cannot be trained."
+
+    def store(self, path):
+        raise NotImplementedError("Exported inference graphs are stored with export_reader.")
+
+    def load(self, path):
+        """Imports the inference graph stored at path (without extension)."""
+        with open(path + ".json") as f:
+            signature = json.load(f)
+        graph_def = tf.GraphDef()
+        with open(path + ".pb", 'rb') as f:
+            graph_def.ParseFromString(f.read())
+        with self.tf_session.graph.as_default():
+            tf.import_graph_def(graph_def, name="")
+        graph = self.tf_session.graph
+        self._placeholders = {p: graph.get_tensor_by_name(signature["inputs"][p.name])
+                              for p in self.input_ports if p.name in signature["inputs"]}
+        self._tensors = {p: graph.get_tensor_by_name(signature["outputs"][p.name])
+                         for p in self.output_ports if p.name in signature["outputs"]}
+
+
+def setup_frozen_reader(reader: JTReader, path: str) -> JTReader:
+    """Sets up a reader exported with `export_reader` at path.
+
+    Args:
+        reader: a reader created with the shared resources of the exported reader, its model module is only used for
+            its port definitions and is replaced by the inference graph
+        path: directory of the exported reader
+
+    Returns:
+        the setup reader
+    """
+    model_module = FrozenModelModule(reader.shared_resources, reader.model_module.input_ports,
+                                     reader.model_module.output_ports)
+    frozen = JTReader(reader.shared_resources, reader.input_module, model_module, reader.output_module)
+    frozen.input_module.setup()
+    frozen.input_module.load(os.path.join(path, "input_module"))
+    model_module.setup(is_training=False)
+    model_module.load(os.path.join(path, "model_module"))
+    frozen.output_module.setup()
+    frozen.output_module.load(os.path.join(path, "output_module"))
+    frozen._is_setup = True
+    return frozen
@@ -9,7 +9,7 @@ import numpy as np
 
 from jack.core.data_structures import QASetting, Answer
 from jack.core.tensorport import TensorPort
-from jack.util.batch import shuffle_and_batch, GeneratorWithRestart
+from jack.util.batch import shuffle_and_batch, GeneratorWithRestart, BatchBufferPool
 
 _rng = random.Random(1234)
 logger = logging.getLogger(__name__)
@@ -114,8 +114,14 @@ class OnlineInputModule(InputModule, Generic[AnnotationType]):
     Both of these methods are parameterized by `AnnotationType`. In the simplest
     case, this could be a `dict`, but you could also define a separate class
     for your annotation, in order to get stronger typing.
+
+    Implementations of `create_batch()` can obtain their arrays via `batch_buffer()`,
+    which reuses preallocated memory instead of allocating fresh arrays for every batch.
     """
 
+    # number of batches created by `create_batch` that may be alive at the same time, 0 disables buffer reuse
+    batch_buffer_depth = 2
+
     @abstractmethod
     def preprocess(self, questions: List[QASetting], answers: Optional[List[List[Answer]]] = None,
                    is_eval: bool = False) -> List[AnnotationType]:
@@ -151,6 +157,28 @@ class OnlineInputModule(InputModule, Generic[AnnotationType]):
 
         raise NotImplementedError
 
+    def batch_buffer(self, key, shape, dtype=np.float32) -> np.ndarray:
+        """Returns a zeroed array for a batch that is backed by a reusable, preallocated buffer.
+
+        Buffers are kept per key at their high-water-mark size and handed out in a ring of
+        `batch_buffer_depth` buffers, i.e., a returned array is overwritten after `batch_buffer_depth`
+        further requests for the same key. The depth must therefore exceed the number of batches that are
+        in flight at the same time (e.g., queued batches plus the one currently processed).
+
+        Args:
+            key: identifier of the buffer, usually the port the array is created for
+            shape: shape of the array
+            dtype: numpy dtype of the array
+
+        Returns:
+            A zeroed numpy array of the given shape and dtype.
+        """
+        pool = getattr(self, '_batch_buffer_pool', None)
+        if pool is None or pool.depth != self.batch_buffer_depth:
+            pool = BatchBufferPool(self.batch_buffer_depth)
+            self._batch_buffer_pool = pool
+        return pool.get(key, shape, dtype)
+
     def batch_annotations(self, annotations: List[AnnotationType], batch_size, is_eval: bool):
         """Optionally shuffles and batches annotations.
 
@@ -1,13 +1,16 @@
 # -*- coding: utf-8 -*-
 
+import contextlib
 from abc import abstractmethod
 from typing import Mapping, List, Sequence
 
 import numpy as np
 import tensorflow as tf
 
+from jack.core.quantization import QUANTIZED_WEIGHTS, quantized_getter
 from jack.core.shared_resources import SharedResources
 from jack.core.tensorport import TensorPort
+from jack.tf_util.misc import jit_scope
 
 
 class ModelModule:
@@ -85,6 +88,9 @@ class TFModelModule(ModelModule):
         if sess is None:
             session_config = tf.ConfigProto(allow_soft_placement=True)
             session_config.gpu_options.allow_growth = True
+            if shared_resources.config.get("xla") == "session":
+                # auto-clusters GPU ops only, CPU ops are marked for compilation by the jit scope in setup
+                session_config.graph_options.optimizer_options.global_jit_level = tf.OptimizerOptions.ON_1
             sess = tf.Session(config=session_config)
         self.tf_session = sess
         # will be set in setup
@@ -154,39 +160,49 @@ class TFModelModule(ModelModule):
         """
         old_train_variables = tf.trainable_variables()
         old_variables = tf.global_variables()
-        if "name" in self.shared_resources.config:
-            with tf.variable_scope(self.shared_resources.config["name"],
-                                   initializer=tf.contrib.layers.xavier_initializer()):
+        quantized_weights = self.shared_resources.config.get(QUANTIZED_WEIGHTS)
+        if quantized_weights:
+            assert not is_training, "Readers with quantized weights cannot be trained."
+            # int8 weights are dequantized on the fly
+            weight_scope = tf.variable_scope(tf.get_variable_scope(), custom_getter=quantized_getter(quantized_weights))
+        else:
+            weight_scope = contextlib.suppress()
+        # marks all ops of the model for compilation with XLA, also on CPU
+        with weight_scope, jit_scope(self.shared_resources.config.get("xla") == "session"):
+            if "name" in self.shared_resources.config:
+                with tf.variable_scope(self.shared_resources.config["name"],
+                                       initializer=tf.contrib.layers.xavier_initializer()):
+                    self._tensors = {d: d.create_placeholder() for d in self.input_ports}
+                    output_tensors = self.create_output(
+                        self.shared_resources, *[self._tensors[port] for port in self.input_ports])
+            else:  # backward compability
                 self._tensors = {d: d.create_placeholder() for d in self.input_ports}
                 output_tensors = self.create_output(
                     self.shared_resources, *[self._tensors[port] for port in self.input_ports])
-        else:  # backward compability
-            self._tensors = {d: d.create_placeholder() for d in self.input_ports}
-            output_tensors = self.create_output(
-                self.shared_resources, *[self._tensors[port] for port in self.input_ports])
-
-        self._placeholders = dict(self._tensors)
-        self._tensors.update(zip(self.output_ports, output_tensors))
-        if is_training:
-            if "name" in self.shared_resources.config:
-                with tf.variable_scope(self.shared_resources.config["name"]):
+
+            self._placeholders = dict(self._tensors)
+            self._tensors.update(zip(self.output_ports, output_tensors))
+            if is_training:
+                if "name" in self.shared_resources.config:
+                    with tf.variable_scope(self.shared_resources.config["name"]):
+                        self._placeholders.update((p, p.create_placeholder()) for p in self.training_input_ports
+                                                  if p not in self._placeholders and p not in self._tensors)
+                        self._tensors.update(self._placeholders)
+                        input_target_tensors = {p: self._tensors.get(p, None) for p in self.training_input_ports}
+                        training_output_tensors = self.create_training_output(
+                            self.shared_resources, *[input_target_tensors[port] for port in self.training_input_ports])
+                else:  # backward compability
                     self._placeholders.update((p, p.create_placeholder()) for p in self.training_input_ports
                                               if p not in self._placeholders and p not in self._tensors)
                     self._tensors.update(self._placeholders)
                     input_target_tensors = {p: self._tensors.get(p, None) for p in self.training_input_ports}
                     training_output_tensors = self.create_training_output(
                         self.shared_resources, *[input_target_tensors[port] for port in self.training_input_ports])
-            else:  # backward compability
-                self._placeholders.update((p, p.create_placeholder()) for p in self.training_input_ports
-                                          if p not in self._placeholders and p not in self._tensors)
-                self._tensors.update(self._placeholders)
-                input_target_tensors = {p: self._tensors.get(p, None) for p in self.training_input_ports}
-                training_output_tensors = self.create_training_output(
-                    self.shared_resources, *[input_target_tensors[port] for port in self.training_input_ports])
-            self._tensors.update(zip(self.training_output_ports, training_output_tensors))
+                self._tensors.update(zip(self.training_output_ports, training_output_tensors))
         self._training_variables = [v for v in tf.trainable_variables() if v not in old_train_variables]
-        self._saver = tf.train.Saver(self._training_variables, max_to_keep=1)
         self._variables = [v for v in tf.global_variables() if v not in old_variables]
+        quantized_variables = [v for v in tf.get_collection(QUANTIZED_WEIGHTS) if v in self._variables]
+        self._saver = tf.train.Saver(self._training_variables + quantized_variables, max_to_keep=1)
         self.tf_session.run([v.initializer for v in self.variables])
 
     @property
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+"""
+Post-training int8 quantization of the weights of stored readers.
+
+Large float32 weights (embedding tables, dense and LSTM kernels) are stored as int8 values with one float32 scale per
+channel, i.e., per row of embedding tables and per output unit of kernels. The names and shapes of the quantized
+weights are kept in the config ("quantized_weights") of the reader, such that its model module creates int8 variables
+for them instead and dequantizes them on the fly (see `quantized_getter`). Quantized readers are loaded with
+`reader_from_file` like any other reader, but cannot be trained further.
+"""
+
+import logging
+import os
+from typing import Mapping, Tuple
+
+import numpy as np
+import tensorflow as tf
+
+logger = logging.getLogger(__name__)
+
+QUANTIZED_WEIGHTS = "quantized_weights"
+
+
+def quantize_weights(weights: np.ndarray, axis: int = -1) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric linear int8 quantization with one scale per channel.
+
+    Args:
+        weights: float array
+        axis: channel axis
+
+    Returns:
+        int8 values of the shape of weights, float32 scales of the shape of weights with all axes but `axis` of size 1
+    """
+    axis = axis % weights.ndim
+    reduced_axes = tuple(a for a in range(weights.ndim) if a != axis)
+    scales = np.abs(weights).max(axis=reduced_axes, keepdims=True) / 127.0
+    scales[scales == 0.0] = 1.0
+    values = np.clip(np.round(weights / scales), -127, 127).astype(np.int8)
+    return values, scales.astype(np.float32)
+
+
+def dequantize_weights(values: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    return values.astype(np.float32) * scales
+
+
+def channel_axis(name: str, shape) -> int:
+    """Rows of embedding tables and output units of all other weights are quantized separately."""
+    return 0 if "embedding" in name.split('/')[-1] and len(shape) == 2 else len(shape) - 1
+
+
+def quantized_getter(quantized_weights: Mapping[str, dict]):
+    """Custom variable getter creating int8 variables for the weights of the given names.
+
+    Args:
+        quantized_weights: dict from variable names to dicts with keys "shape" and "axis"
+
+    Returns:
+        a custom getter for `tf.variable_scope`. It returns the dequantized weights as tensor instead of the variable.
+        The int8 values and scales are non-trainable variables in the collection `QUANTIZED_WEIGHTS`.
+    """
+    def getter(getter, name, *args, **kwargs):
+        if name not in quantized_weights:
+            return getter(name, *args, **kwargs)
+        shape = quantized_weights[name]["shape"]
+        axis = quantized_weights[name]["axis"]
+        scale_shape = [1] * len(shape)
+        scale_shape[axis] = shape[axis]
+        kwargs.update(trainable=False, regularizer=None, partitioner=None,
+                      collections=[tf.GraphKeys.GLOBAL_VARIABLES, QUANTIZED_WEIGHTS])
+        values = getter(name + "/int8", *args,
+                        **dict(kwargs, shape=shape, dtype=tf.int8, initializer=tf.zeros_initializer()))
+        scales = getter(name + "/scale", *args,
+                        **dict(kwargs, shape=scale_shape, dtype=tf.float32, initializer=tf.ones_initializer()))
+        return tf.cast(values, tf.float32) * scales
+
+    return getter
+
+
+def quantize_reader(reader_dir: str, out_dir: str, min_size: int = 4096):
+    """Stores a quantized copy of a stored reader.
+
+    Args:
+        reader_dir: directory of the stored reader
+        out_dir: directory of the quantized reader
+        min_size: only float weights with at least 2 dimensions and this many entries are quantized
+    """
+    from jack.readers.implementations import create_shared_resources, readers
+    checkpoint = tf.train.NewCheckpointReader(os.path.join(reader_dir, "model_module"))
+    dtypes = checkpoint.get_variable_to_dtype_map()
+
+    quantized_weights = dict()
+    for name, shape in checkpoint.get_variable_to_shape_map().items():
+        if dtypes[name] == tf.float32 and len(shape) >= 2 and np.prod(shape) >= min_size:
+            quantized_weights[name] = {"shape": list(shape), "axis": channel_axis(name, shape)}
+    logger.info("Quantizing {} of {} weights.".format(len(quantized_weights), len(dtypes)))
+
+    with tf.Graph().as_default():
+        shared_resources = create_shared_resources()
+        shared_resources.load(os.path.join(reader_dir, "shared_resources"))
+        shared_resources.config[QUANTIZED_WEIGHTS] = quantized_weights
+        reader = readers[shared_resources.config["model"]](shared_resources)
+        reader.input_module.setup()
+        reader.input_module.load(os.path.join(reader_dir, "input_module"))
+        reader.model_module.setup(is_training=False)
+        reader.output_module.setup()
+        reader.output_module.load(os.path.join(reader_dir, "output_module"))
+
+        for v in reader.model_module.variables:
+            name = v.op.name
+            weight_name, _, suffix = name.rpartition('/')
+            if weight_name in quantized_weights and suffix in ("int8", "scale"):
+                values, scales = quantize_weights(checkpoint.get_tensor(weight_name),
+                                                  quantized_weights[weight_name]["axis"])
+                v.load(values if suffix == "int8" else scales, reader.session)
+            elif checkpoint.has_tensor(name):
+                v.load(checkpoint.get_tensor(name), reader.session)
+        reader.store(out_dir)
+        reader.session.close()
@@ -20,6 +20,7 @@ from jack.core.model_module import ModelModule, TFModelModule
 from jack.core.output_module import OutputModule
 from jack.core.shared_resources import SharedResources
 from jack.core.tensorport import Ports
+from jack.tf_util.gradients import clip_gradient, regularize_gradient
 
 logger = logging.getLogger(__name__)
 
@@ -227,9 +228,11 @@ class TFReader(JTReader):
             batch_size: size of training batches
             max_epochs: maximum number of epochs
             hooks: TrainingHook implementations that are called after epochs and batches
-            l2: whether to use l2 regularization
+            l2: whether to use l2 regularization. It is added to the gradients directly, such that variables with
+                sparse gradients, e.g., embedding matrices, are only regularized in the rows looked up in a batch. The
+                loss reported to the hooks does not contain the regularization term.
             clip: whether to apply gradient clipping and at which value
-            clip_op: operation to perform for clipping
+            clip_op: operation to perform for clipping, sparse gradients are clipped without densifying them
         """
         logger.info("Setting up data and model...")
         if not self._is_setup:
@@ -239,20 +242,16 @@ class TFReader(JTReader):
         logging.basicConfig(stream=sys.stdout, level=logging.DEBUG)
         loss = self.model_module.tensors[Ports.loss]
 
+        gradients = [(grad, var) for grad, var in optimizer.compute_gradients(loss) if grad is not None]
         if l2:
-            loss += tf.add_n([tf.nn.l2_loss(v) for v in self.model_module.train_variables]) * l2
+            # gradient of l2 * tf.nn.l2_loss(var), sparse gradients of embedding lookups only in the rows of the batch
+            train_variables = set(self.model_module.train_variables)
+            gradients = [(regularize_gradient(grad, var, l2) if var in train_variables else grad, var)
+                         for grad, var in gradients]
 
         if clip:
-            gradients = optimizer.compute_gradients(loss)
-            if clip_op == tf.clip_by_value:
-                gradients = [(tf.clip_by_value(grad, clip[0], clip[1]), var)
-                             for grad, var in gradients if grad]
-            elif clip_op == tf.clip_by_norm:
-                gradients = [(tf.clip_by_norm(grad, clip), var)
-                             for grad, var in gradients if grad]
-            min_op = optimizer.apply_gradients(gradients)
-        else:
-            min_op = optimizer.minimize(loss)
+            gradients = [(clip_gradient(grad, clip, clip_op), var) for grad, var in gradients]
+        min_op = optimizer.apply_gradients(gradients)
 
         # initialize non model variables like learning rate, optimizer vars ...
         self.session.run([v.initializer for v in tf.global_variables() if v not in self.model_module.variables])
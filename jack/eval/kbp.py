@@ -7,6 +7,18 @@ logger = logging.getLogger(__name__)
 
 
 def compute_ranks(scoring_function, triples, entity_set, true_triples=None):
+    """Computes the raw and filtered ranks of the subjects and objects of triples among all entities.
+
+    Args:
+        scoring_function: function scoring a list of (subject, predicate, object) triples, e.g., a
+            `jack.readers.knowledge_base_population.numpy_scoring.KGEScorer`
+        triples: triples to rank
+        entity_set: all entities
+        true_triples: triples that are filtered out of the rankings
+
+    Returns:
+        (subject ranks, object ranks), (filtered subject ranks, filtered object ranks)
+    """
     subject_ranks, object_ranks = [], []
     subject_ranks_filtered, object_ranks_filtered = [], []
 
@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 
-from jack.io.embeddings.embeddings import Embeddings, load_embeddings
+from jack.io.embeddings.embeddings import Embeddings, compress_embeddings, load_embeddings, reduce_embeddings
 from jack.io.embeddings.glove import load_glove
 
 __all__ = [
     'Embeddings',
+    'compress_embeddings',
+    'reduce_embeddings',
     'load_embeddings'
     'load_word2vec',
     'get_word2vec_vocabulary',
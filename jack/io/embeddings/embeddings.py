@@ -2,6 +2,8 @@
 
 import zipfile
 
+import numpy as np
+
 from jack.io.embeddings.fasttext import load_fasttext
 from jack.io.embeddings.glove import load_glove
 from jack.io.embeddings.word_to_vec import load_word2vec
@@ -10,24 +12,41 @@ from jack.io.embeddings.word_to_vec import load_word2vec
 class Embeddings:
     """Wraps Vocabulary and embedding matrix to do lookups"""
 
-    def __init__(self, vocabulary: dict, lookup, filename: str = None, emb_format: str = None):
+    # defaults for embeddings pickled before compression and projections were supported
+    scales = None
+    projection = None
+
+    def __init__(self, vocabulary: dict, lookup, filename: str = None, emb_format: str = None, scales=None,
+                 projection=None):
         """
         Args:
             vocabulary:
-            lookup:
+            lookup: embedding matrix, either of floats or, with `scales`, of int8 values
             filename:
+            scales: optional scale of each row of an int8 `lookup`, see `compress_embeddings`
+            projection: optional (mean, components) that projected the embeddings in `filename` to `lookup`, see
+                `reduce_embeddings`
         """
         self.filename = filename
         self.vocabulary = vocabulary
         self.lookup = lookup
         self.emb_format = emb_format
+        self.scales = scales
+        self.projection = projection
 
     def get(self, word):
         _id = None
         if self.vocabulary is not None:
             _id = self.vocabulary.get(word, None)
         # Handling OOV words - Note: lookup[None] would return entire lookup table
-        return self.lookup[_id] if _id is not None else None
+        return self.gather(_id) if _id is not None else None
+
+    def gather(self, ids):
+        """Returns the (decompressed) float32 embeddings of a single id or an array of ids."""
+        rows = self.lookup[ids]
+        if self.scales is not None:
+            return rows.astype(np.float32) * np.expand_dims(self.scales[ids], -1)
+        return rows.astype(np.float32, copy=False)
 
     def __call__(self, word):
         return self.get(word)
@@ -36,14 +55,108 @@ class Embeddings:
     def shape(self):
         return self.lookup.shape
 
+    @property
+    def compression(self):
+        """None for full precision, "float16" or "int8"."""
+        if self.scales is not None:
+            return "int8"
+        return "float16" if self.lookup is not None and self.lookup.dtype == np.float16 else None
+
+
+def compress_embeddings(embeddings: Embeddings, compression: str) -> Embeddings:
+    """Compresses the embedding matrix.
+
+    Args:
+        embeddings: embeddings
+        compression: "float16", or "int8" for symmetric int8 quantization with one float32 scale per row
+
+    Returns:
+        Embeddings with the compressed matrix
+    """
+    lookup = embeddings.lookup
+    if compression == "float16":
+        return Embeddings(embeddings.vocabulary, lookup.astype(np.float16), embeddings.filename,
+                          embeddings.emb_format, projection=embeddings.projection)
+    elif compression == "int8":
+        # rows are quantized in chunks to avoid a full copy of large matrices in float
+        values = np.empty(lookup.shape, np.int8)
+        scales = np.empty([lookup.shape[0]], np.float32)
+        for start in range(0, lookup.shape[0], 65536):
+            rows = np.asarray(lookup[start:start + 65536], np.float32)
+            row_scales = np.abs(rows).max(axis=1) / 127.0
+            row_scales[row_scales == 0.0] = 1.0
+            values[start:start + 65536] = np.clip(np.round(rows / row_scales[:, None]), -127, 127)
+            scales[start:start + 65536] = row_scales
+        return Embeddings(embeddings.vocabulary, values, embeddings.filename, embeddings.emb_format, scales,
+                          embeddings.projection)
+    else:
+        raise ValueError("Unknown compression {}, must be one of 'float16' or 'int8'.".format(compression))
+
+
+def fit_pca(lookup, dim: int, remove_top_components: int = 0):
+    """Fits a PCA projection of the rows of an embedding matrix.
 
-def load_embeddings(file, typ='glove', **options):
+    Args:
+        lookup: embedding matrix [V, N] or `Embeddings`, compressed embeddings are decompressed chunk by chunk
+        dim: target dimension
+        remove_top_components: number of dominating principal components that are removed before projecting to the next
+            `dim` components. Embeddings with the mean and top components removed often work better than the original
+            embeddings ("all-but-the-top" post-processing).
+
+    Returns:
+        mean [N], components [N, dim]
+    """
+    assert dim + remove_top_components <= lookup.shape[1], \
+        "Cannot project {}-dimensional embeddings to {} dimensions after removing {} components.".format(
+            lookup.shape[1], dim, remove_top_components)
+    gather = lookup.gather if isinstance(lookup, Embeddings) else lookup.__getitem__
+    mean = np.zeros([lookup.shape[1]], np.float64)
+    for start in range(0, lookup.shape[0], 65536):
+        mean += np.asarray(gather(slice(start, start + 65536)), np.float64).sum(axis=0)
+    mean /= max(lookup.shape[0], 1)
+    # covariance is accumulated in chunks to avoid a centered copy of large matrices
+    covariance = np.zeros([lookup.shape[1], lookup.shape[1]], np.float64)
+    for start in range(0, lookup.shape[0], 65536):
+        rows = np.asarray(gather(slice(start, start + 65536)), np.float64) - mean
+        covariance += rows.T.dot(rows)
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    components = eigenvectors[:, np.argsort(-eigenvalues)[remove_top_components:remove_top_components + dim]]
+    # fixed signs make the projection independent of the eigen solver
+    components *= np.where(components[np.abs(components).argmax(axis=0), np.arange(dim)] < 0, -1.0, 1.0)
+    return mean.astype(np.float32), components.astype(np.float32)
+
+
+def project_embeddings(embeddings: Embeddings, mean: np.ndarray, components: np.ndarray) -> Embeddings:
+    """Projects embeddings with a projection fitted by `fit_pca`, the projected embeddings have full precision."""
+    lookup = np.empty([embeddings.lookup.shape[0], components.shape[1]], np.float32)
+    for start in range(0, lookup.shape[0], 65536):
+        lookup[start:start + 65536] = (embeddings.gather(slice(start, start + 65536)) - mean).dot(components)
+    return Embeddings(embeddings.vocabulary, lookup, embeddings.filename, embeddings.emb_format,
+                      projection=(mean, components))
+
+
+def reduce_embeddings(embeddings: Embeddings, dim: int, remove_top_components: int = 0) -> Embeddings:
+    """Reduces the dimension of embeddings with PCA, see `fit_pca`.
+
+    The projection is kept with the returned embeddings and stored with the vocab, such that loading a stored reader
+    projects the embeddings in `filename` in the same way.
+    """
+    mean, components = fit_pca(embeddings, dim, remove_top_components)
+    return project_embeddings(embeddings, mean, components)
+
+
+def load_embeddings(file, typ='glove', compression=None, projection=None, **options):
     """
     Loads either GloVe or word2vec embeddings and wraps it into Embeddings
 
     Args:
         file: string, path to a file like "GoogleNews-vectors-negative300.bin.gz" or "glove.42B.300d.zip"
         typ: string, either "word2vec", "glove", "fasttext" or "mem_map"
+        compression: optional compression of the embedding matrix, "float16" or "int8", see `compress_embeddings`.
+            Full precision memory maps are compressed into memory, compressed memory maps keep their compression
+            unless they are projected.
+        projection: optional (mean, components) of a PCA projection applied before compression, see
+            `reduce_embeddings`
         options: dict, other options.
     Returns:
         Embeddings object, wrapper class around Vocabulary embedding matrix.
@@ -51,24 +164,36 @@ def load_embeddings(file, typ='glove', **options):
     assert typ in {"word2vec", "glove", "fasttext", "mem_map"}, "so far only 'word2vec' and 'glove' foreseen"
 
     if typ.lower() == "word2vec":
-        return Embeddings(*load_word2vec(file, **options))
+        embeddings = Embeddings(*load_word2vec(file, **options))
 
     elif typ.lower() == "glove":
         if file.endswith('.txt'):
             with open(file, 'rb') as f:
-                return Embeddings(*load_glove(f), filename=file, emb_format=typ)
+                embeddings = Embeddings(*load_glove(f), filename=file, emb_format=typ)
         elif file.endswith('.zip'):
             with zipfile.ZipFile(file) as zf:
                 txtfile = file.split('/')[-1][:-4] + '.txt'
                 with zf.open(txtfile, 'r') as f:
-                    return Embeddings(*load_glove(f), filename=file, emb_format=typ)
+                    embeddings = Embeddings(*load_glove(f), filename=file, emb_format=typ)
         else:
             raise NotImplementedError
 
     elif typ.lower() == "fasttext":
         with open(file, 'rb') as f:
-            return Embeddings(*load_fasttext(f), filename=file, emb_format=typ)
+            embeddings = Embeddings(*load_fasttext(f), filename=file, emb_format=typ)
 
     elif typ.lower() == "mem_map":
         from jack.io.embeddings.memory_map import load_memory_map
-        return load_memory_map(file)
+        embeddings = load_memory_map(file)
+        if embeddings.compression is not None and projection is None:
+            # memory maps stored compressed keep their compression
+            if compression not in (None, embeddings.compression):
+                raise ValueError("Cannot compress the {} memory map {} to {}.".format(
+                    embeddings.compression, file, compression))
+            compression = None
+
+    if projection is not None:
+        embeddings = project_embeddings(embeddings, *projection)
+    if compression is not None:
+        embeddings = compress_embeddings(embeddings, compression)
+    return embeddings
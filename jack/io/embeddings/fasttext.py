@@ -20,7 +20,7 @@ def load_fasttext(stream, vocab=None):
 
     word2idx = {}
     vec_n, vec_size = map(int, stream.readline().split())
-    lookup = np.empty([vocab.get_size() if vocab is not None else vec_n, vec_size], dtype=np.float)
+    lookup = np.empty([vocab.get_size() if vocab is not None else vec_n, vec_size], dtype=np.float32)
     n = 0
     for line in stream:
         word, vec = line.rstrip().split(maxsplit=1)
@@ -21,7 +21,7 @@ def load_glove(stream, vocab=None):
     word2idx = {}
     first_line = stream.readline()
     dim = len(first_line.split()) - 1
-    lookup = np.empty([500000, dim], dtype=np.float)
+    lookup = np.empty([500000, dim], dtype=np.float32)
     lookup[0] = np.fromstring(first_line.split(maxsplit=1)[1], sep=' ')
     word2idx[first_line.split(maxsplit=1)[0]] = 0
     n = 1
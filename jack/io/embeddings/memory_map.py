@@ -21,20 +21,25 @@ def load_memory_map(file_prefix: str) -> Embeddings:
     with open(meta_file, "rb") as f:
         meta = pickle.load(f)
     shape = meta['shape']
-    mem_map = np.memmap(mem_map_file, dtype='float32', mode='r+', shape=shape)
-    result = Embeddings(meta['vocab'], mem_map, filename=file_prefix, emb_format="mem_map")
+    # compressed matrices keep their dtype, int8 matrices come with scales per row
+    mem_map = np.memmap(mem_map_file, dtype=meta.get('dtype', 'float32'), mode='r+', shape=shape)
+    result = Embeddings(meta['vocab'], mem_map, filename=file_prefix, emb_format="mem_map",
+                        scales=meta.get('scales'))
     return result
 
 
 def save_as_memory_map(file_prefix: str, emb: Embeddings):
     meta_file = file_prefix + "_meta.pkl"
     mem_map_file = file_prefix + "_memmap"
+    dtype = emb.lookup.dtype if emb.compression is not None else np.dtype('float32')
     with open(meta_file, "wb") as f:
         pickle.dump({
             "vocab": emb.vocabulary,
-            "shape": emb.shape
+            "shape": emb.shape,
+            "dtype": dtype.name,
+            "scales": emb.scales
         }, f)
-    mem_map = np.memmap(mem_map_file, dtype='float32', mode='w+', shape=emb.shape)
+    mem_map = np.memmap(mem_map_file, dtype=dtype, mode='w+', shape=emb.shape)
     mem_map[:] = emb.lookup[:]
     mem_map.flush()
     del mem_map
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+"""
+Cascades of readers that only forward instances a cheap reader is not confident about to more expensive readers.
+"""
+
+import logging
+import time
+from typing import List, Sequence, Tuple, Union
+
+import numpy as np
+
+from jack.core.data_structures import Answer, QASetting
+from jack.core.reader import JTReader
+from jack.core.tensorport import Ports
+from jack.readers.extractive_qa.shared import XQAPorts
+
+logger = logging.getLogger(__name__)
+
+
+def answer_with_confidence(reader: JTReader, inputs: Sequence[QASetting], confidence: str = "score") \
+        -> Tuple[List[Answer], np.ndarray]:
+    """Answers the inputs and returns the confidence of the reader for each answer.
+
+    Args:
+        reader: a reader
+        inputs: questions
+        confidence: "score" uses `Answer.score`, "margin" uses the difference between the two highest probabilities
+            of the softmax of the `Ports.Prediction.logits` of the model (e.g., for NLI or multiple choice readers)
+            or of its `XQAPorts.nbest_span_scores` (extractive QA readers)
+
+    Returns:
+        answers, confidences [len(inputs)]
+    """
+    if confidence == "score":
+        answers = reader(inputs)
+        return answers, np.array([a.score for a in answers], np.float32)
+    elif confidence == "margin":
+        model_ports = reader.model_module.output_ports
+        if Ports.Prediction.logits in model_ports:
+            probs_port = Ports.Prediction.logits
+        elif XQAPorts.nbest_span_scores in model_ports:
+            probs_port = XQAPorts.nbest_span_scores
+        else:
+            raise ValueError("The margin confidence requires logits or n-best span scores of the model.")
+        batch = reader.input_module(inputs)
+        output_ports = reader.output_module.input_ports
+        outputs = reader.model_module(batch, list(output_ports) + [probs_port])
+        answers = reader.output_module(inputs, *[outputs[p] for p in output_ports])
+        if probs_port == Ports.Prediction.logits:
+            logits = outputs[probs_port]
+            probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probs /= probs.sum(axis=1, keepdims=True)
+        else:
+            probs = outputs[probs_port]
+        if probs.shape[1] < 2:
+            return answers, np.ones([len(answers)], np.float32)
+        top2 = -np.partition(-probs, 1, axis=1)[:, :2]
+        margins = top2[:, 0] - top2[:, 1]
+        if len(margins) != len(answers):
+            # supports split into several windows, the margin of the window with the best span is kept
+            support2question = np.asarray(batch[XQAPorts.support2question])
+            order = np.argsort(-top2[:, 0], kind='mergesort')
+            _, first = np.unique(support2question[order], return_index=True)
+            margins = margins[order[first]]
+        return answers, margins.astype(np.float32)
+    else:
+        raise ValueError("Unknown confidence {}, must be one of 'score' or 'margin'.".format(confidence))
+
+
+class CascadeReader:
+    """Answers questions with a cascade of readers ordered from cheapest to most expensive.
+
+    Every stage answers the instances it receives. Answers with a confidence of at least the stage's threshold are
+    accepted, all others are forwarded to the next stage. The last stage accepts all answers. Statistics of every
+    stage (instances read and accepted, time, throughput and, with `evaluate`, accuracy) are collected in `stats`.
+    """
+
+    def __init__(self, readers: Sequence[JTReader], thresholds: Sequence[float],
+                 confidence: Union[str, Sequence[str]] = "score"):
+        """
+        Args:
+            readers: readers ordered from cheapest to most expensive, e.g., cbow_xqa_reader and fastqa_reader
+            thresholds: confidence thresholds of all stages but the last
+            confidence: "score" or "margin" (see `answer_with_confidence`) for all stages or for each stage
+        """
+        assert len(thresholds) == len(readers) - 1, "There must be a threshold for every stage but the last."
+        self.readers = list(readers)
+        self.thresholds = list(thresholds) + [-np.inf]
+        self.confidence = [confidence] * len(readers) if isinstance(confidence, str) else list(confidence)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = [{"read": 0, "accepted": 0, "seconds": 0.0, "correct": 0, "evaluated": 0}
+                      for _ in self.readers]
+
+    def _answer(self, inputs: Sequence[QASetting]) -> Tuple[List[Answer], List[int]]:
+        answers = [None] * len(inputs)
+        answer_stages = [None] * len(inputs)
+        pending = list(range(len(inputs)))
+        for stage, (reader, threshold, confidence) in enumerate(zip(self.readers, self.thresholds, self.confidence)):
+            if not pending:
+                break
+            start_time = time.time()
+            stage_answers, confidences = answer_with_confidence(reader, [inputs[i] for i in pending], confidence)
+            self.stats[stage]["seconds"] += time.time() - start_time
+            self.stats[stage]["read"] += len(pending)
+
+            forwarded = []
+            for i, a, c in zip(pending, stage_answers, confidences):
+                if c >= threshold:
+                    answers[i] = a
+                    answer_stages[i] = stage
+                else:
+                    forwarded.append(i)
+            self.stats[stage]["accepted"] += len(pending) - len(forwarded)
+            pending = forwarded
+        return answers, answer_stages
+
+    def __call__(self, inputs: Sequence[QASetting]) -> List[Answer]:
+        return self._answer(inputs)[0]
+
+    def evaluate(self, dataset: Sequence[Tuple[QASetting, List[Answer]]], batch_size: int = 32) -> List[dict]:
+        """Answers a labeled dataset and reports statistics per stage.
+
+        Statistics collected before, e.g., by answering questions with `__call__`, are reset. An answer is correct if
+        its text equals the text of one of the gold answers.
+
+        Returns:
+            list of dicts per stage with keys "read", "accepted", "seconds", "throughput" (instances per second) and
+            "accuracy" (of the answers accepted by the stage)
+        """
+        self.reset_stats()
+        for start in range(0, len(dataset), batch_size):
+            batch = dataset[start:start + batch_size]
+            answers, answer_stages = self._answer([q for q, _ in batch])
+            for (_, gold), a, stage in zip(batch, answers, answer_stages):
+                self.stats[stage]["evaluated"] += 1
+                self.stats[stage]["correct"] += int(any(a.text == g.text for g in gold))
+
+        report = self.report()
+        for stage, r in enumerate(report):
+            logger.info("Stage {}: read {}, accepted {}, {:.1f} instances/s, accuracy {:.3f}".format(
+                stage, r["read"], r["accepted"], r["throughput"], r["accuracy"]))
+        return report
+
+    def report(self) -> List[dict]:
+        """Returns the statistics per stage collected so far."""
+        report = []
+        for s in self.stats:
+            report.append({
+                "read": s["read"],
+                "accepted": s["accepted"],
+                "seconds": s["seconds"],
+                "throughput": s["read"] / s["seconds"] if s["seconds"] > 0 else 0.0,
+                "accuracy": s["correct"] / s["evaluated"] if s["evaluated"] > 0 else 0.0,
+            })
+        return report
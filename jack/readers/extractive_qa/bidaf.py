@@ -7,16 +7,19 @@ from jack.tf_util.embedding import conv_char_embedding_alt
 from jack.tf_util.highway import highway_network
 from jack.tf_util.misc import mask_for_lengths
 from jack.tf_util.rnn import fused_birnn
+from jack.tf_util.xqa import nbest_spans
 
 logger = logging.getLogger(__name__)
 
 
 class BiDAF(AbstractXQAModelModule):
+    _char_embedding_scope = "bidaf"
+
     def create_output(self, shared_vocab_config,
                       emb_question, question_length,
                       emb_support, support_length,
                       unique_word_chars, unique_word_char_length,
-                      question_words2unique, support_words2unique,
+                      question_words2unique, support_words2unique, frozen_char_embeddings, question2support,
                       answer2question, keep_prob, is_eval):
         # 1. char embeddings + word embeddings
         # 2a. conv char embeddings
@@ -56,7 +59,8 @@ class BiDAF(AbstractXQAModelModule):
                                                                             size,
                                                                             unique_word_chars, unique_word_char_length,
                                                                             [question_words2unique,
-                                                                             support_words2unique])
+                                                                             support_words2unique],
+                                                                            frozen_embeddings=frozen_char_embeddings)
             # 3. cat
             emb_question = tf.concat([emb_question, char_emb_question], 2)
             emb_support = tf.concat([emb_support, char_emb_support], 2)
@@ -86,53 +90,12 @@ class BiDAF(AbstractXQAModelModule):
                                           scope='support_encoding')[0]
             encoded_support = tf.concat(encoded_support, 2)
 
-            # 6. biattention alpha(U, H) = S
-            # S = W^T*[H; U; H*U]
-            # question = U = [batch, 2*embedding, length1]
-            # support = H = [batch, 2*embedding, length2]
-            # -> expand with features
-
-            # we want to get from [length 1] and [length 2] to [length1, length2] and [length1, length2]
-            # we do that with
-            # (a) expand dim
-            # [batch, L2, 2*embedding ] -> [batch, 1, L2 2*embedding]
-            support = tf.expand_dims(encoded_support, 1)
-            # [batch, L1, 2*embedding] -> [batch, L1, 1, 2*embedding]
-            question = tf.expand_dims(encoded_question, 2)
-            # (b) tile with the other dimension
-            support = tf.tile(support, [1, max_question_length, 1, 1])
-            question = tf.tile(question, [1, 1, max_support_length, 1])
-
-            # 5. cat
-            # question = U = [batch, length1, length2, 2*embeddings]
-            # support = H = [batch, length1, length2, 2*embeddings]
-            # S = W^T*[H; U; H*U]
-            features = tf.concat([support, question, question * support], 3)
+            # supports are encoded only once, question conditioning starts here
+            encoded_support = tf.gather(encoded_support, question2support)
+            support_length = tf.gather(support_length, question2support)
 
             # 6. biattention
-            # 6a. create matrix of question support attentions
-            # features = [batch, length1, length2, 6*embeddings]
-            # w = [6*embeddings]
-            # S = attention matrix = [batch, length1, length2]
-            S = tf.einsum('ijkl,l->ijk', features, W)
-
-            # S = [batch, length1, length2]
-            # question to support attention
-            # softmax -> [ batch, length1, length2] = att_question
-            att_question = tf.nn.softmax(S, 2)  # softmax over support
-            # weighted =  [batch, length1, length2] * [batch, length1, length2, 2*embedding] -> [batch, length2, 2*embedding]
-            question_weighted = tf.einsum('ijk,ijkl->ikl', att_question, question)
-
-            # support to question attention
-            # 1. filter important context words with max
-            # 2. softmax over question to get the question words which are most relevant for the most relevant context words
-            # max(S) = [batch, length1, length2] -> [ batch, length1] = most important context
-            max_support = tf.reduce_max(S, 2)
-            # softmax over question -> [batch, length1]
-            support_attention = tf.nn.softmax(max_support, 1)
-            # support attention * support = weighted support
-            # [batch, length1] * [batch, length1, length2, 2*embedding] = [batch, 2*embedding]
-            support_weighted = tf.einsum('ij,ijkl->il', support_attention, support)
+            question_weighted, support_weighted = biattention(encoded_question, encoded_support, W)
             # tile to have the same dimension
             # [batch, 2*embedding] -> [batch, length2, 2*embedding]
             support_weighted = tf.expand_dims(support_weighted, 1)
@@ -184,4 +147,60 @@ class BiDAF(AbstractXQAModelModule):
 
             span = tf.concat([tf.expand_dims(predicted_start_pointer, 1), tf.expand_dims(predicted_end_pointer, 1)], 1)
 
-            return start_scores, end_scores, span
+            # n best spans within a band of max_span_length ends per start
+            spans, span_scores = nbest_spans(start_scores, end_scores,
+                                             shared_vocab_config.config.get("num_best_spans", 10),
+                                             shared_vocab_config.config.get("max_span_length", 20))
+
+            return start_scores, end_scores, span, spans, span_scores
+
+
+def biattention(encoded_question, encoded_support, W):
+    """
+    Bi-directional attention of BiDAF without tiling question and support to [batch, length1, length2, 6*embedding].
+
+    Args:
+        encoded_question: [batch, length1, 2*embedding]
+        encoded_support: [batch, length2, 2*embedding]
+        W: [6*embedding] weights of the trilinear similarity
+
+    Returns:
+        question weighted by attention [batch, length2, 2*embedding], support weighted by attention [batch, 2*embedding]
+    """
+    # 6. biattention alpha(U, H) = S
+    # S = W^T*[H; U; H*U]
+    # question = U = [batch, length1, 2*embedding]
+    # support = H = [batch, length2, 2*embedding]
+    # instead of tiling U and H to [batch, length1, length2, 6*embedding] features, W is split into its
+    # parts for H, U and H*U: S_ij = w_H^T*H_j + w_U^T*U_i + (w_HU*U_i)^T*H_j
+    w_support, w_question, w_product = tf.split(W, 3)
+
+    # 6a. create matrix of question support attentions
+    # [batch, length2] -> [batch, 1, length2]
+    support_part = tf.expand_dims(tf.einsum('ijk,k->ij', encoded_support, w_support), 1)
+    # [batch, length1] -> [batch, length1, 1]
+    question_part = tf.expand_dims(tf.einsum('ijk,k->ij', encoded_question, w_question), 2)
+    # [batch, length1, 2*embedding] x [batch, length2, 2*embedding] -> [batch, length1, length2]
+    product_part = tf.matmul(encoded_question * w_product, encoded_support, transpose_b=True)
+    # S = attention matrix = [batch, length1, length2]
+    S = support_part + question_part + product_part
+
+    # S = [batch, length1, length2]
+    # question to support attention
+    # softmax -> [ batch, length1, length2] = att_question
+    att_question = tf.nn.softmax(S, 2)  # softmax over support
+    # weighted =  [batch, length1, length2]^T * [batch, length1, 2*embedding] -> [batch, length2, 2*embedding]
+    question_weighted = tf.matmul(att_question, encoded_question, transpose_a=True)
+
+    # support to question attention
+    # 1. filter important context words with max
+    # 2. softmax over question to get the question words which are most relevant for the most relevant context words
+    # max(S) = [batch, length1, length2] -> [ batch, length1] = most important context
+    max_support = tf.reduce_max(S, 2)
+    # softmax over question -> [batch, length1]
+    support_attention = tf.nn.softmax(max_support, 1)
+    # support attention * support = weighted support
+    # every question position attends to all support states, i.e., the sum over supports factorizes
+    # [batch, length1] * [batch, length2, 2*embedding] = [batch, 2*embedding]
+    support_weighted = tf.reduce_sum(support_attention, 1, keep_dims=True) * tf.reduce_sum(encoded_support, 1)
+    return question_weighted, support_weighted
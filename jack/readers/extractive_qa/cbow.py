@@ -8,7 +8,7 @@ import spacy
 
 from jack.core import *
 from jack.readers.extractive_qa.fastqa import XQAPorts
-from jack.readers.extractive_qa.util import prepare_data, unique_words_with_chars
+from jack.readers.extractive_qa.util import CharIdTable, prepare_data
 from jack.tf_util import misc
 from jack.tf_util.dropout import fixed_dropout
 from jack.tf_util.embedding import conv_char_embedding_alt
@@ -18,6 +18,11 @@ from jack.util.preprocessing import char_vocab_from_vocab, stack_and_pad
 
 _max_span_size = 10
 
+
+def _max_span_length(config):
+    """Maximum number of answer tokens, "max_span_length" as for FastQA and BiDAF or the older "max_span_size"."""
+    return config.get("max_span_length", config.get("max_span_size", _max_span_size))
+
 CBowAnnotation = NamedTuple('CBowAnnotation', [
     ('question_tokens', List[str]),
     ('question_ids', List[int]),
@@ -60,14 +65,17 @@ class CbowXQAInputModule(OnlineInputModule[CBowAnnotation]):
         self.config = self.shared_vocab_config.config
         self.dropout = self.config.get("dropout", 1)
         self.emb_matrix = self.vocab.emb.lookup
-        self.default_vec = np.zeros([self.vocab.emb_length])
         self.char_vocab = self.shared_vocab_config.char_vocab
+        self.char_id_table = CharIdTable(self.char_vocab)
 
-    def _get_emb(self, idx):
-        if idx < self.emb_matrix.shape[0]:
-            return self.emb_matrix[idx]
-        else:
-            return self.default_vec
+    def _get_emb(self, ids):
+        """Returns the embeddings [len(ids), N] of word ids, words without embedding get zero vectors."""
+        ids = np.asarray(ids, dtype=np.int64)
+        embedded = np.zeros([len(ids), self.emb_matrix.shape[1]], np.float32)
+        # (compressed) embeddings of all words are gathered and decompressed at once
+        known = ids < self.emb_matrix.shape[0]
+        embedded[known] = self.vocab.emb.gather(ids[known])
+        return embedded
 
     def __extract_answertype_span(self, tokens: List[str]) -> Tuple[int, int]:
         question = " ".join(tokens)
@@ -142,22 +150,19 @@ class CbowXQAInputModule(OnlineInputModule[CBowAnnotation]):
                          with_answers=has_answers, wiq_contentword=True, spacy_nlp=False,
                          max_support_length=self.config.get("max_support_length", None))
 
-        not_allowed = all(end - start > _max_span_size
+        not_allowed = all(end - start > _max_span_length(self.config)
                           for start, end in answer_spans)
 
         if has_answers and not_allowed:
             return None
 
-        emb_support = np.zeros([s_length, self.emb_matrix.shape[1]])
-        emb_question = np.zeros([q_length, self.emb_matrix.shape[1]])
+        emb_support = np.zeros([s_length, self.emb_matrix.shape[1]], np.float32)
+        emb_question = np.zeros([q_length, self.emb_matrix.shape[1]], np.float32)
+        emb_support[:len(s_ids)] = self._get_emb(s_ids)
+        emb_question[:len(q_ids)] = self._get_emb(q_ids)
 
         answertype_span = self.__extract_answertype_span(q_tokenized)
 
-        for k in range(len(s_ids)):
-            emb_support[k] = self._get_emb(s_ids[k])
-        for k in range(len(q_ids)):
-            emb_question[k] = self._get_emb(q_ids[k])
-
         return CBowAnnotation(
             question_tokens=q_tokenized,
             question_ids=q_ids,
@@ -183,14 +188,14 @@ class CbowXQAInputModule(OnlineInputModule[CBowAnnotation]):
         q_tokenized = [a.question_tokens for a in annotations]
         s_tokenized = [a.support_tokens for a in annotations]
 
-        unique_words, unique_word_lengths, question2unique, support2unique = \
-            unique_words_with_chars(q_tokenized, s_tokenized, self.char_vocab)
+        unique_word_chars, unique_word_lengths, question2unique, support2unique = \
+            self.char_id_table.unique_words_with_chars(q_tokenized, s_tokenized)
 
         output = {
-            XQAPorts.unique_word_chars: unique_words,
+            XQAPorts.unique_word_chars: unique_word_chars,
             XQAPorts.unique_word_char_length: unique_word_lengths,
-            XQAPorts.question_words2unique: question2unique,
-            XQAPorts.support_words2unique: support2unique,
+            XQAPorts.question_words2unique: stack_and_pad(question2unique),
+            XQAPorts.support_words2unique: stack_and_pad(support2unique),
             XQAPorts.emb_support: stack_and_pad(emb_supports),
             XQAPorts.support_length: [a.support_length for a in annotations],
             XQAPorts.emb_question: stack_and_pad(emb_questions),
@@ -212,9 +217,7 @@ class CbowXQAInputModule(OnlineInputModule[CBowAnnotation]):
             })
 
         # we can only numpify in here, because bucketing is not possible prior
-        batch = numpify(output, keys=[XQAPorts.unique_word_chars,
-                                      XQAPorts.question_words2unique, XQAPorts.support_words2unique,
-                                      XQAPorts.word_in_question, XQAPorts.token_char_offsets])
+        batch = numpify(output, keys=[XQAPorts.word_in_question, XQAPorts.token_char_offsets])
         return batch
 
 
@@ -229,7 +232,8 @@ class CbowXQAModule(TFModelModule):
                     # optional input, provided only during training
                     XQAPorts.correct_start_training, XQAPorts.answer2question_training,
                     XQAPorts.keep_prob, XQAPorts.is_eval, CBOWXqaPorts.answer_type_span]
-    _output_ports = [CBOWXqaPorts.span_scores, CBOWXqaPorts.span_candidates, XQAPorts.span_prediction]
+    _output_ports = [CBOWXqaPorts.span_scores, CBOWXqaPorts.span_candidates, XQAPorts.span_prediction,
+                     XQAPorts.nbest_spans, XQAPorts.nbest_span_scores]
     _training_input_ports = [CBOWXqaPorts.span_scores, CBOWXqaPorts.span_candidates,
                              XQAPorts.answer_span, XQAPorts.answer2question_training]
     _training_output_ports = [Ports.loss]
@@ -351,94 +355,76 @@ class CbowXQAModule(TFModelModule):
             wiq_exp = tf.stack([word_in_question, wiq_w], 2)
 
             # support span encoding
-            spans = [tf.stack([tf.range(0, max_support_length), tf.range(0, max_support_length)], 1)]
-
-            wiq_exp = tf.pad(wiq_exp, [[0, 0], [20, 20], [0, 0]])
-            wiq_pooled5 = tf.layers.average_pooling1d(
-                tf.slice(wiq_exp, [0, 15, 0], tf.stack([-1, max_support_length + 10, -1])), 5, [1], 'valid')
-            wiq_pooled10 = tf.layers.average_pooling1d(
-                tf.slice(wiq_exp, [0, 10, 0], tf.stack([-1, max_support_length + 20, -1])), 10, [1], 'valid')
-            wiq_pooled20 = tf.layers.average_pooling1d(wiq_exp, 20, [1], 'valid')
-
-            wiqs_left5 = [tf.slice(wiq_pooled5, [0, 0, 0], tf.stack([-1, max_support_length, -1]))]
-            wiqs_right5 = [tf.slice(wiq_pooled5, [0, 6, 0], [-1, -1, -1])]
-            wiqs_left10 = [tf.slice(wiq_pooled10, [0, 0, 0], tf.stack([-1, max_support_length, -1]))]
-            wiqs_right10 = [tf.slice(wiq_pooled10, [0, 11, 0], [-1, -1, -1])]
-            wiqs_left20 = [tf.slice(wiq_pooled20, [0, 0, 0], tf.stack([-1, max_support_length, -1]))]
-            wiqs_right20 = [tf.slice(wiq_pooled20, [0, 21, 0], [-1, -1, -1])]
-
+            # all spans of at most max_span_length tokens, ordered by width and start: [C, 2]
+            max_span_length = _max_span_length(shared_vocab_config.config)
+            span_starts = tf.tile(tf.expand_dims(tf.range(0, max_support_length), 0), [max_span_length, 1])
+            span_ends = span_starts + tf.expand_dims(tf.range(0, max_span_length), 1)
+            is_span = span_ends < max_support_length
+            span_starts = tf.boolean_mask(span_starts, is_span)
+            span_ends = tf.boolean_mask(span_ends, is_span)
+            spans = tf.stack([span_starts, span_ends], 1)
+
+            # window sums are differences of prefix sums, windows are padded with zeros beyond the support
+            def prefix_sums(inputs):
+                # [B, L + 1, N], entry i is the sum of the first i positions
+                return tf.cumsum(tf.pad(inputs, [[0, 0], [1, 0], [0, 0]]), axis=1)
+
+            def window_means(sums, starts, ends, window_size):
+                # means of inputs[starts:ends] divided by window_size for every span, [B, C, N]
+                starts = tf.clip_by_value(starts, 0, max_support_length)
+                ends = tf.clip_by_value(ends, 0, max_support_length)
+                return (tf.gather(sums, ends) - tf.gather(sums, starts)) / tf.cast(window_size, tf.float32)
+
+            # positions first for gathering spans of all batch elements at once
+            emb_support_t = tf.transpose(emb_support, [1, 0, 2])
+            emb_sums = tf.transpose(prefix_sums(emb_support), [1, 0, 2])
+            wiq_sums = tf.transpose(prefix_sums(wiq_exp), [1, 0, 2])
+
+            span_lengths = tf.expand_dims(tf.expand_dims(span_ends - span_starts + 1, 1), 2)
             context_window = 5
-            padded_support = tf.pad(emb_support, [[0, 0], [context_window, context_window], [0, 0]], "CONSTANT")
-            # [B, L + 10 - 4, S]
-            emb_support_windows = tf.layers.average_pooling1d(padded_support, 5, [1], "VALID", "channels_last")
-
-            left_context_windows = tf.slice(emb_support_windows, [0, 0, 0],
-                                            tf.stack([-1, max_support_length, -1]))
-            right_context_windows = tf.slice(emb_support_windows, [0, context_window + 1, 0],
-                                             [-1, -1, -1])
-            span_rep = [
-                tf.concat([emb_support, emb_support, emb_support, left_context_windows, right_context_windows], 2)]
-
-            for window_size in range(2, _max_span_size + 1):
-                start = tf.slice(emb_support, [0, 0, 0], tf.stack([-1, max_support_length - (window_size - 1), -1]))
-                end = tf.slice(emb_support, [0, window_size - 1, 0], [-1, -1, -1])
-                averagespan = tf.layers.average_pooling1d(emb_support, window_size, [1], "VALID", "channels_last")
-
-                left_context_windows = tf.slice(emb_support_windows, [0, 0, 0],
-                                                tf.stack([-1, max_support_length - (window_size - 1), -1]))
-                right_context_windows = tf.slice(emb_support_windows, [0, window_size - 1 + context_window + 1, 0],
-                                                 [-1, -1, -1])
-
-                span_rep.append(tf.concat([averagespan, start, end, left_context_windows, right_context_windows], 2))
-
-                wiqs_left5.append(
-                    tf.slice(wiq_pooled5, [0, 0, 0], tf.stack([-1, max_support_length - (window_size - 1), -1])))
-                wiqs_left10.append(
-                    tf.slice(wiq_pooled10, [0, 0, 0], tf.stack([-1, max_support_length - (window_size - 1), -1])))
-                wiqs_left20.append(
-                    tf.slice(wiq_pooled20, [0, 0, 0], tf.stack([-1, max_support_length - (window_size - 1), -1])))
-
-                wiqs_right5.append(tf.slice(wiq_pooled5, [0, window_size + 5, 0], [-1, -1, -1]))
-                wiqs_right10.append(tf.slice(wiq_pooled10, [0, window_size + 10, 0], [-1, -1, -1]))
-                wiqs_right20.append(tf.slice(wiq_pooled20, [0, window_size + 20, 0], [-1, -1, -1]))
-
-                spans.append(tf.stack([tf.range(0, max_support_length - (window_size - 1)),
-                                       tf.range(window_size - 1, max_support_length)], 1))
-
-            span_rep = tf.concat(span_rep, 1)
+            span_rep = [window_means(emb_sums, span_starts, span_ends + 1, span_lengths),
+                        tf.gather(emb_support_t, span_starts), tf.gather(emb_support_t, span_ends),
+                        window_means(emb_sums, span_starts - context_window, span_starts, context_window),
+                        window_means(emb_sums, span_ends + 1, span_ends + 1 + context_window, context_window)]
+            span_rep = tf.transpose(tf.concat(span_rep, 2), [1, 0, 2])
             span_rep.set_shape([None, None, input_size * 5])
-            wiqs_left5 = tf.concat(wiqs_left5, 1)
-            wiqs_left10 = tf.concat(wiqs_left10, 1)
-            wiqs_left20 = tf.concat(wiqs_left20, 1)
-
-            wiqs_right5 = tf.concat(wiqs_right5, 1)
-            wiqs_right10 = tf.concat(wiqs_right10, 1)
-            wiqs_right20 = tf.concat(wiqs_right20, 1)
 
-            spans = tf.concat(spans, 0)
+            # left and right wiq context of 5, 10 and 20 tokens
+            wiqs = [window_means(wiq_sums, span_starts - window_size, span_starts, window_size)
+                    for window_size in [5, 10, 20]]
+            wiqs += [window_means(wiq_sums, span_ends + 1, span_ends + 1 + window_size, window_size)
+                     for window_size in [5, 10, 20]]
+            wiqs_left5, wiqs_left10, wiqs_left20, wiqs_right5, wiqs_right10, wiqs_right20 = \
+                [tf.transpose(wiq, [1, 0, 2]) for wiq in wiqs]
 
             # scoring
-            with tf.variable_scope("question_rep"):
-                question_rep = tf.layers.dense(question_rep, size, activation=tf.tanh)
-            with tf.variable_scope("question_inter"):
-                question_inter = tf.layers.dense(question_rep, size, activation=None)
+            with misc.jit_scope(shared_vocab_config.config.get("xla") == "scopes"):
+                with tf.variable_scope("question_rep"):
+                    question_rep = tf.layers.dense(question_rep, size, activation=tf.tanh)
+                with tf.variable_scope("question_inter"):
+                    question_inter = tf.layers.dense(question_rep, size, activation=None)
 
-            with tf.variable_scope("span_rep"):
-                span_rep = tf.layers.dense(span_rep, size, activation=tf.tanh)
+                with tf.variable_scope("span_rep"):
+                    span_rep = tf.layers.dense(span_rep, size, activation=tf.tanh)
 
-            span_question_rep = tf.concat([span_rep, tf.expand_dims(question_rep, 1) * span_rep,
-                                           wiqs_left5, wiqs_left10, wiqs_left20,
-                                           wiqs_right5, wiqs_right10, wiqs_right20], 2)
-            span_question_rep.set_shape([None, None, 2 * size + 6 * 2])
+                span_question_rep = tf.concat([span_rep, tf.expand_dims(question_rep, 1) * span_rep,
+                                               wiqs_left5, wiqs_left10, wiqs_left20,
+                                               wiqs_right5, wiqs_right10, wiqs_right20], 2)
+                span_question_rep.set_shape([None, None, 2 * size + 6 * 2])
 
-            with tf.variable_scope("hidden"):
-                h = tf.tanh(
-                    tf.layers.dense(span_question_rep, size, activation=None) + tf.expand_dims(question_inter, 1))
+                with tf.variable_scope("hidden"):
+                    h = tf.tanh(
+                        tf.layers.dense(span_question_rep, size, activation=None) + tf.expand_dims(question_inter, 1))
 
-            with tf.variable_scope("scoring"):
-                span_scores = tf.squeeze(tf.layers.dense(h, 1, activation=None), 2)
+                with tf.variable_scope("scoring"):
+                    span_scores = tf.squeeze(tf.layers.dense(h, 1, activation=None), 2)
 
             best_span = tf.argmax(span_scores, 1)
             predicted_span = tf.gather(spans, best_span)
 
-            return span_scores, tf.tile(tf.expand_dims(spans, 0), tf.stack([batch_size, 1, 1])), predicted_span
+            # candidates are already restricted to spans of at most max_span_length tokens
+            num_best_spans = tf.minimum(shared_vocab_config.config.get("num_best_spans", 10), tf.shape(spans)[0])
+            nbest_scores, nbest_idx = tf.nn.top_k(tf.nn.softmax(span_scores), num_best_spans)
+
+            return span_scores, tf.tile(tf.expand_dims(spans, 0), tf.stack([batch_size, 1, 1])), predicted_span, \
+                   tf.gather(spans, nbest_idx), nbest_scores
@@ -11,6 +11,7 @@ from jack.tf_util.dropout import fixed_dropout
 from jack.tf_util.embedding import conv_char_embedding_alt
 from jack.tf_util.highway import highway_network
 from jack.tf_util.rnn import birnn_with_projection
+from jack.tf_util.xqa import nbest_spans
 
 FastQAAnnotation = NamedTuple('FastQAAnnotation', [
     ('question_tokens', List[str]),
@@ -28,11 +29,13 @@ FastQAAnnotation = NamedTuple('FastQAAnnotation', [
 
 
 class FastQAModule(AbstractXQAModelModule):
+    _char_embedding_scope = "fast_qa"
     _input_ports = [XQAPorts.emb_question, XQAPorts.question_length,
                     XQAPorts.emb_support, XQAPorts.support_length,
                     # char embedding inputs
                     XQAPorts.unique_word_chars, XQAPorts.unique_word_char_length,
                     XQAPorts.question_words2unique, XQAPorts.support_words2unique,
+                    XQAPorts.frozen_char_embeddings, XQAPorts.question2support,
                     # feature input
                     XQAPorts.word_in_question,
                     # optional input, provided only during training
@@ -46,7 +49,7 @@ class FastQAModule(AbstractXQAModelModule):
     def create_output(self, shared_vocab_config, emb_question, question_length,
                       emb_support, support_length,
                       unique_word_chars, unique_word_char_length,
-                      question_words2unique, support_words2unique,
+                      question_words2unique, support_words2unique, frozen_char_embeddings, question2support,
                       word_in_question,
                       correct_start, answer2question, keep_prob, is_eval):
         """FastQA model.
@@ -54,12 +57,14 @@ class FastQAModule(AbstractXQAModelModule):
             shared_vocab_config: has at least a field config (dict) with keys "rep_dim", "rep_dim_input"
             emb_question: [Q, L_q, N]
             question_length: [Q]
-            emb_support: [Q, L_s, N]
-            support_length: [Q]
+            emb_support: [S, L_s, N]
+            support_length: [S]
             unique_word_chars
             unique_word_char_length
             question_words2unique
             support_words2unique
+            frozen_char_embeddings: [F, repr_dim], precomputed character embeddings of the first F unique words
+            question2support: [Q], index of the support of each question
             word_in_question: [Q, L_s]
             correct_start: [A], only during training, i.e., is_eval=False
             answer2question: [A], only during training, i.e., is_eval=False
@@ -67,12 +72,15 @@ class FastQAModule(AbstractXQAModelModule):
             is_eval: []
 
         Returns:
-            start_scores [B, L_s, N], end_scores [B, L_s, N], span_prediction [B, 2]
+            start_scores [B, L_s, N], end_scores [B, L_s, N], span_prediction [B, 2], nbest_spans [B, K, 2],
+            nbest_span_scores [B, K]
         """
         with tf.variable_scope("fast_qa", initializer=tf.contrib.layers.xavier_initializer()):
             # Some helpers
             batch_size = tf.shape(question_length)[0]
             max_question_length = tf.reduce_max(question_length)
+            # supports are encoded once and only gathered per question where question conditioning starts
+            support_length = tf.gather(support_length, question2support)
             support_mask = misc.mask_for_lengths(support_length)
             question_binary_mask = misc.mask_for_lengths(question_length, mask_right=False, value=1.0)
 
@@ -88,7 +96,7 @@ class FastQAModule(AbstractXQAModelModule):
                 # compute combined embeddings
                 [char_emb_question, char_emb_support] = conv_char_embedding_alt(
                     shared_vocab_config.char_vocab, size, unique_word_chars, unique_word_char_length,
-                    [question_words2unique, support_words2unique])
+                    [question_words2unique, support_words2unique], frozen_embeddings=frozen_char_embeddings)
 
                 emb_question = tf.concat([emb_question, char_emb_question], 2)
                 emb_support = tf.concat([emb_support, char_emb_support], 2)
@@ -104,7 +112,7 @@ class FastQAModule(AbstractXQAModelModule):
             v_wiqw = tf.get_variable("v_wiq_w", [1, 1, input_size],
                                      initializer=tf.constant_initializer(1.0))
 
-            wiq_w = tf.matmul(emb_question * v_wiqw, emb_support, adjoint_b=True)
+            wiq_w = tf.matmul(emb_question * v_wiqw, tf.gather(emb_support, question2support), adjoint_b=True)
             wiq_w = wiq_w + tf.expand_dims(support_mask, 1)
 
             wiq_w = tf.reduce_sum(tf.nn.softmax(wiq_w) * tf.expand_dims(question_binary_mask, 2), [1])
@@ -114,21 +122,25 @@ class FastQAModule(AbstractXQAModelModule):
 
             # highway layer to allow for interaction between concatenated embeddings
             if with_char_embeddings:
-                all_embedded = tf.concat([emb_question, emb_support], 1)
-                all_embedded = tf.contrib.layers.fully_connected(all_embedded, size,
-                                                                 activation_fn=None,
-                                                                 weights_initializer=None,
-                                                                 biases_initializer=None,
-                                                                 scope="embeddings_projection")
-
-                all_embedded_hw = highway_network(all_embedded, 1)
-
-                emb_question = tf.slice(all_embedded_hw, [0, 0, 0], tf.stack([-1, max_question_length, -1]))
-                emb_support = tf.slice(all_embedded_hw, tf.stack([0, max_question_length, 0]), [-1, -1, -1])
+                # question and (distinct) supports are projected separately by the same token-wise layers
+                with tf.variable_scope(tf.get_variable_scope()) as vs:
+                    embedded_hw = []
+                    for i, embedded in enumerate([emb_question, emb_support]):
+                        if i > 0:
+                            vs.reuse_variables()
+                        embedded = tf.contrib.layers.fully_connected(embedded, size,
+                                                                     activation_fn=None,
+                                                                     weights_initializer=None,
+                                                                     biases_initializer=None,
+                                                                     scope="embeddings_projection")
+                        embedded_hw.append(highway_network(embedded, 1))
+                emb_question, emb_support = embedded_hw
 
                 emb_question.set_shape([None, None, size])
                 emb_support.set_shape([None, None, size])
 
+            emb_support = tf.gather(emb_support, question2support)
+
             # variational dropout
             dropout_shape = tf.unstack(tf.shape(emb_question))
             dropout_shape[1] = 1
@@ -150,19 +162,21 @@ class FastQAModule(AbstractXQAModelModule):
             encoded_support = birnn_with_projection(size, rnn, emb_support_ext, support_length,
                                                     share_rnn=True, projection_scope="support_proj")
 
-            start_scores, end_scores, predicted_start_pointer, predicted_end_pointer = \
+            start_scores, end_scores, predicted_start_pointer, predicted_end_pointer, spans, span_scores = \
                 fastqa_answer_layer(size, encoded_question, question_length, encoded_support, support_length,
                                     correct_start, answer2question, is_eval,
-                                    beam_size=shared_vocab_config.config.get("beam_size", 1))
+                                    beam_size=shared_vocab_config.config.get("beam_size", 1),
+                                    num_best_spans=shared_vocab_config.config.get("num_best_spans", 10),
+                                    max_span_length=shared_vocab_config.config.get("max_span_length", 20))
 
             span = tf.stack([predicted_start_pointer, predicted_end_pointer], 1)
 
-            return start_scores, end_scores, span
+            return start_scores, end_scores, span, spans, span_scores
 
 
 # ANSWER LAYER
 def fastqa_answer_layer(size, encoded_question, question_length, encoded_support, support_length,
-                        correct_start, answer2question, is_eval, beam_size=1):
+                        correct_start, answer2question, is_eval, beam_size=1, num_best_spans=1, max_span_length=20):
     beam_size = tf.cond(is_eval, lambda: tf.constant(beam_size, tf.int32), lambda: tf.constant(1, tf.int32))
     batch_size = tf.shape(question_length)[0]
     answer2question = tf.cond(is_eval, lambda: tf.range(0, batch_size, dtype=tf.int32), lambda: answer2question)
@@ -272,4 +286,8 @@ def fastqa_answer_layer(size, encoded_question, question_length, encoded_support
     predicted_start_pointer = tf.gather_nd(predicted_start_pointer, predicted_idx)
     predicted_end_pointer = tf.gather_nd(predicted_end_pointer, predicted_idx)
 
-    return start_scores, end_scores, predicted_start_pointer, predicted_end_pointer
+    # ends are conditioned on the start of each beam, so the n best spans are searched among the spans of all beams
+    spans, span_scores = nbest_spans(start_scores, end_scores, num_best_spans, max_span_length,
+                                     start_pointer=start_pointer, beam_size=beam_size)
+
+    return start_scores, end_scores, predicted_start_pointer, predicted_end_pointer, spans, span_scores
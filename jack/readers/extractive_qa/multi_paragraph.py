@@ -0,0 +1,101 @@
+"""
+This file contains a reader wrapper for answering questions with many candidate paragraphs
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from jack.core.data_structures import Answer, QASetting
+from jack.core.reader import JTReader
+from jack.readers.extractive_qa.util import tokenize
+
+
+def question_terms(question: str, lowercase: bool = True) -> set:
+    """Alphanumeric tokens of a question, i.e., without punctuation as in `select_support_sentences`."""
+    return {t for t in tokenize(question.lower() if lowercase else question) if t.isalnum()}
+
+
+def question_overlap(question_terms: set, paragraph: str, lowercase: bool = True) -> int:
+    """Cheap relevance of a paragraph: the number of distinct question terms it contains."""
+    tokens = tokenize(paragraph.lower() if lowercase else paragraph)
+    return len(question_terms.intersection(tokens))
+
+
+def read_paragraphs(reader: JTReader, inputs: Sequence[QASetting], paragraphs: Sequence[Tuple[int, int, str]],
+                    answers: Optional[List[Answer]] = None, batch_size: Optional[int] = None) -> List[Answer]:
+    """Reads paragraphs of questions one by one and keeps the best scoring answer of each question.
+
+    Args:
+        reader: extractive QA reader whose answers are scored, e.g., FastQA or BiDAF
+        inputs: questions
+        paragraphs: (index of the question in `inputs`, doc_idx, paragraph) triples
+        answers: best answers so far, None for questions without answer, updated in place
+        batch_size: maximum number of paragraphs read at once, defaults to all
+
+    Returns:
+        best answer of each question with `doc_idx` set to the doc_idx of its paragraph, None for questions without
+        paragraphs
+    """
+    if answers is None:
+        answers = [None] * len(inputs)
+    batch_size = batch_size or max(1, len(paragraphs))
+    for start in range(0, len(paragraphs), batch_size):
+        batch = paragraphs[start:start + batch_size]
+        settings = [QASetting(inputs[i].question, support=[paragraph], id=inputs[i].id) for i, _, paragraph in batch]
+        for a, (i, doc_idx, _) in zip(reader(settings), batch):
+            if answers[i] is None or a.score > answers[i].score:
+                a.doc_idx = doc_idx
+                answers[i] = a
+    return answers
+
+
+class EarlyStoppingReader:
+    """Reads the supports of each question paragraph by paragraph and stops early.
+
+    Paragraphs are ordered by their question term overlap and read in steps of `paragraphs_per_step` paragraphs by
+    an extractive QA reader. Reading a question stops as soon as the best answer so far has a score of at least
+    `threshold`, or after `max_paragraphs` paragraphs. Steps of all questions are batched together. Answers have
+    `doc_idx` set to the index of the support they were found in.
+    """
+
+    def __init__(self, reader: JTReader, threshold: float = 0.5, paragraphs_per_step: int = 2,
+                 max_paragraphs: int = None, lowercase: bool = True):
+        """
+        Args:
+            reader: extractive QA reader whose answers are scored, e.g., FastQA or BiDAF
+            threshold: answers with at least this score stop reading
+            paragraphs_per_step: number of paragraphs read per question and step
+            max_paragraphs: maximum number of paragraphs read per question, defaults to all
+            lowercase: whether question term overlap is computed on lowercased tokens
+        """
+        self.reader = reader
+        self.threshold = threshold
+        self.paragraphs_per_step = paragraphs_per_step
+        self.max_paragraphs = max_paragraphs
+        self.lowercase = lowercase
+
+    def paragraph_order(self, question: QASetting) -> List[int]:
+        """Returns the indices of supports of `question` sorted by decreasing question term overlap."""
+        terms = question_terms(question.question, self.lowercase)
+        overlaps = [question_overlap(terms, s, self.lowercase) for s in question.support]
+        order = sorted(range(len(question.support)), key=lambda i: -overlaps[i])
+        return order[:self.max_paragraphs] if self.max_paragraphs is not None else order
+
+    def __call__(self, inputs: Sequence[QASetting]) -> List[Answer]:
+        orders = [self.paragraph_order(q) for q in inputs]
+        answers = [None] * len(inputs)
+        num_read = [0] * len(inputs)
+        pending = [i for i in range(len(inputs)) if orders[i]]
+
+        while pending:
+            paragraphs = []
+            for i in pending:
+                for doc_idx in orders[i][num_read[i]:num_read[i] + self.paragraphs_per_step]:
+                    paragraphs.append((i, doc_idx, inputs[i].support[doc_idx]))
+                num_read[i] += self.paragraphs_per_step
+            read_paragraphs(self.reader, inputs, paragraphs, answers)
+
+            pending = [i for i in pending
+                       if num_read[i] < len(orders[i]) and answers[i].score < self.threshold]
+
+        # questions without supports cannot be answered
+        return [a if a is not None else Answer("", span=(0, 0), score=0.0) for a in answers]
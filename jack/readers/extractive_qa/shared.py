@@ -4,11 +4,11 @@ This file contains reusable modules for extractive QA models and ports
 from typing import NamedTuple
 
 from jack.core import *
-from jack.readers.extractive_qa.util import unique_words_with_chars, prepare_data
+from jack.readers.extractive_qa.util import CharIdTable, prepare_data, select_support_sentences, support_windows, \
+    token_end
+from jack.tf_util.embedding import conv_char_embedding_alt
 from jack.tf_util.xqa import xqa_min_crossentropy_loss
 from jack.util import preprocessing
-from jack.util.map import numpify
-from jack.util.preprocessing import stack_and_pad
 
 
 class ParameterTensorPorts:
@@ -42,6 +42,11 @@ class XQAPorts:
     support_words2unique = TensorPort(tf.int32, [None, None], "support_words2unique",
                                       "Represents support using symbol vectors",
                                       "[batch_size, max_num_support_tokens, max]")
+    frozen_char_embeddings = TensorPortWithDefault(np.zeros([0, 0], np.float32), tf.float32, [None, None],
+                                                   "frozen_char_embeddings",
+                                                   "Precomputed character embeddings of the first unique words, "
+                                                   "only the remaining unique words are embedded by the model",
+                                                   "[F, repr_dim]")
 
     keep_prob = ParameterTensorPorts.keep_prob
     is_eval = ParameterTensorPorts.is_eval
@@ -52,6 +57,13 @@ class XQAPorts:
                                   " whether it is part of the question or not",
                                   "[Q, support_length]")
 
+    # maps supports (or support windows, see `support_window_size`) to their questions
+    support2question = FlatPorts.Input.support_to_question
+    # supports are fed only once even when they are shared by several questions
+    question2support = TensorPort(tf.int32, [None], "question2support",
+                                  "Represents mapping to (distinct) support idx per question",
+                                  "[Q]")
+
     correct_start_training = TensorPortWithDefault(np.array([0], np.int32), tf.int32, [None], "correct_start_training",
                                                    "Represents the correct start of the span which is given to the"
                                                    "model during training for use to predicting end.",
@@ -61,6 +73,13 @@ class XQAPorts:
     start_scores = FlatPorts.Prediction.start_scores
     end_scores = FlatPorts.Prediction.end_scores
     span_prediction = FlatPorts.Prediction.answer_span
+    # n best spans of at most "max_span_length" tokens, see `jack.tf_util.xqa.nbest_spans`
+    nbest_spans = TensorPort(tf.int32, [None, None, 2], "nbest_spans",
+                             "Represents the n best answer spans per question, ordered by score",
+                             "[B, N, 2]")
+    nbest_span_scores = TensorPort(tf.float32, [None, None], "nbest_span_scores",
+                                   "Represents the probabilities of the n best answer spans per question",
+                                   "[B, N]")
     token_char_offsets = TensorPort(tf.int32, [None, None], "token_char_offsets",
                                     "Character offsets of tokens in support.",
                                     "[S, support_length]")
@@ -91,13 +110,14 @@ class XQAInputModule(OnlineInputModule[XQAAnnotation]):
                      # char
                      XQAPorts.unique_word_chars, XQAPorts.unique_word_char_length,
                      XQAPorts.question_words2unique, XQAPorts.support_words2unique,
+                     XQAPorts.frozen_char_embeddings, XQAPorts.question2support,
                      # features
                      XQAPorts.word_in_question,
                      # optional, only during training
                      XQAPorts.correct_start_training, XQAPorts.answer2question_training,
                      XQAPorts.keep_prob, XQAPorts.is_eval,
                      # for output module
-                     XQAPorts.token_char_offsets]
+                     XQAPorts.token_char_offsets, XQAPorts.support2question]
     _training_ports = [XQAPorts.answer_span, XQAPorts.answer2question_training]
 
     def __init__(self, shared_vocab_config):
@@ -114,14 +134,22 @@ class XQAInputModule(OnlineInputModule[XQAAnnotation]):
         self.config = self.shared_vocab_config.config
         self.dropout = self.config.get("dropout", 1)
         self.emb_matrix = self.vocab.emb.lookup
-        self.default_vec = np.zeros([self.vocab.emb_length])
         self.char_vocab = self.shared_vocab_config.char_vocab
-
-    def _get_emb(self, idx):
-        if idx < self.emb_matrix.shape[0]:
-            return self.emb_matrix[idx]
-        else:
-            return self.default_vec
+        # precomputed character embeddings of vocabulary words, see `freeze_char_embeddings`
+        self.char_embedding_table = getattr(self.shared_vocab_config, "char_embedding_table", None)
+        # character ids of each word are computed only once and then looked up for every batch
+        self.char_id_table = CharIdTable(
+            self.char_vocab, frozen_ids=self.vocab.sym2id if self.char_embedding_table is not None else None)
+        self.batch_buffer_depth = self.config.get("batch_buffer_depth", 2)
+
+    def _get_emb(self, ids):
+        """Returns the embeddings [len(ids), N] of word ids, words without embedding get zero vectors."""
+        ids = np.asarray(ids, dtype=np.int64)
+        embedded = np.zeros([len(ids), self.emb_matrix.shape[1]], np.float32)
+        # (compressed) embeddings of all words are gathered and decompressed at once
+        known = ids < self.emb_matrix.shape[0]
+        embedded[known] = self.vocab.emb.gather(ids[known])
+        return embedded
 
     @property
     def output_ports(self) -> List[TensorPort]:
@@ -144,18 +172,27 @@ class XQAInputModule(OnlineInputModule[XQAAnnotation]):
     def preprocess_instance(self, question: QASetting, answers: Optional[List[Answer]] = None) -> XQAAnnotation:
         has_answers = answers is not None
 
+        max_support_length = self.config.get("max_support_length", None)
+        if not has_answers and self.config.get("support_window_size"):
+            # long supports are split into windows at inference instead of being truncated, see __call__
+            max_support_length = None
+
+        sentence_budget = self.config.get("support_sentence_budget")
+        if not has_answers and sentence_budget:
+            # only the sentences most relevant to the question are read, character offsets are kept
+            support = select_support_sentences(question.question, " ".join(question.support), sentence_budget,
+                                               self.config.get("lowercase", False))
+            question = QASetting(question.question, support=[support], id=question.id)
+
         q_tokenized, q_ids, _, q_length, s_tokenized, s_ids, _, s_length, \
         word_in_question, token_offsets, answer_spans = prepare_data(
             question, answers, self.vocab, self.config.get("lowercase", False),
-            with_answers=has_answers, max_support_length=self.config.get("max_support_length", None))
-
-        emb_support = np.zeros([s_length, self.emb_matrix.shape[1]])
-        emb_question = np.zeros([q_length, self.emb_matrix.shape[1]])
+            with_answers=has_answers, max_support_length=max_support_length)
 
-        for k in range(len(s_ids)):
-            emb_support[k] = self._get_emb(s_ids[k])
-        for k in range(len(q_ids)):
-            emb_question[k] = self._get_emb(q_ids[k])
+        emb_support = np.zeros([s_length, self.emb_matrix.shape[1]], np.float32)
+        emb_question = np.zeros([q_length, self.emb_matrix.shape[1]], np.float32)
+        emb_support[:len(s_ids)] = self._get_emb(s_ids)
+        emb_question[:len(q_ids)] = self._get_emb(q_ids)
 
         return XQAAnnotation(
             question_tokens=q_tokenized,
@@ -176,35 +213,71 @@ class XQAInputModule(OnlineInputModule[XQAAnnotation]):
 
         batch_size = len(annotations)
 
-        emb_supports = [a.support_embeddings for a in annotations]
-        emb_questions = [a.question_embeddings for a in annotations]
-
-        support_lengths = [a.support_length for a in annotations]
+        # questions on the same support (e.g., several questions about one paragraph) share a single copy of it
+        support_ids = dict()
+        supports = []
+        question2support = np.empty([batch_size], np.int32)
+        for i, a in enumerate(annotations):
+            key = (tuple(a.support_tokens), tuple(a.token_offsets))
+            support_idx = support_ids.get(key)
+            if support_idx is None:
+                support_idx = support_ids[key] = len(supports)
+                supports.append(a)
+            question2support[i] = support_idx
+
+        support_lengths = [a.support_length for a in supports]
         question_lengths = [a.question_length for a in annotations]
-        wiq = [a.word_in_question for a in annotations]
-        offsets = [a.token_offsets for a in annotations]
 
         q_tokenized = [a.question_tokens for a in annotations]
-        s_tokenized = [a.support_tokens for a in annotations]
-
-        unique_words, unique_word_lengths, question2unique, support2unique = \
-            unique_words_with_chars(q_tokenized, s_tokenized, self.char_vocab)
+        s_tokenized = [a.support_tokens for a in supports]
 
+        if self.char_embedding_table is None:
+            unique_word_chars, unique_word_lengths, question2unique, support2unique = \
+                self.char_id_table.unique_words_with_chars(q_tokenized, s_tokenized)
+        else:
+            frozen_ids, unique_word_chars, unique_word_lengths, question2unique, support2unique = \
+                self.char_id_table.unique_words_with_frozen_chars(q_tokenized, s_tokenized)
+
+        # all arrays are filled into reusable buffers to avoid allocations for every batch
+        emb_dim = self.emb_matrix.shape[1]
+        num_supports = len(supports)
+        emb_support = self.batch_buffer(XQAPorts.emb_support, [num_supports, max(support_lengths), emb_dim])
+        emb_question = self.batch_buffer(XQAPorts.emb_question, [batch_size, max(question_lengths), emb_dim])
+        wiq = self.batch_buffer(XQAPorts.word_in_question,
+                                [batch_size, max(len(a.word_in_question) for a in annotations)])
+        offsets = self.batch_buffer(XQAPorts.token_char_offsets,
+                                    [num_supports, max(len(a.token_offsets) for a in supports)], np.int32)
+        q2u = self.batch_buffer(XQAPorts.question_words2unique,
+                                [batch_size, max(len(q) for q in question2unique)], np.int32)
+        s2u = self.batch_buffer(XQAPorts.support_words2unique,
+                                [num_supports, max(len(s) for s in support2unique)], np.int32)
+        for i, a in enumerate(annotations):
+            emb_question[i, :a.question_embeddings.shape[0]] = a.question_embeddings
+            wiq[i, :len(a.word_in_question)] = a.word_in_question
+            q2u[i, :len(question2unique[i])] = question2unique[i]
+        for i, a in enumerate(supports):
+            emb_support[i, :a.support_embeddings.shape[0]] = a.support_embeddings
+            offsets[i, :len(a.token_offsets)] = a.token_offsets
+            s2u[i, :len(support2unique[i])] = support2unique[i]
 
         output = {
-            XQAPorts.unique_word_chars: unique_words,
+            XQAPorts.unique_word_chars: unique_word_chars,
             XQAPorts.unique_word_char_length: unique_word_lengths,
-            XQAPorts.question_words2unique: question2unique,
-            XQAPorts.support_words2unique: support2unique,
-            XQAPorts.emb_support: stack_and_pad(emb_supports),
+            XQAPorts.question_words2unique: q2u,
+            XQAPorts.support_words2unique: s2u,
+            XQAPorts.emb_support: emb_support,
             XQAPorts.support_length: support_lengths,
-            XQAPorts.emb_question: stack_and_pad(emb_questions),
+            XQAPorts.emb_question: emb_question,
             XQAPorts.question_length: question_lengths,
             XQAPorts.word_in_question: wiq,
             XQAPorts.keep_prob: 1.0 if is_eval else 1 - self.dropout,
             XQAPorts.is_eval: is_eval,
             XQAPorts.token_char_offsets: offsets,
+            XQAPorts.support2question: np.arange(batch_size, dtype=np.int32),
+            XQAPorts.question2support: question2support,
         }
+        if self.char_embedding_table is not None:
+            output[XQAPorts.frozen_char_embeddings] = self.char_embedding_table[frozen_ids]
 
         if with_answers:
             spans = [a.answer_spans for a in annotations]
@@ -216,23 +289,51 @@ class XQAInputModule(OnlineInputModule[XQAAnnotation]):
                 XQAPorts.answer2question_training: span2question,
             })
 
-        # we can only numpify in here, because bucketing is not possible prior
-        batch = numpify(output, keys=[XQAPorts.unique_word_chars,
-                                      XQAPorts.question_words2unique, XQAPorts.support_words2unique,
-                                      XQAPorts.word_in_question, XQAPorts.token_char_offsets])
+        return output
+
+    def __call__(self, qa_settings: List[QASetting]) -> Mapping[TensorPort, np.ndarray]:
+        """Preprocesses all qa_settings, returns a single batch with all instances.
+
+        If "support_window_size" is configured, supports are split into overlapping windows of at most that many
+        tokens (shifted by "support_window_stride", default: half the window size) which are batched instead. The
+        output module merges the predictions of all windows of a question.
+        """
+        annotations = self.preprocess(qa_settings, answers=None, is_eval=True)
+        window_size = self.config.get("support_window_size")
+        if not window_size:
+            return self.create_batch(annotations, is_eval=True, with_answers=False)
+
+        stride = self.config.get("support_window_stride") or max(1, window_size // 2)
+        windows, support2question = [], []
+        for i, a in enumerate(annotations):
+            for start, end in support_windows(a.support_length, window_size, stride):
+                windows.append(a._replace(
+                    support_tokens=a.support_tokens[start:end],
+                    support_ids=a.support_ids[start:end],
+                    support_length=end - start,
+                    support_embeddings=a.support_embeddings[start:end],
+                    word_in_question=a.word_in_question[start:end],
+                    token_offsets=a.token_offsets[start:end]))
+                support2question.append(i)
+
+        batch = self.create_batch(windows, is_eval=True, with_answers=False)
+        batch[XQAPorts.support2question] = np.array(support2question, dtype=np.int32)
         return batch
 
 
 class AbstractXQAModelModule(TFModelModule):
+    # variable scope of the model's character CNN, required for `char_embeddings`
+    _char_embedding_scope = None
     _input_ports = [XQAPorts.emb_question, XQAPorts.question_length,
                     XQAPorts.emb_support, XQAPorts.support_length,
                     # char embedding inputs
                     XQAPorts.unique_word_chars, XQAPorts.unique_word_char_length,
                     XQAPorts.question_words2unique, XQAPorts.support_words2unique,
+                    XQAPorts.frozen_char_embeddings, XQAPorts.question2support,
                     # optional input, provided only during training
                     XQAPorts.answer2question_training, XQAPorts.keep_prob, XQAPorts.is_eval]
     _output_ports = [XQAPorts.start_scores, XQAPorts.end_scores,
-                     XQAPorts.span_prediction]
+                     XQAPorts.span_prediction, XQAPorts.nbest_spans, XQAPorts.nbest_span_scores]
     _training_input_ports = [XQAPorts.start_scores, XQAPorts.end_scores,
                              XQAPorts.answer_span, XQAPorts.answer2question_training]
     _training_output_ports = [Ports.loss]
@@ -256,36 +357,66 @@ class AbstractXQAModelModule(TFModelModule):
     def create_output(self, shared_vocab_config, emb_question, question_length,
                       emb_support, support_length,
                       unique_word_chars, unique_word_char_length,
-                      question_words2unique, support_words2unique,
+                      question_words2unique, support_words2unique, frozen_char_embeddings, question2support,
                       answer2question, keep_prob, is_eval):
         """extractive QA model
         Args:
             shared_vocab_config: has at least a field config (dict) with keys "rep_dim", "rep_dim_input"
             emb_question: [Q, L_q, N]
             question_length: [Q]
-            emb_support: [Q, L_s, N]
-            support_length: [Q]
+            emb_support: [S, L_s, N]
+            support_length: [S]
             unique_word_chars
             unique_word_char_length
             question_words2unique
             support_words2unique
+            frozen_char_embeddings: [F, repr_dim], precomputed character embeddings of the first F unique words
+            question2support: [Q], index of the support of each question
             answer2question: [A], only during training, i.e., is_eval=False
             keep_prob: []
             is_eval: []
 
         Returns:
-            start_scores [B, L_s, N], end_scores [B, L_s, N], span_prediction [B, 2]
+            start_scores [B, L_s, N], end_scores [B, L_s, N], span_prediction [B, 2], nbest_spans [B, K, 2],
+            nbest_span_scores [B, K]
         """
         raise NotImplementedError('Classes that inherit from AbstractExtractiveQA need to override create_output!')
 
+    def char_embeddings(self, unique_word_chars, unique_word_lengths):
+        """Embeds words with the trained character CNN of this model.
+
+        Args:
+            unique_word_chars: [U, max_num_chars] character ids
+            unique_word_lengths: [U]
+
+        Returns:
+            [U, repr_dim] character embeddings
+        """
+        if self._char_embedding_scope is None:
+            raise NotImplementedError('{} does not support frozen character embeddings!'.format(type(self).__name__))
+        if getattr(self, '_char_embedding_tensors', None) is None:
+            config = self.shared_resources.config
+            scope = self._char_embedding_scope
+            if "name" in config:
+                scope = config["name"] + "/" + scope
+            chars = tf.placeholder(tf.int32, [None, None], "frozen_unique_word_chars")
+            lengths = tf.placeholder(tf.int32, [None], "frozen_unique_word_lengths")
+            with tf.variable_scope(scope, reuse=True):
+                word_idx = tf.expand_dims(tf.range(tf.shape(lengths)[0]), 0)
+                [embedded] = conv_char_embedding_alt(self.shared_resources.char_vocab, config["repr_dim"],
+                                                     chars, lengths, word_idx)
+            self._char_embedding_tensors = (chars, lengths, embedded[0])
+        chars, lengths, embedded = self._char_embedding_tensors
+        return self.tf_session.run(embedded, {chars: unique_word_chars, lengths: unique_word_lengths})
+
     def create_training_output(self, shared_resources, start_scores, end_scores, answer_span, answer_to_question):
         return xqa_min_crossentropy_loss(start_scores, end_scores, answer_span, answer_to_question)
 
 
-def _np_softmax(x):
-    """Compute softmax values for each sets of scores in x."""
-    e_x = np.exp(x - np.max(x))
-    return e_x / e_x.sum(axis=0)
+def _np_logsumexp(x):
+    """Compute row-wise logsumexp of scores in x [B, L]."""
+    x_max = np.max(x, axis=1, keepdims=True)
+    return np.log(np.sum(np.exp(x - x_max), axis=1)) + x_max[:, 0]
 
 
 class XQAOutputModule(OutputModule):
@@ -293,34 +424,38 @@ class XQAOutputModule(OutputModule):
         self.vocab = shared_vocab_confg.vocab
         self.setup()
 
-    def __call__(self, questions, span_prediction, token_char_offsets, start_scores, end_scores) -> List[Answer]:
-        answers = []
-        for i, q in enumerate(questions):
-            start, end = span_prediction[i, 0], span_prediction[i, 1]
-            char_start = token_char_offsets[i, start]
-            if end + 1 < token_char_offsets.shape[1]:
-                char_end = token_char_offsets[i, end + 1]
-                if char_end == 0:
-                    char_end = len(q.support[0])
-            else:
-                char_end = len(q.support[0])
-
-            answer = q.support[0][char_start: char_end]
-
-            start_probs = _np_softmax(start_scores[i])
-            end_probs = _np_softmax(end_scores[i])
-
-            answer = answer.rstrip()
-            char_end = char_start + len(answer)
-
-            answers.append(Answer(answer, span=(char_start, char_end), score=start_probs[start] * end_probs[end]))
+    def __call__(self, questions, span_prediction, token_char_offsets, start_scores, end_scores,
+                 support2question, question2support) -> List[Answer]:
+        rows = np.arange(span_prediction.shape[0])
+        starts, ends = span_prediction[:, 0], span_prediction[:, 1]
+        # product of start and end probabilities of the predicted spans
+        scores = np.exp(start_scores[rows, starts] - _np_logsumexp(start_scores) +
+                        end_scores[rows, ends] - _np_logsumexp(end_scores))
+        char_starts = token_char_offsets[question2support, starts]
+        end_token_offsets = token_char_offsets[question2support, ends]
+
+        # supports may be split into several windows per question, the best scoring answer of all windows is kept
+        support2question = np.asarray(support2question)
+        order = np.argsort(-scores, kind='mergesort')
+        _, first = np.unique(support2question[order], return_index=True)
+        best_rows = order[first]
+
+        answers = [None] * len(questions)
+        for i, q_idx, char_start, end_token_offset, score in zip(
+                best_rows.tolist(), support2question[best_rows].tolist(), char_starts[best_rows].tolist(),
+                end_token_offsets[best_rows].tolist(), scores[best_rows].tolist()):
+            support = questions[q_idx].support[0]
+            # the next token might not follow directly, e.g., when support sentences were left out
+            answer = support[char_start: token_end(support, end_token_offset)].rstrip()
+            answers[q_idx] = Answer(answer, span=(char_start, char_start + len(answer)), score=score)
 
         return answers
 
     @property
     def input_ports(self) -> List[TensorPort]:
         return [FlatPorts.Prediction.answer_span, XQAPorts.token_char_offsets,
-                FlatPorts.Prediction.start_scores, FlatPorts.Prediction.end_scores]
+                FlatPorts.Prediction.start_scores, FlatPorts.Prediction.end_scores,
+                XQAPorts.support2question, XQAPorts.question2support]
 
 
 class XQANoScoreOutputModule(OutputModule):
@@ -329,25 +464,60 @@ class XQANoScoreOutputModule(OutputModule):
         self.setup()
 
     def __call__(self, questions, span_prediction, token_char_offsets) -> List[Answer]:
+        rows = np.arange(span_prediction.shape[0])
+        char_starts = token_char_offsets[rows, span_prediction[:, 0]].tolist()
+        end_token_offsets = token_char_offsets[rows, span_prediction[:, 1]].tolist()
+
         answers = []
-        for i, q in enumerate(questions):
-            start, end = span_prediction[i, 0], span_prediction[i, 1]
-            char_start = token_char_offsets[i, start]
-            if end + 1 < token_char_offsets.shape[1]:
-                char_end = token_char_offsets[i, end + 1]
-                if char_end == 0:
-                    char_end = len(q.support[0])
-            else:
-                char_end = len(q.support[0])
-            answer = q.support[0][char_start: char_end]
-
-            answer = answer.rstrip()
-            char_end = char_start + len(answer)
-
-            answers.append(Answer(answer, span=(char_start, char_end), score=1.0))
+        for q, char_start, end_token_offset in zip(questions, char_starts, end_token_offsets):
+            support = q.support[0]
+            answer = support[char_start: token_end(support, end_token_offset)].rstrip()
+            answers.append(Answer(answer, span=(char_start, char_start + len(answer)), score=1.0))
 
         return answers
 
     @property
     def input_ports(self) -> List[TensorPort]:
         return [FlatPorts.Prediction.answer_span, XQAPorts.token_char_offsets]
+
+
+class XQASpanScoreOutputModule(XQANoScoreOutputModule):
+    """Scores answers by the probability of the predicted span among all candidate spans (e.g., of CBOW)."""
+
+    def __call__(self, questions, span_prediction, token_char_offsets, nbest_span_scores) -> List[Answer]:
+        answers = super(XQASpanScoreOutputModule, self).__call__(questions, span_prediction, token_char_offsets)
+        # the predicted span is the best of the n best spans
+        return [Answer(a.text, span=a.span, score=score)
+                for a, score in zip(answers, nbest_span_scores[:, 0].tolist())]
+
+    @property
+    def input_ports(self) -> List[TensorPort]:
+        return [FlatPorts.Prediction.answer_span, XQAPorts.token_char_offsets, XQAPorts.nbest_span_scores]
+
+
+def freeze_char_embeddings(reader, batch_size=1024):
+    """Precomputes the character embeddings of all vocabulary words for inference.
+
+    The embeddings are stored as `char_embedding_table` in the shared resources of the reader and thus saved with it.
+    Afterwards, the input module serves character embeddings of vocabulary words by lookup and the character CNN is
+    only applied to out-of-vocabulary words. The reader must not be trained any further.
+
+    Args:
+        reader: a trained extractive QA reader, e.g., FastQA (with character embeddings) or BiDAF
+        batch_size: number of words embedded at once
+    """
+    shared_resources = reader.shared_resources
+    vocab = shared_resources.vocab
+    num_words = max(vocab.id2sym) + 1
+    char_id_table = CharIdTable(shared_resources.char_vocab)
+    rows = char_id_table.rows([vocab.id2sym.get(i, "") for i in range(num_words)])
+
+    table = np.zeros([num_words, shared_resources.config["repr_dim"]], np.float32)
+    for start in range(0, num_words, batch_size):
+        batch_rows = rows[start:start + batch_size]
+        lengths = char_id_table.lengths[batch_rows]
+        chars = char_id_table.chars[batch_rows, :max(1, lengths.max())]
+        table[start:start + batch_size] = reader.model_module.char_embeddings(chars, lengths)
+
+    shared_resources.char_embedding_table = table
+    reader.input_module.setup()
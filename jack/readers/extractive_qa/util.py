@@ -2,17 +2,26 @@ import random
 import re
 from typing import List, Optional, Tuple
 
+import numpy as np
+
 from jack.core.data_structures import QASetting, Answer
 from jack.util import preprocessing
 from jack.util.vocab import Vocab
 
 __pattern = re.compile('\w+|[^\w\s]')
+__sentence_separator = re.compile('(?<=[.!?])\s+')
 
 
 def tokenize(text):
     return __pattern.findall(text)
 
 
+def token_end(text, offset):
+    """Returns the character end of the token starting at `offset` in `text`."""
+    match = __pattern.match(text, offset)
+    return match.end() if match else offset
+
+
 def token_to_char_offsets(text, tokenized_text):
     offsets = []
     offset = 0
@@ -54,16 +63,17 @@ def prepare_data(qa_setting: QASetting,
 
     rng = random.Random(12345)
 
-    word_in_question = []
-
+    # hashed membership instead of scanning the question for every support token
     if with_lemmas:
         assert support_lemmas is not None
-        for lemma in support_lemmas:
-            word_in_question.append(float(lemma in question_lemmas and
-                                          (not wiq_contentword or (lemma.isalnum() and not lemma.is_stop))))
+        question_lemmas_set = set(question_lemmas)
+        word_in_question = [float(lemma in question_lemmas_set and
+                                  (not wiq_contentword or (lemma.isalnum() and not lemma.is_stop)))
+                            for lemma in support_lemmas]
     else:
-        for token in support_tokens:
-            word_in_question.append(float(token in question_tokens and (not wiq_contentword or token.isalnum())))
+        question_tokens_set = set(question_tokens)
+        word_in_question = [float(token in question_tokens_set and (not wiq_contentword or token.isalnum()))
+                            for token in support_tokens]
 
     min_answer = len(support_tokens)
     max_answer = 0
@@ -71,21 +81,20 @@ def prepare_data(qa_setting: QASetting,
     answer_spans = []
     if with_answers:
         assert isinstance(answers, list)
-        for a in answers:
-            start = 0
-            while start < len(token_offsets) and token_offsets[start] < a.span[0]:
-                start += 1
-
-            if start == len(token_offsets):
-                continue
-
-            end = start
-            while end + 1 < len(token_offsets) and token_offsets[end + 1] < a.span[1]:
-                end += 1
-            if (start, end) not in answer_spans:
-                answer_spans.append((start, end))
-                min_answer = min(min_answer, start)
-                max_answer = max(max_answer, end)
+        if answers:
+            # token offsets are sorted, so the first token starting at or after the answer start is found by
+            # binary search, as well as the last token starting before the answer end
+            offsets = np.asarray(token_offsets)
+            answer_char_spans = np.array([a.span for a in answers]).reshape([-1, 2])
+            starts = np.searchsorted(offsets, answer_char_spans[:, 0], side='left')
+            ends = np.maximum(starts, np.searchsorted(offsets, answer_char_spans[:, 1], side='left') - 1)
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                if start == len(token_offsets):
+                    continue
+                if (start, end) not in answer_spans:
+                    answer_spans.append((start, end))
+                    min_answer = min(min_answer, start)
+                    max_answer = max(max_answer, end)
 
     # cut support whenever there is a maximum allowed length and recompute answer spans
     if max_support_length is not None and len(support_tokens) > max_support_length > 0:
@@ -116,6 +125,65 @@ def prepare_data(qa_setting: QASetting,
            word_in_question, token_offsets, answer_spans
 
 
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """Returns the (start, end) character positions of all sentences in `text`."""
+    spans = []
+    start = 0
+    for separator in __sentence_separator.finditer(text):
+        spans.append((start, separator.start()))
+        start = separator.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+
+def select_support_sentences(question: str, support: str, max_tokens: int, lowercase: bool = True) -> str:
+    """Keeps only the sentences of the support that are most relevant to the question.
+
+    Sentences are scored by the number of distinct question words they contain and the best ones are kept (at least
+    one) as long as they fit into `max_tokens` tokens. All other sentences are replaced by whitespace, so character
+    offsets into the returned support are character offsets into the original support.
+    """
+    if lowercase:
+        question = question.lower()
+    question_words = {t for t in tokenize(question) if t.isalnum()}
+    spans = sentence_spans(support)
+    sentence_tokens = [tokenize(support[start:end].lower() if lowercase else support[start:end])
+                       for start, end in spans]
+    if sum(len(tokens) for tokens in sentence_tokens) <= max_tokens:
+        return support
+
+    scores = [len(question_words.intersection(tokens)) for tokens in sentence_tokens]
+    keep = [False] * len(spans)
+    num_tokens = 0
+    for i in sorted(range(len(spans)), key=lambda i: -scores[i]):
+        if num_tokens + len(sentence_tokens[i]) <= max_tokens or num_tokens == 0:
+            keep[i] = True
+            num_tokens += len(sentence_tokens[i])
+
+    pieces = []
+    position = 0
+    for (start, end), k in zip(spans, keep):
+        pieces.append(support[position:start])
+        pieces.append(support[start:end] if k else " " * (end - start))
+        position = end
+    pieces.append(support[position:])
+    return "".join(pieces)
+
+
+def support_windows(support_length: int, window_size: int, stride: int) -> List[Tuple[int, int]]:
+    """Splits a support of `support_length` tokens into overlapping windows.
+
+    Returns:
+        list of (start, end) token positions of windows with at most `window_size` tokens, the last window is aligned
+        with the end of the support
+    """
+    if support_length <= window_size:
+        return [(0, support_length)]
+    starts = list(range(0, support_length - window_size, stride)) + [support_length - window_size]
+    return [(start, start + window_size) for start in starts]
+
+
 def unique_words_with_chars(q_tokenized, s_tokenized, char_vocab, indices=None, char_limit=20):
     indices = indices or range(len(q_tokenized))
 
@@ -146,3 +214,137 @@ def unique_words_with_chars(q_tokenized, s_tokenized, char_vocab, indices=None,
         support2unique.append(s2u)
 
     return unique_words, unique_word_lengths, question2unique, support2unique
+
+
+class CharIdTable:
+    """Memoized character ids of words.
+
+    The character encoding of every word is computed only once and stored in a dense `[num_words, char_limit]`
+    array together with the word lengths. Batch construction then reduces to a lookup of the word rows and a gather
+    of the unique rows. To bound its memory, the table is cleared before a batch once it holds more than `max_size`
+    words besides those given on construction, which are always kept.
+    """
+
+    def __init__(self, char_vocab, char_limit=20, words=None, initial_size=4096, frozen_ids=None, max_size=500000):
+        """
+        Args:
+            char_vocab: dict from characters to ids, unknown characters are mapped to 0
+            char_limit: words are cut to this number of characters
+            words: optional iterable of words (e.g., the vocabulary) to encode right away
+            initial_size: initial number of rows of the table, it grows on demand
+            max_size: number of rows besides those of `words` after which these rows are dropped from the table
+            frozen_ids: optional dict from words to rows of a table of precomputed character embeddings, see
+                `unique_words_with_frozen_chars`
+        """
+        self.char_vocab = char_vocab
+        self.char_limit = char_limit
+        self.max_size = max_size
+        self.frozen_ids = frozen_ids or dict()
+        self.word2row = dict()
+        self.chars = np.zeros([initial_size, char_limit], np.int32)
+        self.lengths = np.zeros([initial_size], np.int32)
+        self.frozen = np.full([initial_size], -1, np.int64)
+        self._num_rows = 0
+        if words is not None:
+            for w in words:
+                self.row(w)
+        self._num_kept_rows = self._num_rows
+
+    def __len__(self):
+        return self._num_rows
+
+    def row(self, word):
+        """Returns the row of `word` in the table, encoding it if it was not seen before."""
+        row = self.word2row.get(word)
+        if row is None:
+            cut_word = word[:self.char_limit]
+            row = self.word2row.get(cut_word)
+            if row is None:
+                row = self._num_rows
+                if row == self.chars.shape[0]:
+                    self.chars = np.concatenate([self.chars, np.zeros_like(self.chars)])
+                    self.lengths = np.concatenate([self.lengths, np.zeros_like(self.lengths)])
+                    self.frozen = np.concatenate([self.frozen, np.full_like(self.frozen, -1)])
+                self.chars[row, :len(cut_word)] = [self.char_vocab.get(c, 0) for c in cut_word]
+                self.lengths[row] = len(cut_word)
+                self._num_rows += 1
+                self.word2row[cut_word] = row
+            if self.frozen[row] < 0:
+                self.frozen[row] = self.frozen_ids.get(word, -1)
+            self.word2row[word] = row
+        return row
+
+    def clear(self):
+        """Drops all words from the table except those given on construction."""
+        kept = self._num_kept_rows
+        self.word2row = {w: r for w, r in self.word2row.items() if r < kept}
+        self.chars[kept:] = 0
+        self.lengths[kept:] = 0
+        self.frozen[kept:] = -1
+        self._num_rows = kept
+
+    def rows(self, words):
+        """Returns the rows of all `words` as int array."""
+        return np.fromiter((self.row(w) for w in words), np.int64, len(words))
+
+    def _unique_rows(self, q_tokenized, s_tokenized):
+        if self._num_rows - self._num_kept_rows > self.max_size:
+            self.clear()
+        rows = [self.rows(t) for t in q_tokenized] + [self.rows(t) for t in s_tokenized]
+        unique_rows, inverse = np.unique(np.concatenate(rows), return_inverse=True)
+        split_points = np.cumsum([len(r) for r in rows[:-1]])
+        return unique_rows, inverse.astype(np.int32), split_points
+
+    def _gather_chars(self, rows):
+        lengths = self.lengths[rows]
+        max_length = max(1, lengths.max()) if len(rows) > 0 else 1
+        return self.chars[rows, :max_length], lengths
+
+    def unique_words_with_chars(self, q_tokenized, s_tokenized):
+        """Gathers the character ids of all unique words in questions and supports.
+
+        Args:
+            q_tokenized: list of tokenized questions
+            s_tokenized: list of tokenized supports
+
+        Returns:
+            unique_word_chars [U, max_num_chars], unique_word_lengths [U], list of arrays mapping question tokens to
+            unique words, list of arrays mapping support tokens to unique words
+        """
+        unique_rows, inverse, split_points = self._unique_rows(q_tokenized, s_tokenized)
+        unique_word_chars, unique_word_lengths = self._gather_chars(unique_rows)
+        words2unique = np.split(inverse, split_points)
+        return unique_word_chars, unique_word_lengths, \
+               words2unique[:len(q_tokenized)], words2unique[len(q_tokenized):]
+
+    def unique_words_with_frozen_chars(self, q_tokenized, s_tokenized):
+        """Like `unique_words_with_chars` but separates words with precomputed character embeddings.
+
+        Unique words that appear in `frozen_ids` come first, only the remaining words are returned with their
+        characters. If there are no such words, a single dummy word is returned to keep the character
+        CNN well defined.
+
+        Args:
+            q_tokenized: list of tokenized questions
+            s_tokenized: list of tokenized supports
+
+        Returns:
+            frozen_ids [F], unique_word_chars [U - F, max_num_chars], unique_word_lengths [U - F], list of arrays
+            mapping question tokens to unique words, list of arrays mapping support tokens to unique words
+        """
+        unique_rows, inverse, split_points = self._unique_rows(q_tokenized, s_tokenized)
+        frozen = self.frozen[unique_rows]
+        is_frozen = frozen >= 0
+        order = np.concatenate([np.flatnonzero(is_frozen), np.flatnonzero(~is_frozen)])
+        position = np.empty_like(order, dtype=np.int32)
+        position[order] = np.arange(len(order), dtype=np.int32)
+        words2unique = np.split(position[inverse], split_points)
+
+        computed_rows = unique_rows[~is_frozen]
+        if len(computed_rows) > 0:
+            unique_word_chars, unique_word_lengths = self._gather_chars(computed_rows)
+        else:
+            unique_word_chars = np.zeros([1, 1], np.int32)
+            unique_word_lengths = np.ones([1], np.int32)
+        return frozen[is_frozen], unique_word_chars, unique_word_lengths, \
+               words2unique[:len(q_tokenized)], words2unique[len(q_tokenized):]
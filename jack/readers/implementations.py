@@ -48,6 +48,15 @@ def reader_from_file(reader_dir: str):
     return reader
 
 
+def reader_from_export(export_dir: str):
+    """Loads a reader exported with `jack.core.inference_graph.export_reader` for inference."""
+    from jack.core.inference_graph import setup_frozen_reader
+    shared_resources = create_shared_resources()
+    shared_resources.load(os.path.join(export_dir, "shared_resources"))
+    reader = readers[shared_resources.config["model"]](shared_resources)
+    return setup_frozen_reader(reader, export_dir)
+
+
 def create_shared_resources(resources_or_config: Union[dict, SharedResources] = None) -> SharedResources:
     """
     Produces a SharedResources object based on the input.
@@ -143,12 +152,12 @@ def cbow_xqa_reader(resources_or_conf: Union[dict, SharedResources] = None):
     """Creates a FastQA reader instance (extractive qa model). """
     from jack.readers.extractive_qa.cbow import CbowXQAInputModule
     from jack.readers.extractive_qa.cbow import CbowXQAModule
-    from jack.readers.extractive_qa.shared import XQANoScoreOutputModule
+    from jack.readers.extractive_qa.shared import XQASpanScoreOutputModule
     shared_resources = create_shared_resources(resources_or_conf)
 
     input_module = CbowXQAInputModule(shared_resources)
     model_module = CbowXQAModule(shared_resources)
-    output_module = XQANoScoreOutputModule(shared_resources)
+    output_module = XQASpanScoreOutputModule(shared_resources)
     return TFReader(shared_resources, input_module, model_module, output_module)
 
 
@@ -200,9 +200,6 @@ class ModelFOutputModule(OutputModule):
         # len(inputs) == batch size
         # logits: [batch_size, max_num_candidates]
         winning_indices = np.argmax(logits, axis=1)
-        result = []
-        for index_in_batch, question in enumerate(inputs):
-            winning_index = winning_indices[index_in_batch]
-            score = logits[index_in_batch, winning_index]
-            result.append(Answer(question.atomic_candidates[winning_index], score=score))
-        return result
+        scores = logits[np.arange(logits.shape[0]), winning_indices]
+        return [Answer(question.atomic_candidates[winning_index], score=score)
+                for question, winning_index, score in zip(inputs, winning_indices.tolist(), scores.tolist())]
@@ -22,6 +22,11 @@ class KnowledgeGraphEmbeddingInputModule(OnlineInputModule[List[List[int]]]):
         self.shared_resources.config['predicate_to_index'] = self.predicate_to_index
         return self.shared_resources
 
+    def setup(self):
+        # indices are kept in the config of stored readers
+        self.entity_to_index = self.shared_resources.config['entity_to_index']
+        self.predicate_to_index = self.shared_resources.config['predicate_to_index']
+
     @property
     def training_ports(self) -> List[TensorPort]:
         return []
@@ -137,13 +142,14 @@ class KnowledgeGraphEmbeddingModelModule(TFModelModule):
         from jack.readers.knowledge_base_population import scores
         assert self.model_name is not None
 
+        from jack.tf_util.misc import jit_scope
         model_class = scores.get_function(self.model_name)
-        model = model_class(
-            subject_embeddings=subject_emb,
-            predicate_embeddings=predicate_emb,
-            object_embeddings=object_emb)
-
-        return model()
+        with jit_scope(shared_resources.config.get('xla') == 'scopes'):
+            model = model_class(
+                subject_embeddings=subject_emb,
+                predicate_embeddings=predicate_emb,
+                object_embeddings=object_emb)
+            return model()
 
 
 class KnowledgeGraphEmbeddingOutputModule(OutputModule):
@@ -157,8 +163,4 @@ class KnowledgeGraphEmbeddingOutputModule(OutputModule):
     def __call__(self, inputs: Sequence[QASetting], logits: np.ndarray) -> Sequence[Answer]:
         # len(inputs) == batch size
         # logits: [batch_size, max_num_candidates]
-        results = []
-        for index_in_batch, question in enumerate(inputs):
-            score = logits[index_in_batch]
-            results.append(Answer(None, score=score))
-        return results
+        return [Answer(None, score=score) for score in logits[:len(inputs)].tolist()]
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+
+"""
+Scoring of triples with the embeddings of knowledge graph embedding readers (`distmult_reader`, `complex_reader`,
+`transe_reader`) in NumPy.
+
+`KGEScorer` holds the entity and predicate embedding tables of a trained reader, optionally memory-mapped, and scores
+batches of triples like the model classes in `jack.readers.knowledge_base_population.scores`. It can be used as
+scoring function of `jack.eval.kbp.compute_ranks` or, via `NumpyKGEModelModule`, as model module of a reader. No
+tensorflow session is needed, except for reading the checkpoint of a stored reader once.
+"""
+
+import os
+import pickle
+from typing import List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from jack.core.model_module import ModelModule
+from jack.core.reader import JTReader
+from jack.core.tensorport import Ports, TensorPort
+from jack.readers.knowledge_base_population.shared import KBPPorts
+
+
+def _max_norm(embeddings: np.ndarray, max_norm: float = 1.0) -> np.ndarray:
+    """Rescales rows with a larger L2 norm to `max_norm`, like `tf.nn.embedding_lookup(..., max_norm=max_norm)`."""
+    norms = np.sqrt(np.sum(np.square(embeddings), axis=1, keepdims=True))
+    return embeddings * (max_norm / np.maximum(norms, max_norm))
+
+
+def translating_scores(subject_embeddings, predicate_embeddings, object_embeddings):
+    """TransE with negative L1 distance."""
+    return - np.sum(np.abs(subject_embeddings + predicate_embeddings - object_embeddings), axis=1)
+
+
+def bilinear_diagonal_scores(subject_embeddings, predicate_embeddings, object_embeddings):
+    """DistMult."""
+    return np.sum(subject_embeddings * predicate_embeddings * object_embeddings, axis=1)
+
+
+def bilinear_scores(subject_embeddings, predicate_embeddings, object_embeddings):
+    """RESCAL, predicate embeddings are flattened [N, N] matrices."""
+    emb_size = subject_embeddings.shape[1]
+    W = predicate_embeddings.reshape([-1, emb_size, emb_size])
+    return np.sum(np.matmul(subject_embeddings[:, np.newaxis], W)[:, 0] * object_embeddings, axis=1)
+
+
+def complex_scores(subject_embeddings, predicate_embeddings, object_embeddings):
+    """ComplEx, the first half of all embeddings are real, the second half imaginary parts."""
+    es_re, es_im = np.split(subject_embeddings, 2, axis=1)
+    eo_re, eo_im = np.split(object_embeddings, 2, axis=1)
+    ew_re, ew_im = np.split(predicate_embeddings, 2, axis=1)
+    # Re(<es, ew, conj(eo)>)
+    return np.sum(ew_re * (es_re * eo_re + es_im * eo_im) + ew_im * (es_re * eo_im - es_im * eo_re), axis=1)
+
+
+_SCORING_FUNCTIONS = {
+    'TransE': translating_scores, 'TranslatingEmbeddings': translating_scores, 'TranslatingModel': translating_scores,
+    'DistMult': bilinear_diagonal_scores, 'BilinearDiagonal': bilinear_diagonal_scores,
+    'BilinearDiagonalModel': bilinear_diagonal_scores,
+    'RESCAL': bilinear_scores, 'Bilinear': bilinear_scores, 'BilinearModel': bilinear_scores,
+    'ComplEx': complex_scores, 'ComplexE': complex_scores, 'ComplexModel': complex_scores,
+}
+
+
+def get_function(function_name):
+    if function_name not in _SCORING_FUNCTIONS:
+        raise ValueError('Unknown model: {}'.format(function_name))
+    return _SCORING_FUNCTIONS[function_name]
+
+
+class KGEScorer:
+    """Scores triples with entity and predicate embedding tables."""
+
+    def __init__(self, model_name: str, entity_embeddings: np.ndarray, predicate_embeddings: np.ndarray,
+                 entity_to_index: Mapping[str, int], predicate_to_index: Mapping[str, int], batch_size: int = 8192):
+        """
+        Args:
+            model_name: name of the model in `jack.readers.knowledge_base_population.scores`, e.g., 'DistMult'
+            entity_embeddings: [E, N] entity embeddings
+            predicate_embeddings: [P, M] predicate embeddings
+            entity_to_index: dict from entities to rows of entity_embeddings
+            predicate_to_index: dict from predicates to rows of predicate_embeddings
+            batch_size: number of triples scored at once
+        """
+        self.model_name = model_name
+        self.scoring_function = get_function(model_name)
+        self.entity_embeddings = entity_embeddings
+        self.predicate_embeddings = predicate_embeddings
+        self.entity_to_index = entity_to_index
+        self.predicate_to_index = predicate_to_index
+        self.batch_size = batch_size
+
+    def score(self, triple_ids) -> np.ndarray:
+        """Scores triples of ids.
+
+        Args:
+            triple_ids: [T, 3] subject, predicate and object ids
+
+        Returns:
+            [T] scores
+        """
+        triple_ids = np.asarray(triple_ids, dtype=np.int64).reshape([-1, 3])
+        scores = np.empty([triple_ids.shape[0]], np.float32)
+        for start in range(0, triple_ids.shape[0], self.batch_size):
+            ids = triple_ids[start:start + self.batch_size]
+            # entities are looked up with a maximum norm of 1, as in the tensorflow model
+            scores[start:start + self.batch_size] = self.scoring_function(
+                _max_norm(np.asarray(self.entity_embeddings[ids[:, 0]], np.float32)),
+                np.asarray(self.predicate_embeddings[ids[:, 1]], np.float32),
+                _max_norm(np.asarray(self.entity_embeddings[ids[:, 2]], np.float32)))
+        return scores
+
+    def __call__(self, triples: Sequence[Tuple[str, str, str]]) -> np.ndarray:
+        """Scores (subject, predicate, object) triples, e.g., as scoring function of `jack.eval.kbp.compute_ranks`."""
+        return self.score([[self.entity_to_index[s], self.predicate_to_index[p], self.entity_to_index[o]]
+                           for s, p, o in triples])
+
+    def store(self, path: str):
+        """Stores the embedding tables as .npy files, which can be memory-mapped when loading."""
+        np.save(path + ".entities.npy", np.asarray(self.entity_embeddings))
+        np.save(path + ".predicates.npy", np.asarray(self.predicate_embeddings))
+        with open(path + ".meta.pkl", "wb") as f:
+            pickle.dump({"model_name": self.model_name, "entity_to_index": self.entity_to_index,
+                         "predicate_to_index": self.predicate_to_index}, f, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path: str, mmap: bool = False) -> 'KGEScorer':
+        """Loads a scorer stored with `store`, with memory-mapped embedding tables if `mmap` is set."""
+        mmap_mode = 'r' if mmap else None
+        with open(path + ".meta.pkl", "rb") as f:
+            meta = pickle.load(f)
+        return KGEScorer(meta["model_name"], np.load(path + ".entities.npy", mmap_mode=mmap_mode),
+                         np.load(path + ".predicates.npy", mmap_mode=mmap_mode),
+                         meta["entity_to_index"], meta["predicate_to_index"])
+
+    @staticmethod
+    def from_checkpoint(path: str, model_name: str, entity_to_index: Mapping[str, int],
+                        predicate_to_index: Mapping[str, int]) -> 'KGEScorer':
+        """Reads the embedding tables from the checkpoint of a `KnowledgeGraphEmbeddingModelModule` at path."""
+        import tensorflow as tf
+        checkpoint = tf.train.NewCheckpointReader(path)
+        variables = list(checkpoint.get_variable_to_shape_map())
+
+        def get(name):
+            matches = [v for v in variables if v.endswith('knowledge_graph_embedding/' + name)]
+            assert len(matches) == 1, "Cannot find a unique variable {} in {}.".format(name, path)
+            return checkpoint.get_tensor(matches[0])
+
+        return KGEScorer(model_name, get('entity_embeddings'), get('predicate_embeddings'),
+                         entity_to_index, predicate_to_index)
+
+
+class NumpyKGEModelModule(ModelModule):
+    """Model module of knowledge graph embedding readers scoring triples with a `KGEScorer`."""
+
+    def __init__(self, shared_resources, model_name: str = None, mmap: bool = False):
+        """
+        Args:
+            shared_resources: shared resources of the reader
+            model_name: name of the model, only needed for loading the checkpoint of a tensorflow reader
+            mmap: whether stored embedding tables are memory-mapped
+        """
+        self.shared_resources = shared_resources
+        self.model_name = model_name
+        self.mmap = mmap
+        self.scorer = None
+
+    @property
+    def input_ports(self) -> List[TensorPort]:
+        return [Ports.Input.question]
+
+    @property
+    def output_ports(self) -> List[TensorPort]:
+        return [KBPPorts.triple_logits]
+
+    @property
+    def training_input_ports(self) -> List[TensorPort]:
+        return []
+
+    @property
+    def training_output_ports(self) -> List[TensorPort]:
+        return []
+
+    def setup(self, is_training=True):
+        assert not is_training, "NumPy scoring cannot be trained, train a knowledge graph embedding reader instead."
+
+    def store(self, path):
+        self.scorer.store(path)
+
+    def load(self, path):
+        """Loads a scorer stored with `store` or the embeddings from the checkpoint of a tensorflow reader."""
+        if os.path.exists(path + ".meta.pkl"):
+            self.scorer = KGEScorer.load(path, self.mmap)
+        else:
+            config = self.shared_resources.config
+            self.scorer = KGEScorer.from_checkpoint(path, self.model_name, config["entity_to_index"],
+                                                    config["predicate_to_index"])
+
+    def __call__(self, batch: Mapping[TensorPort, np.ndarray],
+                 goal_ports: List[TensorPort] = None) -> Mapping[TensorPort, np.ndarray]:
+        goal_ports = goal_ports or self.output_ports
+        outputs = {KBPPorts.triple_logits: self.scorer.score(batch[Ports.Input.question])}
+        return {p: outputs[p] if p in outputs else batch[p] for p in goal_ports if p in outputs or p in batch}
+
+
+_MODEL_NAMES = {'distmult_reader': 'DistMult', 'complex_reader': 'ComplEx', 'transe_reader': 'TransE'}
+
+
+def numpy_kge_reader_from_file(reader_dir: str, mmap: bool = False) -> JTReader:
+    """Loads a stored `distmult_reader`, `complex_reader` or `transe_reader` (or a reader stored by this function's
+    reader) that scores triples with NumPy.
+    """
+    from jack.readers.implementations import create_shared_resources
+    from jack.readers.knowledge_base_population.models import KnowledgeGraphEmbeddingInputModule, \
+        KnowledgeGraphEmbeddingOutputModule
+    shared_resources = create_shared_resources()
+    shared_resources.load(os.path.join(reader_dir, "shared_resources"))
+    model_name = _MODEL_NAMES.get(shared_resources.config.get("model"))
+    reader = JTReader(shared_resources, KnowledgeGraphEmbeddingInputModule(shared_resources),
+                      NumpyKGEModelModule(shared_resources, model_name, mmap), KnowledgeGraphEmbeddingOutputModule())
+    reader.load_and_setup_modules(reader_dir)
+    return reader
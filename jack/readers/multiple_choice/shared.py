@@ -5,10 +5,34 @@ from abc import ABCMeta
 from jack.core import *
 from jack.core.data_structures import *
 from jack.readers.multiple_choice import util
+from jack.tf_util import embedding
 from jack.util import preprocessing
 from jack.util.map import numpify
 
 
+def partially_trainable_index(vocab):
+    """Maps the words of a vocab to the rows of partially trainable embeddings, see
+    `jack.tf_util.embedding.partially_trainable_embedding_lookup`.
+
+    Words without embedding are determined by the embeddings rather than by `vocab.get_ids_oov()`, which misses the
+    unknown symbol of vocabs initialized from embeddings.
+
+    Returns:
+        index [len(vocab)] of word ids to rows, rows of the pretrained words in `vocab.emb` in the order of the index
+    """
+    emb = vocab.emb
+    emb_vocabulary = emb.vocabulary if emb is not None and emb.vocabulary else dict()
+    emb_rows = np.array([emb_vocabulary.get(vocab.id2sym[i], -1) for i in range(len(vocab))], np.int64)
+    is_pretrained = emb_rows >= 0
+    num_pretrained = int(is_pretrained.sum())
+    if num_pretrained == 0:
+        raise ValueError("The embedding_mode 'pretrained' requires pretrained embeddings of words in the vocab.")
+    index = np.empty([len(vocab)], np.int32)
+    index[is_pretrained] = np.arange(num_pretrained)
+    index[~is_pretrained] = num_pretrained + np.arange(len(vocab) - num_pretrained)
+    return index, emb_rows[is_pretrained]
+
+
 class SingleSupportFixedClassForward(object):
     __metaclass__ = ABCMeta
 
@@ -28,6 +52,8 @@ class AbstractSingleSupportFixedClassModel(TFModelModule, SingleSupportFixedClas
         self.config = self.shared_resources.config
         self.question_embedding_matrix = question_embedding_matrix
         self.support_embedding_matrix = support_embedding_matrix
+        self._embed_question = None
+        self._embed_support = None
         super(AbstractSingleSupportFixedClassModel, self).__init__(shared_resources)
 
     @property
@@ -55,17 +81,26 @@ class AbstractSingleSupportFixedClassModel(TFModelModule, SingleSupportFixedClas
                       question: tf.Tensor,
                       support_length: tf.Tensor,
                       question_length: tf.Tensor) -> Sequence[tf.Tensor]:
-        if self.question_embedding_matrix is None:
-            vocab_size = len(shared_resources.vocab)
-            input_size = shared_resources.config['repr_dim_input']
-            self.question_embedding_matrix = tf.get_variable(
-                "emb_Q", [vocab_size, input_size],
-                initializer=tf.contrib.layers.xavier_initializer(),
-                trainable=True, dtype="float32")
-            self.support_embedding_matrix = tf.get_variable(
-                "emb_S", [vocab_size, input_size],
-                initializer=tf.contrib.layers.xavier_initializer(),
-                trainable=True, dtype="float32")
+        if self.question_embedding_matrix is None and \
+                shared_resources.config.get('embedding_mode', 'trainable') == 'pretrained':
+            self._create_partially_trainable_embeddings(shared_resources)
+        else:
+            if self.question_embedding_matrix is None:
+                vocab_size = len(shared_resources.vocab)
+                input_size = shared_resources.config['repr_dim_input']
+                self.question_embedding_matrix = tf.get_variable(
+                    "emb_Q", [vocab_size, input_size],
+                    initializer=tf.contrib.layers.xavier_initializer(),
+                    trainable=True, dtype="float32")
+                if shared_resources.config.get('share_embeddings', False):
+                    self.support_embedding_matrix = self.question_embedding_matrix
+                else:
+                    self.support_embedding_matrix = tf.get_variable(
+                        "emb_S", [vocab_size, input_size],
+                        initializer=tf.contrib.layers.xavier_initializer(),
+                        trainable=True, dtype="float32")
+            self._embed_question = lambda ids: tf.nn.embedding_lookup(self.question_embedding_matrix, ids)
+            self._embed_support = lambda ids: tf.nn.embedding_lookup(self.support_embedding_matrix, ids)
 
         logits = self.forward_pass(shared_resources,
                                    question, question_length,
@@ -76,6 +111,53 @@ class AbstractSingleSupportFixedClassModel(TFModelModule, SingleSupportFixedClas
 
         return [logits, predictions]
 
+    def _create_partially_trainable_embeddings(self, shared_resources: SharedResources):
+        """Embeddings of words with pretrained embeddings in `vocab.emb` are fixed, only the embeddings of all other
+        words and optional projections of the pretrained ones are trained.
+
+        The pretrained embeddings are not copied into the graph: the rows needed by a batch are gathered on the host
+        from the (possibly memory-mapped) `vocab.emb`. Readers with such embeddings cannot be exported with
+        `jack.core.inference_graph.export_reader`.
+        """
+        vocab = shared_resources.vocab
+        emb = vocab.emb
+        input_size = shared_resources.config['repr_dim_input']
+        index, pretrained_rows = partially_trainable_index(vocab)
+        num_pretrained = len(pretrained_rows)
+        assert emb.shape[1] == input_size, "repr_dim_input must match the size of the pretrained embeddings."
+        index = tf.constant(index, name="embedding_index")
+
+        def lookup_pretrained(rows):
+            embeddings = tf.py_func(lambda r: emb.gather(pretrained_rows[r]), [rows], tf.float32, stateful=False)
+            embeddings.set_shape([None, input_size])
+            return embeddings
+
+        def create_embedder(name):
+            oov_embeddings = tf.get_variable(
+                name + "_oov", [max(len(vocab) - num_pretrained, 1), input_size],
+                initializer=tf.contrib.layers.xavier_initializer(), trainable=True, dtype="float32")
+            projection = None
+            if shared_resources.config.get('pretrained_projection', False):
+                projection = tf.get_variable(
+                    name + "_projection", [input_size, input_size],
+                    initializer=tf.constant_initializer(np.eye(input_size)), trainable=True, dtype="float32")
+            return lambda ids: embedding.partially_trainable_embedding_lookup(
+                ids, index, num_pretrained, lookup_pretrained, oov_embeddings, projection)
+
+        if shared_resources.config.get('share_embeddings', False):
+            self._embed_question = self._embed_support = create_embedder("emb")
+        else:
+            self._embed_question = create_embedder("emb_Q")
+            self._embed_support = create_embedder("emb_S")
+
+    def embed_question(self, question: tf.Tensor) -> tf.Tensor:
+        """Embeds question word ids, [batch_size, max_length] -> [batch_size, max_length, repr_dim_input]."""
+        return self._embed_question(question)
+
+    def embed_support(self, support: tf.Tensor) -> tf.Tensor:
+        """Embeds support word ids, [batch_size, max_length] -> [batch_size, max_length, repr_dim_input]."""
+        return self._embed_support(support)
+
     def create_training_output(self, shared_resources: SharedResources,
                                logits: tf.Tensor, labels: tf.Tensor) -> Sequence[tf.Tensor]:
         loss = tf.reduce_mean(tf.nn.sparse_softmax_cross_entropy_with_logits(logits=logits, labels=labels),
@@ -164,13 +246,9 @@ class SimpleMCOutputModule(OutputModule):
         # len(inputs) == batch size
         # logits: [batch_size, max_num_candidates]
         winning_indices = np.argmax(logits, axis=1)
-        result = []
-        for index_in_batch, question in enumerate(inputs):
-            winning_index = winning_indices[index_in_batch]
-            score = logits[index_in_batch, winning_index]
-            ans = Answer(question.atomic_candidates[winning_index], score=score)
-            result.append(ans)
-        return result
+        scores = logits[np.arange(logits.shape[0]), winning_indices]
+        return [Answer(question.atomic_candidates[winning_index], score=score)
+                for question, winning_index, score in zip(inputs, winning_indices.tolist(), scores.tolist())]
 
 
 class MisclassificationOutputModule(OutputModule):
@@ -11,13 +11,13 @@ class PairOfBiLSTMOverSupportAndQuestionModel(AbstractSingleSupportFixedClassMod
                      num_classes):
         # final states_fw_bw dimensions:
         # [[[batch, output dim], [batch, output_dim]]
-        Q_seq = tf.nn.embedding_lookup(self.question_embedding_matrix, Q_ids)
-        S_seq = tf.nn.embedding_lookup(self.support_embedding_matrix, S_ids)
+        Q_seq = self.embed_question(Q_ids)
+        S_seq = self.embed_support(S_ids)
 
         all_states_fw_bw, final_states_fw_bw = rnn.pair_of_bidirectional_LSTMs(
             Q_seq, Q_lengths, S_seq, S_lengths, shared_resources.config['repr_dim'],
             drop_keep_prob=1.0 - shared_resources.config['dropout'],
-            conditional_encoding=True)
+            conditional_encoding=True, fused=shared_resources.config.get('fused_rnn', False))
         # ->  [batch, 2*output_dim]
         final_states = tf.concat([final_states_fw_bw[0][1], final_states_fw_bw[1][1]], axis=1)
         # [batch, 2*output_dim] -> [batch, num_classes]
@@ -8,8 +8,9 @@ import tensorflow as tf
 
 from jack.readers.multiple_choice.shared import AbstractSingleSupportFixedClassModel
 from jack.tf_util.activations import prelu
-from jack.tf_util.attention import attention_softmax3d
+from jack.tf_util.attention import attention_softmax3d, chunked_attention
 from jack.tf_util.masking import mask_3d
+from jack.tf_util.misc import jit_scope
 
 logger = logging.getLogger(__name__)
 
@@ -21,8 +22,8 @@ class DecomposableAttentionModel(AbstractSingleSupportFixedClassModel):
                      num_classes):
         # final states_fw_bw dimensions:
         # [[[batch, output dim], [batch, output_dim]]
-        question_embedding = tf.nn.embedding_lookup(self.question_embedding_matrix, question)
-        support_embedding = tf.nn.embedding_lookup(self.support_embedding_matrix, support)
+        question_embedding = self.embed_question(question)
+        support_embedding = self.embed_support(support)
 
         model_kwargs = {
             'sequence1': question_embedding,
@@ -32,11 +33,14 @@ class DecomposableAttentionModel(AbstractSingleSupportFixedClassModel):
             'representation_size': 200,
             'dropout_keep_prob': 1.0 - shared_resources.config.get('dropout', 0),
             'use_masking': True,
-            'prepend_null_token': True
+            'prepend_null_token': True,
+            'attention_chunk_size': shared_resources.config.get('attention_chunk_size')
         }
 
-        model = FeedForwardDAMP(**model_kwargs)
-        logits = model()
+        # attention and feed-forward layers consist of many small ops that profit from fusion
+        with jit_scope(shared_resources.config.get('xla') == 'scopes'):
+            model = FeedForwardDAMP(**model_kwargs)
+            logits = model()
         return logits
 
 
@@ -60,8 +64,10 @@ class BaseDecomposableAttentionModel:
     def __init__(self,
                  sequence1, sequence1_length, sequence2, sequence2_length,
                  nb_classes=3, reuse=False,
-                 use_masking=False, prepend_null_token=False, *args, **kwargs):
+                 use_masking=False, prepend_null_token=False, attention_chunk_size=None, *args, **kwargs):
         self.nb_classes = nb_classes
+        # if set, attention is computed in blocks of this many time steps, see `chunked_attention`
+        self.attention_chunk_size = attention_chunk_size
 
         self.sequence1 = sequence1
         self.sequence1_length = sequence1_length
@@ -165,6 +171,16 @@ class BaseDecomposableAttentionModel:
             # tensor with shape (batch_size, time_steps, num_units)
             transformed_sequence2 = self._transform_attend(sequence2, True)
 
+            if self.attention_chunk_size is not None:
+                # attention matrices are never materialized, raw_attentions and attention_sentence* stay None
+                key_lengths1 = sequence1_lengths if use_masking else None
+                key_lengths2 = sequence2_lengths if use_masking else None
+                alpha = chunked_attention(transformed_sequence2, transformed_sequence1, sequence1,
+                                          key_lengths=key_lengths1, chunk_size=self.attention_chunk_size)
+                beta = chunked_attention(transformed_sequence1, transformed_sequence2, sequence2,
+                                         key_lengths=key_lengths2, chunk_size=self.attention_chunk_size)
+                return alpha, beta
+
             # tensor with shape (batch_size, time_steps, time_steps)
             self.raw_attentions = tf.matmul(transformed_sequence1, tf.transpose(transformed_sequence2, [0, 2, 1]))
 
@@ -7,8 +7,9 @@ import numpy as np
 import tensorflow as tf
 
 from jack.readers.multiple_choice.shared import AbstractSingleSupportFixedClassModel
-from jack.tf_util.attention import attention_softmax3d
+from jack.tf_util.attention import attention_softmax3d, chunked_attention
 from jack.tf_util.masking import mask_3d
+from jack.tf_util.rnn import fused_bidirectional_lstm
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +20,8 @@ class ESIMModel(AbstractSingleSupportFixedClassModel):
                      support, support_length, num_classes):
         # final states_fw_bw dimensions:
         # [[[batch, output dim], [batch, output_dim]]
-        question_embedding = tf.nn.embedding_lookup(self.question_embedding_matrix, question)
-        support_embedding = tf.nn.embedding_lookup(self.support_embedding_matrix, support)
+        question_embedding = self.embed_question(question)
+        support_embedding = self.embed_support(support)
 
         model_kwargs = {
             'sequence1': question_embedding,
@@ -29,7 +30,9 @@ class ESIMModel(AbstractSingleSupportFixedClassModel):
             'sequence2_length': support_length,
             'representation_size': shared_resources.config.get('repr_dim', 300),
             'dropout_keep_prob': 1.0 - shared_resources.config.get('dropout', 0),
-            'use_masking': True
+            'use_masking': True,
+            'attention_chunk_size': shared_resources.config.get('attention_chunk_size'),
+            'fused_rnn': shared_resources.config.get('fused_rnn', False)
         }
 
         model = ESIM(**model_kwargs)
@@ -56,8 +59,10 @@ class BaseESIM:
     def __init__(self, sequence1, sequence1_length,
                  sequence2, sequence2_length,
                  nb_classes=3, reuse=False,
-                 use_masking=False, *args, **kwargs):
+                 use_masking=False, attention_chunk_size=None, *args, **kwargs):
         self.nb_classes = nb_classes
+        # if set, attention is computed in blocks of this many time steps, see `chunked_attention`
+        self.attention_chunk_size = attention_chunk_size
 
         self.sequence1 = sequence1
         self.sequence1_length = sequence1_length
@@ -132,6 +137,16 @@ class BaseESIM:
             # tensor with shape (batch_size, time_steps, num_units)
             transformed_sequence2 = self._transform_attend(sequence2, sequence2_length, reuse=True)
 
+            if self.attention_chunk_size is not None:
+                # attention matrices are never materialized, raw_attentions and attention_sentence* stay None
+                key_lengths1 = sequence1_length if use_masking else None
+                key_lengths2 = sequence2_length if use_masking else None
+                alpha = chunked_attention(transformed_sequence2, transformed_sequence1, sequence1,
+                                          key_lengths=key_lengths1, chunk_size=self.attention_chunk_size)
+                beta = chunked_attention(transformed_sequence1, transformed_sequence2, sequence2,
+                                         key_lengths=key_lengths2, chunk_size=self.attention_chunk_size)
+                return alpha, beta
+
             # tensor with shape (batch_size, time_steps, time_steps)
             tmp = tf.transpose(transformed_sequence2, [0, 2, 1])
             self.raw_attentions = tf.matmul(transformed_sequence1, tmp)
@@ -212,23 +227,33 @@ class BaseESIM:
 
 
 class ESIM(BaseESIM):
-    def __init__(self, representation_size=300, dropout_keep_prob=1.0, *args, **kwargs):
+    def __init__(self, representation_size=300, dropout_keep_prob=1.0, fused_rnn=False, *args, **kwargs):
         self.representation_size = representation_size
         self.dropout_keep_prob = dropout_keep_prob
+        # fused LSTM kernels, models trained without can be converted with `restore_unfused_lstm_checkpoint`
+        self.fused_rnn = fused_rnn
         super().__init__(*args, **kwargs)
 
+    def _birnn(self, sequence, sequence_length, reuse):
+        if self.fused_rnn:
+            outputs, _ = fused_bidirectional_lstm(sequence, sequence_length, self.representation_size,
+                                                  scope=tf.get_variable_scope(),
+                                                  initializer=tf.orthogonal_initializer())
+            return tf.concat(outputs, axis=2)
+        cell_fw = tf.contrib.rnn.LSTMCell(self.representation_size, state_is_tuple=True, reuse=reuse,
+                                          initializer=tf.orthogonal_initializer())
+        cell_bw = tf.contrib.rnn.LSTMCell(self.representation_size, state_is_tuple=True, reuse=reuse,
+                                          initializer=tf.orthogonal_initializer())
+        outputs, output_states = tf.nn.bidirectional_dynamic_rnn(
+            cell_fw=cell_fw, cell_bw=cell_bw,
+            inputs=sequence, sequence_length=sequence_length,
+            dtype=tf.float32)
+        return tf.concat(outputs, axis=2)
+
     def _transform_input(self, sequence, sequence_length, reuse=False):
         with tf.variable_scope('transform_input', reuse=reuse):
             sequence = tf.nn.dropout(sequence, keep_prob=self.dropout_keep_prob)
-            cell_fw = tf.contrib.rnn.LSTMCell(self.representation_size, state_is_tuple=True, reuse=reuse,
-                                              initializer=tf.orthogonal_initializer())
-            cell_bw = tf.contrib.rnn.LSTMCell(self.representation_size, state_is_tuple=True, reuse=reuse,
-                                              initializer=tf.orthogonal_initializer())
-            outputs, output_states = tf.nn.bidirectional_dynamic_rnn(
-                cell_fw=cell_fw, cell_bw=cell_bw,
-                inputs=sequence, sequence_length=sequence_length,
-                dtype=tf.float32)
-        return tf.concat(outputs, axis=2)
+            return self._birnn(sequence, sequence_length, reuse)
 
     def _transform_attend(self, sequence, sequence_length, reuse=False):
         return sequence
@@ -241,16 +266,7 @@ class ESIM(BaseESIM):
                                                            weights_initializer=tf.random_normal_initializer(0.0, 0.01),
                                                            biases_initializer=tf.zeros_initializer(),
                                                            activation_fn=tf.nn.relu)
-            cell_fw = tf.contrib.rnn.LSTMCell(self.representation_size, state_is_tuple=True, reuse=reuse,
-                                              initializer=tf.orthogonal_initializer())
-            cell_bw = tf.contrib.rnn.LSTMCell(self.representation_size, state_is_tuple=True, reuse=reuse,
-                                              initializer=tf.orthogonal_initializer())
-            outputs, output_states = tf.nn.bidirectional_dynamic_rnn(
-                cell_fw=cell_fw, cell_bw=cell_bw,
-                inputs=projection,
-                sequence_length=sequence_length,
-                dtype=tf.float32)
-        return tf.concat(outputs, axis=2)
+            return self._birnn(projection, sequence_length, reuse)
 
     def _transform_aggregate(self, v1_v2, reuse=False):
         with tf.variable_scope('transform_aggregate', reuse=reuse):
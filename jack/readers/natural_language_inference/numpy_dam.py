@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+"""
+Inference engine for the decomposable attention reader (`dam_snli_reader`) running entirely in NumPy.
+
+The forward pass of `DecomposableAttentionModel` (with `FeedForwardDAMP`) only consists of embedding lookups, dense
+layers, parametric ReLUs and masked attention, which are computed here with batched NumPy ops on the weights of a
+stored reader. No tensorflow graph or session is created, which makes the reader cheap to set up and to call on small
+batches. Dropout is not applied. Separate or shared, trainable or partially trainable (`embedding_mode: 'pretrained'`)
+embeddings are supported.
+"""
+
+import os
+from typing import List, Mapping
+
+import numpy as np
+
+from jack.core.model_module import ModelModule
+from jack.core.reader import JTReader
+from jack.core.tensorport import Ports, TensorPort
+from jack.readers.multiple_choice.shared import partially_trainable_index
+
+# variables of the DAM reader relative to its variable scope, without embeddings
+_WEIGHT_NAMES = ["null/null_embedding",
+                 "transform_embeddings/fully_connected/weights", "transform_embeddings/fully_connected/biases",
+                 "aggregate/fully_connected/weights", "aggregate/fully_connected/biases"] + \
+                ["{}/{}".format(scope, name)
+                 for scope in ["attend/transform_attend", "transform_compare", "aggregate/transform_aggregate"]
+                 for name in ["fully_connected/weights", "fully_connected/biases", "1/alpha",
+                              "fully_connected_1/weights", "fully_connected_1/biases", "2/alpha"]]
+
+
+def _softmax(x, axis=-1):
+    e = np.exp(x - x.max(axis=axis, keepdims=True))
+    return e / e.sum(axis=axis, keepdims=True)
+
+
+def _prelu(x, alpha):
+    return np.maximum(x, 0.0) + alpha * np.minimum(x, 0.0)
+
+
+class NumpyDAMModelModule(ModelModule):
+    """Model module computing the logits of a stored `dam_snli_reader` with NumPy."""
+
+    def __init__(self, shared_resources):
+        self.shared_resources = shared_resources
+        self.weights = None
+        config = shared_resources.config
+        self.pretrained = config.get('embedding_mode', 'trainable') == 'pretrained'
+        self.projection = self.pretrained and config.get('pretrained_projection', False)
+        # names of the question and support embedding variables, see `AbstractSingleSupportFixedClassModel`
+        if config.get('share_embeddings', False):
+            self.question_embeddings = self.support_embeddings = "emb" if self.pretrained else "emb_Q"
+        else:
+            self.question_embeddings, self.support_embeddings = "emb_Q", "emb_S"
+        self.index, self.pretrained_rows = None, None
+
+    @property
+    def input_ports(self) -> List[TensorPort]:
+        return [Ports.Input.support, Ports.Input.question, Ports.Input.support_length, Ports.Input.question_length]
+
+    @property
+    def output_ports(self) -> List[TensorPort]:
+        return [Ports.Prediction.logits, Ports.Prediction.candidate_index]
+
+    @property
+    def training_input_ports(self) -> List[TensorPort]:
+        return []
+
+    @property
+    def training_output_ports(self) -> List[TensorPort]:
+        return []
+
+    def setup(self, is_training=True):
+        assert not is_training, "The NumPy DAM cannot be trained, train a dam_snli_reader instead."
+        if self.pretrained:
+            self.index, self.pretrained_rows = partially_trainable_index(self.shared_resources.vocab)
+
+    def _embedding_weight_names(self):
+        names = []
+        for name in sorted({self.question_embeddings, self.support_embeddings}):
+            if self.pretrained:
+                names.append(name + "_oov")
+                if self.projection:
+                    names.append(name + "_projection")
+            else:
+                names.append(name)
+        return names
+
+    def store(self, path):
+        """Stores the weights as a numpy archive at path + ".npz"."""
+        np.savez(path + ".npz", **self.weights)
+
+    def load(self, path):
+        """Loads the weights from a numpy archive stored with `store` or from a checkpoint of a `dam_snli_reader`."""
+        if os.path.exists(path + ".npz"):
+            with np.load(path + ".npz") as arrays:
+                self.weights = {name: arrays[name] for name in arrays.files}
+            return
+
+        import tensorflow as tf
+        checkpoint = tf.train.NewCheckpointReader(path)
+        variables = list(checkpoint.get_variable_to_shape_map())
+        self.weights = dict()
+        for name in self._embedding_weight_names() + _WEIGHT_NAMES:
+            # variables are created in the variable scope of the reader's name
+            matches = [v for v in variables if v == name or v.endswith('/' + name)]
+            assert len(matches) == 1, "Cannot find a unique variable {} in {}.".format(name, path)
+            self.weights[name] = checkpoint.get_tensor(matches[0])
+
+    def _dense(self, x, scope, layer="fully_connected"):
+        return x.dot(self.weights[scope + "/" + layer + "/weights"]) + self.weights[scope + "/" + layer + "/biases"]
+
+    def _embed(self, ids, name):
+        if not self.pretrained:
+            return self.weights[name][ids]
+        # pretrained rows are gathered from `vocab.emb`, the others from the trainable out-of-vocabulary embeddings
+        num_pretrained = len(self.pretrained_rows)
+        rows = self.index[ids]
+        is_pretrained = rows < num_pretrained
+        embedded = self.weights[name + "_oov"][np.maximum(rows - num_pretrained, 0)]
+        pretrained = self.shared_resources.vocab.emb.gather(self.pretrained_rows[rows[is_pretrained]])
+        if self.projection:
+            pretrained = pretrained.dot(self.weights[name + "_projection"])
+        embedded[is_pretrained] = pretrained
+        return embedded
+
+    def _feed_forward(self, x, scope):
+        h = _prelu(self._dense(x, scope), self.weights[scope + "/1/alpha"])
+        return _prelu(self._dense(h, scope, "fully_connected_1"), self.weights[scope + "/2/alpha"])
+
+    def forward(self, support, question, support_length, question_length) -> np.ndarray:
+        """Computes the logits [B, C] of a batch."""
+        batch_size = question.shape[0]
+        # question and support are prepended with the transformed null token
+        null = self._dense(self.weights["null/null_embedding"], "transform_embeddings")
+        null = np.broadcast_to(null[np.newaxis], [batch_size, 1, null.shape[-1]])
+        sequence1 = np.concatenate(
+            [null, self._dense(self._embed(question, self.question_embeddings), "transform_embeddings")], axis=1)
+        sequence2 = np.concatenate(
+            [null, self._dense(self._embed(support, self.support_embeddings), "transform_embeddings")], axis=1)
+        mask1 = np.arange(sequence1.shape[1]) < (np.asarray(question_length) + 1)[:, np.newaxis]
+        mask2 = np.arange(sequence2.shape[1]) < (np.asarray(support_length) + 1)[:, np.newaxis]
+
+        # attend, [B, L1, L2]
+        attentions = np.matmul(self._feed_forward(sequence1, "attend/transform_attend"),
+                               self._feed_forward(sequence2, "attend/transform_attend").transpose([0, 2, 1]))
+        attention1 = _softmax(np.where(mask2[:, np.newaxis], attentions, -np.inf), axis=2)
+        attention2 = _softmax(np.where(mask1[:, :, np.newaxis], attentions, -np.inf), axis=1)
+        beta = np.matmul(attention1, sequence2)
+        alpha = np.matmul(attention2.transpose([0, 2, 1]), sequence1)
+
+        # compare
+        v1 = self._feed_forward(np.concatenate([sequence1, beta], axis=2), "transform_compare")
+        v2 = self._feed_forward(np.concatenate([sequence2, alpha], axis=2), "transform_compare")
+
+        # aggregate
+        v1_v2 = np.concatenate([(v1 * mask1[:, :, np.newaxis]).sum(axis=1),
+                                (v2 * mask2[:, :, np.newaxis]).sum(axis=1)], axis=1)
+        return self._dense(self._feed_forward(v1_v2, "aggregate/transform_aggregate"), "aggregate")
+
+    def __call__(self, batch: Mapping[TensorPort, np.ndarray],
+                 goal_ports: List[TensorPort] = None) -> Mapping[TensorPort, np.ndarray]:
+        goal_ports = goal_ports or self.output_ports
+        logits = self.forward(*[np.asarray(batch[p]) for p in self.input_ports]).astype(np.float32)
+        outputs = {Ports.Prediction.logits: logits, Ports.Prediction.candidate_index: np.argmax(logits, axis=1)}
+        return {p: outputs[p] if p in outputs else batch[p] for p in goal_ports if p in outputs or p in batch}
+
+
+def numpy_dam_reader_from_file(reader_dir: str) -> JTReader:
+    """Loads a reader stored by a `dam_snli_reader` (or by this function's reader) that runs on NumPy."""
+    from jack.readers.implementations import create_shared_resources
+    from jack.readers.multiple_choice.shared import SimpleMCOutputModule, SingleSupportFixedClassInputs
+    shared_resources = create_shared_resources()
+    shared_resources.load(os.path.join(reader_dir, "shared_resources"))
+    reader = JTReader(shared_resources, SingleSupportFixedClassInputs(shared_resources),
+                      NumpyDAMModelModule(shared_resources), SimpleMCOutputModule())
+    reader.load_and_setup_modules(reader_dir)
+    return reader
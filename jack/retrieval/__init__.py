@@ -0,0 +1,2 @@
+from jack.retrieval.index import InvertedIndex
+from jack.retrieval.pipeline import RetrievalReader
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+"""
+Inverted index over a collection of documents (e.g., paragraphs) with TF-IDF or BM25 ranking.
+
+Postings are kept in compressed sparse row format, i.e., the documents and term frequencies of term `t` are found at
+`term_ptr[t]:term_ptr[t + 1]`. This keeps the index compact in memory as well as on disk, and ranking only touches the
+postings of the query terms.
+"""
+
+import logging
+from collections import Counter
+from typing import Callable, List, Sequence, Tuple
+
+import numpy as np
+
+from jack.readers.extractive_qa.util import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class InvertedIndex:
+    """Inverted index supporting top-k retrieval of documents for a query."""
+
+    def __init__(self, term2id: dict, term_ptr: np.ndarray, doc_ids: np.ndarray, term_freqs: np.ndarray,
+                 doc_lengths: np.ndarray, documents: Sequence[str] = None, lowercase: bool = True,
+                 tokenizer: Callable[[str], List[str]] = tokenize):
+        """
+        Args:
+            term2id: dict from terms to term ids
+            term_ptr: [T + 1] start of the postings of each term
+            doc_ids: [P] document ids of all postings
+            term_freqs: [P] term frequencies of all postings
+            doc_lengths: [D] number of tokens per document
+            documents: optional texts of the indexed documents
+            lowercase: whether terms are lowercased
+            tokenizer: function splitting texts into tokens
+        """
+        self.term2id = term2id
+        self.term_ptr = term_ptr
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.documents = documents
+        self.lowercase = lowercase
+        self.tokenizer = tokenizer
+        self.avg_doc_length = max(float(doc_lengths.mean()), 1.0) if len(doc_lengths) > 0 else 1.0
+        doc_freqs = np.diff(term_ptr)
+        self.idf = np.log((len(doc_lengths) - doc_freqs + 0.5) / (doc_freqs + 0.5) + 1.0).astype(np.float32)
+
+    @property
+    def num_documents(self) -> int:
+        return len(self.doc_lengths)
+
+    def _terms(self, text: str) -> List[str]:
+        tokens = self.tokenizer(text)
+        return [t.lower() for t in tokens] if self.lowercase else tokens
+
+    @staticmethod
+    def build(documents: Sequence[str], lowercase: bool = True,
+              tokenizer: Callable[[str], List[str]] = tokenize) -> 'InvertedIndex':
+        """Indexes all documents.
+
+        Args:
+            documents: texts of the documents
+            lowercase: whether terms are lowercased
+            tokenizer: function splitting texts into tokens
+
+        Returns:
+            the inverted index
+        """
+        term2id = dict()
+        doc_lengths = np.zeros([len(documents)], np.int32)
+        posting_terms, posting_docs, posting_freqs = [], [], []
+        for doc_id, document in enumerate(documents):
+            tokens = tokenizer(document)
+            if lowercase:
+                tokens = [t.lower() for t in tokens]
+            doc_lengths[doc_id] = len(tokens)
+            for term, freq in Counter(tokens).items():
+                posting_terms.append(term2id.setdefault(term, len(term2id)))
+                posting_docs.append(doc_id)
+                posting_freqs.append(freq)
+
+        posting_terms = np.array(posting_terms, np.int32)
+        # stable sort keeps documents of each term ordered by id
+        order = np.argsort(posting_terms, kind='mergesort')
+        term_ptr = np.zeros([len(term2id) + 1], np.int64)
+        np.cumsum(np.bincount(posting_terms, minlength=len(term2id)), out=term_ptr[1:])
+        doc_ids = np.array(posting_docs, np.int32)[order]
+        term_freqs = np.array(posting_freqs, np.float32)[order]
+        logger.info("Indexed {} documents with {} terms and {} postings.".format(
+            len(documents), len(term2id), len(doc_ids)))
+        return InvertedIndex(term2id, term_ptr, doc_ids, term_freqs, doc_lengths,
+                             documents=list(documents), lowercase=lowercase, tokenizer=tokenizer)
+
+    def scores(self, query: str, scoring: str = "bm25", k1: float = 1.2, b: float = 0.75) \
+            -> Tuple[np.ndarray, np.ndarray]:
+        """Scores all documents that contain at least one query term.
+
+        Args:
+            query: query text
+            scoring: "bm25" or "tfidf"
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+
+        Returns:
+            document ids [N], scores [N]
+        """
+        term_ids = {self.term2id[t] for t in self._terms(query) if t in self.term2id}
+        if not term_ids:
+            return np.zeros([0], np.int32), np.zeros([0], np.float32)
+
+        doc_ids, weights = [], []
+        for t in term_ids:
+            start, end = self.term_ptr[t], self.term_ptr[t + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.term_freqs[start:end]
+            if scoring == "bm25":
+                norm = k1 * (1.0 - b + b * self.doc_lengths[docs] / self.avg_doc_length)
+                weights.append(self.idf[t] * tf * (k1 + 1.0) / (tf + norm))
+            elif scoring == "tfidf":
+                weights.append(self.idf[t] * (1.0 + np.log(tf)))
+            else:
+                raise ValueError("Unknown scoring {}, must be one of 'bm25' or 'tfidf'.".format(scoring))
+            doc_ids.append(docs)
+
+        # accumulate scores only over the documents in the postings of query terms
+        unique_docs, inverse = np.unique(np.concatenate(doc_ids), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weights), minlength=len(unique_docs))
+        if scoring == "tfidf":
+            scores = scores / np.sqrt(self.doc_lengths[unique_docs].clip(min=1))
+        return unique_docs, scores.astype(np.float32)
+
+    def retrieve(self, query: str, k: int = 10, scoring: str = "bm25") -> List[Tuple[int, float]]:
+        """Returns the (document id, score) pairs of the k best scoring documents for the query."""
+        if k <= 0:
+            return []
+        k = min(k, self.num_documents)
+        doc_ids, scores = self.scores(query, scoring)
+        if len(doc_ids) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            doc_ids, scores = doc_ids[top], scores[top]
+        order = np.argsort(-scores, kind='mergesort')
+        return [(int(doc_ids[i]), float(scores[i])) for i in order]
+
+    def store(self, path: str):
+        """Stores the index as a single compressed numpy archive at path."""
+        terms = sorted(self.term2id, key=self.term2id.get)
+        arrays = dict(term_ptr=self.term_ptr, doc_ids=self.doc_ids, term_freqs=self.term_freqs,
+                      doc_lengths=self.doc_lengths, lowercase=np.array(self.lowercase),
+                      terms=_encode_strings(terms))
+        if self.documents is not None:
+            arrays["documents"] = _encode_strings(self.documents)
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+
+    @staticmethod
+    def load(path: str, tokenizer: Callable[[str], List[str]] = tokenize) -> 'InvertedIndex':
+        """Loads an index stored with `store`."""
+        with np.load(path) as arrays:
+            terms = _decode_strings(arrays["terms"])
+            documents = _decode_strings(arrays["documents"]) if "documents" in arrays else None
+            return InvertedIndex({t: i for i, t in enumerate(terms)}, arrays["term_ptr"], arrays["doc_ids"],
+                                 arrays["term_freqs"], arrays["doc_lengths"], documents=documents,
+                                 lowercase=bool(arrays["lowercase"]), tokenizer=tokenizer)
+
+
+def _encode_strings(strings: Sequence[str]) -> np.ndarray:
+    """Encodes strings as a single byte array, prefixed by the int64 byte offsets of all strings."""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros([len(encoded) + 1], np.int64)
+    np.cumsum([len(s) for s in encoded], out=offsets[1:])
+    return np.concatenate([np.array([len(encoded)], np.int64).view(np.uint8), offsets.view(np.uint8),
+                           np.frombuffer(b''.join(encoded), np.uint8)])
+
+
+def _decode_strings(array: np.ndarray) -> List[str]:
+    num_strings = int(array[:8].view(np.int64)[0])
+    offsets = array[8:8 * (num_strings + 2)].view(np.int64)
+    data = array[8 * (num_strings + 2):].tobytes()
+    return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(num_strings)]
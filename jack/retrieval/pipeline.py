@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+"""
+Open-domain question answering by retrieving supports from an inverted index and reading them with an extractive QA
+reader.
+"""
+
+from typing import List, Sequence
+
+from jack.core.data_structures import Answer, QASetting
+from jack.core.reader import JTReader
+from jack.readers.extractive_qa.multi_paragraph import read_paragraphs
+from jack.retrieval.index import InvertedIndex
+
+
+class RetrievalReader:
+    """Answers questions without supports.
+
+    The top-k documents of the index are retrieved for each question and read independently by an extractive QA
+    reader. The best scoring answer across all retrieved documents is returned, with `doc_idx` set to the id of the
+    document it was found in.
+    """
+
+    def __init__(self, index: InvertedIndex, reader: JTReader, k: int = 5, scoring: str = "bm25",
+                 batch_size: int = 32):
+        """
+        Args:
+            index: inverted index that must store the document texts
+            reader: extractive QA reader, e.g., FastQA or BiDAF
+            k: number of documents read per question
+            scoring: "bm25" or "tfidf"
+            batch_size: maximum number of (question, document) pairs read at once
+        """
+        assert index.documents is not None, "RetrievalReader requires an index that stores the document texts."
+        self.index = index
+        self.reader = reader
+        self.k = k
+        self.scoring = scoring
+        self.batch_size = batch_size
+
+    def __call__(self, inputs: Sequence[QASetting]) -> List[Answer]:
+        paragraphs = [(i, doc_id, self.index.documents[doc_id]) for i, q in enumerate(inputs)
+                      for doc_id, _ in self.index.retrieve(q.question, self.k, self.scoring)]
+        answers = read_paragraphs(self.reader, inputs, paragraphs, batch_size=self.batch_size)
+
+        # questions without any matching document cannot be answered
+        return [a if a is not None else Answer("", span=(0, 0), score=0.0) for a in answers]
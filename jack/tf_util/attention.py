@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import numpy as np
 import tensorflow as tf
 
 
@@ -32,18 +33,27 @@ def distance_biases(time_steps, window_size=10, reuse=False):
     Returns:
         2-d tensor (time_steps, time_steps)
     """
+    distance_bias = _distance_bias_variable(window_size, reuse)
+    r = tf.range(0, time_steps)
+    return _lookup_distance_biases(distance_bias, r, r)
+
+
+def _distance_bias_variable(window_size=10, reuse=False):
     with tf.variable_scope('distance-bias', reuse=reuse):
         # this is d_{i-j}
-        distance_bias = tf.get_variable('dist_bias', [window_size], initializer=tf.zeros_initializer())
-        r = tf.range(0, time_steps)
-        r_matrix = tf.tile(tf.reshape(r, [1, -1]), tf.stack([time_steps, 1]))
-        raw_idxs = r_matrix - tf.reshape(r, [-1, 1])
-        clipped_idxs = tf.clip_by_value(raw_idxs, 0, window_size - 1)
-        values = tf.nn.embedding_lookup(distance_bias, clipped_idxs)
-    return values
+        return tf.get_variable('dist_bias', [window_size], initializer=tf.zeros_initializer())
+
 
+def _lookup_distance_biases(distance_bias, query_positions, key_positions):
+    """Distance biases [len(query_positions), len(key_positions)] of all pairs of positions."""
+    window_size = distance_bias.get_shape()[0].value
+    # broadcasting instead of tiling a range matrix
+    raw_idxs = tf.expand_dims(key_positions, 0) - tf.expand_dims(query_positions, 1)
+    clipped_idxs = tf.clip_by_value(raw_idxs, 0, window_size - 1)
+    return tf.nn.embedding_lookup(distance_bias, clipped_idxs)
 
-def intra_attention(sequence, reuse=False):
+
+def intra_attention(sequence, reuse=False, chunk_size=None):
     """
     Compute the intra attention of a sentence. It returns a concatenation
     of the original sentence with its attended output.
@@ -51,11 +61,19 @@ def intra_attention(sequence, reuse=False):
     Args:
         sequence: tensor in shape (batch, time_steps, num_units)
         reuse: reuse variables
+        chunk_size: if given, attention is computed by `chunked_attention` without materializing the
+            (batch, time_steps, time_steps) attention and bias matrices
     Returns:
         a tensor in shape (batch, time_steps, 2*num_units)
     """
     time_steps = tf.shape(sequence)[1]
     with tf.variable_scope('intra-attention') as _:
+        if chunk_size is not None:
+            distance_bias = _distance_bias_variable(reuse=reuse)
+            attended = chunked_attention(sequence, sequence, sequence, chunk_size=chunk_size,
+                                         bias_fn=lambda q, k: _lookup_distance_biases(distance_bias, q, k))
+            return tf.concat(axis=2, values=[sequence, attended])
+
         # this is F_intra in the paper
         # f_intra1 is (batch, time_steps, num_units) and
         # f_intra1_t is (batch, num_units, time_steps)
@@ -73,3 +91,84 @@ def intra_attention(sequence, reuse=False):
         attentions = attention_softmax3d(raw_attentions)
         attended = tf.matmul(attentions, sequence)
     return tf.concat(axis=2, values=[sequence, attended])
+
+
+def chunked_attention(queries, keys, values, key_lengths=None, chunk_size=64, bias_fn=None):
+    """
+    Attention of queries over keys computed in blocks of `chunk_size` queries and keys.
+
+    Equivalent to softmax(queries * keys^T + bias) * values with keys beyond `key_lengths` masked out, but only
+    (batch, chunk_size, chunk_size) attention scores exist at a time: query blocks are processed one after the other,
+    and for each block keys are streamed block by block while the softmax is normalized on the fly.
+
+    The bounded memory only holds for inference. For training, the loops keep the attention probabilities of every
+    block for backpropagation, such that memory is still quadratic in the sequence lengths.
+
+    Args:
+        queries: tensor in shape (batch, query_steps, num_units)
+        keys: tensor in shape (batch, key_steps, num_units)
+        values: tensor in shape (batch, key_steps, value_units)
+        key_lengths: optional tensor in shape (batch), defaults to key_steps
+        chunk_size: number of queries and keys per block
+        bias_fn: optional function from query positions (chunk_size) and key positions (chunk_size) to a
+            (chunk_size, chunk_size) bias that is added to the attention scores
+    Returns:
+        a tensor in shape (batch, query_steps, value_units)
+    """
+    batch_size = tf.shape(queries)[0]
+    query_steps, key_steps = tf.shape(queries)[1], tf.shape(keys)[1]
+    value_units = tf.shape(values)[2]
+    if key_lengths is None:
+        key_lengths = tf.fill(tf.stack([batch_size]), key_steps)
+    num_query_chunks = (query_steps + chunk_size - 1) // chunk_size
+    num_key_chunks = (key_steps + chunk_size - 1) // chunk_size
+
+    def pad(sequence, time_steps, num_chunks):
+        return tf.pad(sequence, tf.stack([[0, 0], [0, num_chunks * chunk_size - time_steps], [0, 0]]))
+
+    # (num_query_chunks, batch, chunk_size, num_units)
+    query_chunks = tf.reshape(pad(queries, query_steps, num_query_chunks),
+                              tf.stack([batch_size, num_query_chunks, chunk_size, tf.shape(queries)[2]]))
+    query_chunks = tf.transpose(query_chunks, [1, 0, 2, 3])
+    keys = pad(keys, key_steps, num_key_chunks)
+    values = pad(values, key_steps, num_key_chunks)
+
+    def attend_chunk(args):
+        query_chunk, query_start = args
+        query_positions = query_start + tf.range(chunk_size)
+
+        def step(k, running_max, normalizer, attended):
+            key_start = k * chunk_size
+            key_chunk = keys[:, key_start:key_start + chunk_size]
+            value_chunk = values[:, key_start:key_start + chunk_size]
+
+            # (batch, chunk_size, chunk_size)
+            scores = tf.matmul(query_chunk, key_chunk, transpose_b=True)
+            if bias_fn is not None:
+                scores += bias_fn(query_positions, key_start + tf.range(chunk_size))
+            key_mask = tf.sequence_mask(key_lengths - key_start, chunk_size, dtype=tf.float32)
+            scores += tf.expand_dims(1.0 - key_mask, 1) * -1e30
+
+            # rescale what was accumulated so far to the new maximum score
+            new_max = tf.maximum(running_max, tf.reduce_max(scores, 2))
+            correction = tf.exp(running_max - new_max)
+            probs = tf.exp(scores - tf.expand_dims(new_max, 2))
+            normalizer = normalizer * correction + tf.reduce_sum(probs, 2)
+            attended = attended * tf.expand_dims(correction, 2) + tf.matmul(probs, value_chunk)
+            return k + 1, new_max, normalizer, attended
+
+        _, _, normalizer, attended = tf.while_loop(
+            lambda k, *_: k < num_key_chunks, step,
+            [tf.constant(0), tf.fill(tf.stack([batch_size, chunk_size]), -np.inf),
+             tf.zeros(tf.stack([batch_size, chunk_size])),
+             tf.zeros(tf.stack([batch_size, chunk_size, value_units]), dtype=values.dtype)])
+        return attended / tf.expand_dims(normalizer, 2)
+
+    # query blocks are attended sequentially to bound the memory of intermediate scores
+    attended = tf.map_fn(attend_chunk, (query_chunks, tf.range(num_query_chunks) * chunk_size),
+                         dtype=values.dtype, parallel_iterations=1)
+    attended = tf.reshape(tf.transpose(attended, [1, 0, 2, 3]),
+                          tf.stack([batch_size, num_query_chunks * chunk_size, value_units]))
+    attended = attended[:, :query_steps]
+    attended.set_shape([None, None, values.get_shape()[-1]])
+    return attended
@@ -80,7 +80,24 @@ def conv_char_embeddings(vocab, size, word_ids, conv_width=5,
 
 
 def conv_char_embedding_alt(char_vocab, size, unique_word_chars, unique_word_lengths, word_to_uniqs,
-                            conv_width=5, emb_initializer=tf.random_normal_initializer(0.0, 0.1), scope=None):
+                            conv_width=5, emb_initializer=tf.random_normal_initializer(0.0, 0.1), scope=None,
+                            frozen_embeddings=None):
+    """
+    Args:
+        char_vocab: dict from characters to ids
+        size: size of embeddings
+        unique_word_chars: [U, max_num_chars] character ids of unique words
+        unique_word_lengths: [U]
+        word_to_uniqs: tf.Tensor[None, None] or list of tensors mapping words to their unique words
+        conv_width: int
+        emb_initializer: initializer
+        scope: scope
+        frozen_embeddings: optional precomputed embeddings [F, size] of the first F unique words. Words referenced
+            by `word_to_uniqs` are then indexed by F + u for the U words given by `unique_word_chars`.
+
+    Returns:
+        char embedded words
+    """
     # "fixed PADDING on character level"
     pad = tf.zeros(tf.stack([tf.shape(unique_word_lengths)[0], math.floor(conv_width / 2)]), tf.int32)
     unique_word_chars = tf.concat([pad, unique_word_chars, pad], 1)
@@ -106,6 +123,9 @@ def conv_char_embedding_alt(char_vocab, size, unique_word_chars, unique_word_len
             conv_out = conv_out + conv_mask
 
         unique_embedded_words = tf.reduce_max(conv_out, [1])
+        if frozen_embeddings is not None:
+            frozen_embeddings = tf.reshape(frozen_embeddings, [-1, size])
+            unique_embedded_words = tf.concat([frozen_embeddings, unique_embedded_words], 0)
 
         all_embedded = []
         for word_idx in word_to_uniqs:
@@ -115,3 +135,34 @@ def conv_char_embedding_alt(char_vocab, size, unique_word_chars, unique_word_len
             all_embedded.append(embedded_words)
 
     return all_embedded
+
+
+def partially_trainable_embedding_lookup(ids, index, num_fixed, fixed_lookup, trainable_embeddings,
+                                         projection=None):
+    """
+    Looks up embeddings in fixed (e.g., pretrained) embeddings and a table of trainable embeddings, such that only the
+    looked-up rows of the trainable table receive (sparse) gradients.
+
+    Args:
+        ids: int tensor of word ids
+        index: [vocab_size] int32 tensor mapping word ids to rows of the fixed embeddings if smaller than num_fixed,
+            and to rows of trainable_embeddings offset by num_fixed otherwise
+        num_fixed: number of fixed embeddings, at least 1
+        fixed_lookup: function from a 1-D int32 tensor of rows to their fixed embeddings, e.g., a `tf.gather` or a
+            `tf.py_func` gathering from an array on the host. It is called once with the unique rows of ids.
+        trainable_embeddings: [num_trainable, size] tensor of at least one row
+        projection: optional [size, size] matrix applied to the fixed embeddings
+
+    Returns:
+        embeddings of ids, [..., size]
+    """
+    size = trainable_embeddings.get_shape()[1].value
+    rows = tf.gather(index, ids)
+    unique_rows, positions = tf.unique(tf.reshape(tf.minimum(rows, num_fixed - 1), [-1]))
+    unique_fixed = fixed_lookup(unique_rows)
+    if projection is not None:
+        unique_fixed = tf.matmul(unique_fixed, projection)
+    fixed = tf.reshape(tf.gather(unique_fixed, positions), tf.concat([tf.shape(ids), [size]], 0))
+    trainable = tf.nn.embedding_lookup(trainable_embeddings, tf.maximum(rows - num_fixed, 0))
+    is_fixed = tf.expand_dims(tf.cast(rows < num_fixed, tf.float32), -1)
+    return is_fixed * fixed + (1.0 - is_fixed) * trainable
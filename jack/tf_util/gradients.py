@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""
+Gradient clipping and L2 regularization that keep the gradients of embedding lookups sparse.
+
+Gradients of variables that are only accessed with `tf.gather` or `tf.nn.embedding_lookup` are `tf.IndexedSlices`
+holding one row per looked-up id. Clipping them with `tf.clip_by_value` or `tf.clip_by_norm`, or adding
+`tf.nn.l2_loss` of the whole variable to the loss, turns them into dense [vocab_size, dim] tensors on every step.
+"""
+
+import tensorflow as tf
+
+
+def clip_gradient(grad, clip, clip_op=tf.clip_by_value):
+    """Clips a dense gradient or the values of sparse gradients, such that the clipped sparse gradient equals the
+    clipped dense gradient.
+
+    Args:
+        grad: `tf.Tensor` or `tf.IndexedSlices`
+        clip: (min, max) for `tf.clip_by_value`, max norm for `tf.clip_by_norm`
+        clip_op: `tf.clip_by_value` or `tf.clip_by_norm`
+
+    Returns:
+        clipped gradient of the type of grad
+    """
+    if clip_op == tf.clip_by_value:
+        clip_fn = lambda t: tf.clip_by_value(t, clip[0], clip[1])
+    elif clip_op == tf.clip_by_norm:
+        clip_fn = lambda t: tf.clip_by_norm(t, clip)
+    else:
+        raise ValueError("Unknown clip_op {}, must be tf.clip_by_value or tf.clip_by_norm.".format(clip_op))
+    if isinstance(grad, tf.IndexedSlices):
+        # rows of ids looked up multiple times are summed before clipping, as in the dense gradient
+        grad = merge_duplicate_indices(grad)
+        return tf.IndexedSlices(clip_fn(grad.values), grad.indices, grad.dense_shape)
+    return clip_fn(grad)
+
+
+def merge_duplicate_indices(grad: tf.IndexedSlices) -> tf.IndexedSlices:
+    """Sums the rows of a sparse gradient that belong to the same index."""
+    indices, positions = tf.unique(grad.indices)
+    values = tf.unsorted_segment_sum(grad.values, positions, tf.shape(indices)[0])
+    return tf.IndexedSlices(values, indices, grad.dense_shape)
+
+
+def regularize_gradient(grad, var, l2):
+    """Adds the gradient of `l2 * tf.nn.l2_loss(var)` to grad.
+
+    For sparse gradients this is only done lazily for the rows of var that occur in grad, i.e., rows not looked up in
+    a batch are not decayed in that step.
+
+    Args:
+        grad: `tf.Tensor` or `tf.IndexedSlices`
+        var: variable of grad
+        l2: regularization weight
+
+    Returns:
+        regularized gradient of the type of grad
+    """
+    if isinstance(grad, tf.IndexedSlices):
+        indices, _ = tf.unique(grad.indices)
+        return tf.IndexedSlices(tf.concat([grad.values, l2 * tf.gather(var, indices)], 0),
+                                tf.concat([grad.indices, indices], 0), grad.dense_shape)
+    return grad + l2 * var
@@ -1,7 +1,12 @@
 # -*- coding: utf-8 -*-
 
+import contextlib
+import logging
+
 import tensorflow as tf
 
+logger = logging.getLogger(__name__)
+
 
 def mask_for_lengths(lengths, max_length=None, mask_right=True, value=-1000.0):
     """
@@ -22,3 +27,23 @@ def mask_for_lengths(lengths, max_length=None, mask_right=True, value=-1000.0):
         mask = 1.0 - mask
     mask *= value
     return mask
+
+
+def jit_scope(enabled=True):
+    """
+    Context manager marking all ops created within it for compilation with XLA's JIT, which fuses them into a few
+    kernels. Ops XLA cannot compile are left to the standard executor.
+
+    Args:
+        enabled: if False, or if tensorflow has no XLA support, the scope does nothing
+
+    Returns:
+        a context manager
+    """
+    if enabled:
+        try:
+            from tensorflow.contrib.compiler import jit
+            return jit.experimental_jit_scope()
+        except ImportError:
+            logger.warning("XLA is not available in this tensorflow installation, ops are not compiled.")
+    return contextlib.suppress()
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import re
+
 import numpy as np
 import tensorflow as tf
 
@@ -31,7 +33,13 @@ def fused_rnn_backward(fused_rnn, inputs, sequence_length, initial_state=None, d
 
 
 def fused_birnn(fused_rnn, inputs, sequence_length, initial_state=None, dtype=None, scope=None, time_major=True,
-                backward_device=None):
+                backward_device=None, initial_state_bw=None):
+    """Bidirectional RNN with a fused RNN, e.g., `tf.contrib.rnn.LSTMBlockFusedCell`.
+
+    `initial_state` is used for both directions unless `initial_state_bw` is given.
+    """
+    if initial_state_bw is None:
+        initial_state_bw = initial_state
     with tf.variable_scope(scope or "BiRNN"):
         sequence_length = tf.cast(sequence_length, tf.int32)
         if not time_major:
@@ -41,10 +49,10 @@ def fused_birnn(fused_rnn, inputs, sequence_length, initial_state=None, dtype=No
 
         if backward_device is not None:
             with tf.device(backward_device):
-                outputs_bw, state_bw = fused_rnn_backward(fused_rnn, inputs, sequence_length, initial_state, dtype,
+                outputs_bw, state_bw = fused_rnn_backward(fused_rnn, inputs, sequence_length, initial_state_bw, dtype,
                                                           scope="BW")
         else:
-            outputs_bw, state_bw = fused_rnn_backward(fused_rnn, inputs, sequence_length, initial_state, dtype,
+            outputs_bw, state_bw = fused_rnn_backward(fused_rnn, inputs, sequence_length, initial_state_bw, dtype,
                                                       scope="BW")
 
         if not time_major:
@@ -55,7 +63,7 @@ def fused_birnn(fused_rnn, inputs, sequence_length, initial_state=None, dtype=No
 
 def pair_of_bidirectional_LSTMs(seq1, seq1_lengths, seq2, seq2_lengths,
                                 output_size, scope=None, drop_keep_prob=1.0,
-                                conditional_encoding=True):
+                                conditional_encoding=True, fused=False):
     """Duo of bi-LSTMs over seq1 and seq2 with (optional)conditional encoding.
 
     Args:
@@ -66,14 +74,16 @@ def pair_of_bidirectional_LSTMs(seq1, seq1_lengths, seq2, seq2_lengths,
         output_size (int): Size of the LSTMs state.
         scope (string): The TensorFlow scope for the reader.
         drop_keep_drop (float=1.0): The keep propability for dropout.
+        fused (bool=False): Whether to use `fused_bidirectional_lstm` instead of `dynamic_bidirectional_lstm`.
 
     Returns:
         Outputs (tensor): The outputs from the second bi-LSTM.
         States (tensor): The cell states from the second bi-LSTM.
     """
+    bidirectional_lstm = fused_bidirectional_lstm if fused else dynamic_bidirectional_lstm
     with tf.variable_scope(scope or "paired_LSTM_seq1") as varscope1:
         # seq1_states: (c_fw, h_fw), (c_bw, h_bw)
-        _, seq1_final_states = dynamic_bidirectional_lstm(
+        _, seq1_final_states = bidirectional_lstm(
                         seq1, seq1_lengths, output_size, scope=varscope1,
                         drop_keep_prob=drop_keep_prob)
 
@@ -81,7 +91,7 @@ def pair_of_bidirectional_LSTMs(seq1, seq1_lengths, seq2, seq2_lengths,
     with tf.variable_scope(scope or "paired_LSTM_seq2") as varscope2:
         varscope1.reuse_variables()
         # each [batch_size x max_seq_length x output_size]
-        all_states_fw_bw, final_states_fw_bw = dynamic_bidirectional_lstm(
+        all_states_fw_bw, final_states_fw_bw = bidirectional_lstm(
                                             seq2, seq2_lengths, output_size,
                                             seq1_final_states, scope=varscope2,
                                             drop_keep_prob=drop_keep_prob)
@@ -142,3 +152,79 @@ def dynamic_bidirectional_lstm(inputs, lengths, output_size,
         )
 
         return all_states_fw_bw, final_states_fw_bw
+
+
+def fused_bidirectional_lstm(inputs, lengths, output_size,
+                             initial_state=(None, None), scope=None,
+                             drop_keep_prob=1.0, initializer=None):
+    """Bi-LSTM on the fused `LSTMBlockFusedCell` kernel, a drop-in replacement of `dynamic_bidirectional_lstm`.
+
+    Both LSTMs share the weight layout of `tf.contrib.rnn.LSTMCell`, so checkpoints of models using
+    `tf.nn.bidirectional_dynamic_rnn` can be converted with `restore_unfused_lstm_checkpoint`.
+
+    Args:
+        inputs (tensor): The inputs into the bi-LSTM, [batch_size x max_seq_length x input_size]
+        lengths (tensor): The lengths of the sequences
+        output_size (int): Size of the LSTM state of the reader.
+        initial_state (tensor=None, tensor=None): Tuple of initial (forward, backward) states for the LSTM
+        scope (string): The TensorFlow scope for the reader.
+        drop_keep_drop (float=1.0): The keep probability for dropout of inputs and outputs.
+        initializer: Initializer of the LSTM kernels, defaults to xavier initialization
+
+    Returns:
+        all_states (tensor): All forward and backward states
+        final_states (tensor): The final forward and backward states
+    """
+    with tf.variable_scope(scope or "reader"):
+        if drop_keep_prob != 1.0:
+            inputs = tf.nn.dropout(inputs, drop_keep_prob, seed=1233)
+        initializer = initializer or tf.contrib.layers.xavier_initializer()
+        # same scope name as tf.nn.bidirectional_dynamic_rnn, see `fused_lstm_variable_name`
+        with tf.variable_scope("bidirectional_rnn", initializer=initializer) as vs:
+            cell = tf.contrib.rnn.LSTMBlockFusedCell(output_size)
+            all_states_fw_bw, final_states_fw_bw = fused_birnn(
+                cell, inputs, lengths, initial_state=initial_state[0], initial_state_bw=initial_state[1],
+                dtype=tf.float32, scope=vs, time_major=False)
+        if drop_keep_prob != 1.0:
+            all_states_fw_bw = tuple(tf.nn.dropout(states, drop_keep_prob, seed=1233)
+                                     for states in all_states_fw_bw)
+
+        return all_states_fw_bw, final_states_fw_bw
+
+
+def fused_lstm_variable_name(unfused_name):
+    """Maps a variable name of a `tf.contrib.rnn.LSTMCell` in `tf.nn.bidirectional_dynamic_rnn` to the name of the
+    respective variable of `fused_bidirectional_lstm`. Other names are returned as they are.
+
+    Both cells store their kernel as [input_size + num_units, 4 * num_units] with gates in the order i, j, f, o and
+    add the forget bias at runtime, so values can be copied without transformation.
+    """
+    match = re.match(r'^(.*)bidirectional_rnn/(fw|bw)/lstm_cell/(kernel|weights|bias|biases)$', unfused_name)
+    if match is None:
+        return unfused_name
+    prefix, direction, variable = match.groups()
+    variable = {'weights': 'kernel', 'biases': 'bias'}.get(variable, variable)
+    return '{}bidirectional_rnn/{}/{}'.format(prefix, direction.upper(), variable)
+
+
+def restore_unfused_lstm_checkpoint(session, path, variables):
+    """Restores variables of a model with fused bi-LSTMs from a checkpoint of the same model with
+    `tf.contrib.rnn.LSTMCell` bi-LSTMs (see `fused_lstm_variable_name`).
+
+    Args:
+        session: session of the variables
+        path: path to the checkpoint
+        variables: variables to restore
+    """
+    checkpoint = tf.train.NewCheckpointReader(path)
+    by_name = {v.op.name: v for v in variables}
+    var_list = dict()
+    for name in checkpoint.get_variable_to_shape_map():
+        fused_name = fused_lstm_variable_name(name)
+        # fused cells might nest their variables in another scope depending on the tensorflow version
+        fused_name = fused_name if fused_name in by_name else re.sub(r'/(FW|BW)/', r'/\1/lstm_fused_cell/', fused_name)
+        if fused_name in by_name:
+            var_list[name] = by_name.pop(fused_name)
+    if by_name:
+        raise ValueError("Variables {} not found in checkpoint {}.".format(sorted(by_name), path))
+    tf.train.Saver(var_list).restore(session, path)
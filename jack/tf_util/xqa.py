@@ -37,4 +37,58 @@ def xqa_min_crossentropy_span_loss(candidate_scores, span_candidates, answer_spa
 
     loss = tf.nn.softmax_cross_entropy_with_logits(logits=candidate_scores, labels=span_labels)
     loss = tf.segment_min(loss, answer_to_question)
-    return [tf.reduce_mean(loss)]
\ No newline at end of file
+    return [tf.reduce_mean(loss)]
+
+
+def banded_span_scores(start_scores, end_scores, max_span_length):
+    """Scores of all spans of at most `max_span_length` tokens.
+
+    Instead of the full [L, L] matrix of all (start, end) pairs only the band of valid ends is computed for every start.
+
+    Args:
+        start_scores: [B, L]
+        end_scores: [B, L]
+        max_span_length: python int W
+
+    Returns:
+        [B, L, W] scores, entry (b, i, w) is the score of span (i, i + w), spans ending beyond L are masked out
+    """
+    length = tf.shape(end_scores)[1]
+    padding = tf.fill(tf.stack([tf.shape(end_scores)[0], max_span_length - 1]), -1e6)
+    padded_end_scores = tf.concat([end_scores, padding], 1)
+    band = tf.stack([tf.slice(padded_end_scores, [0, w], tf.stack([-1, length])) for w in range(max_span_length)], 2)
+    return tf.expand_dims(start_scores, 2) + band
+
+
+def nbest_spans(start_scores, end_scores, n, max_span_length, start_pointer=None, beam_size=1):
+    """N-best spans of at most `max_span_length` tokens by the product of start and end probabilities.
+
+    Args:
+        start_scores: [R, L] start logits
+        end_scores: [R, L] end logits
+        n: number of spans per instance (python int or scalar tensor)
+        max_span_length: python int
+        start_pointer: optional [R], only spans starting at these positions are considered, e.g., for models that
+            predict the end conditioned on a start
+        beam_size: number of consecutive rows that belong to the same instance (python int or scalar tensor)
+
+    Returns:
+        spans [R / beam_size, n, 2], probabilities [R / beam_size, n]
+    """
+    start_log_probs = tf.nn.log_softmax(start_scores)
+    end_log_probs = tf.nn.log_softmax(end_scores)
+    length = tf.shape(start_scores)[1]
+    if start_pointer is not None:
+        start_log_probs += (1.0 - tf.one_hot(start_pointer, length)) * -1e6
+
+    span_log_probs = banded_span_scores(start_log_probs, end_log_probs, max_span_length)
+    # rows of the same instance compete for the same n spans
+    candidates_per_row = length * max_span_length
+    span_log_probs = tf.reshape(span_log_probs, tf.stack([-1, beam_size * candidates_per_row]))
+    log_probs, idx = tf.nn.top_k(span_log_probs, tf.minimum(n, beam_size * candidates_per_row))
+
+    idx = idx % candidates_per_row
+    starts = idx // max_span_length
+    # fewer valid spans than n can only be padded with (masked) spans ending beyond the support
+    ends = tf.minimum(starts + idx % max_span_length, length - 1)
+    return tf.stack([starts, ends], 2), tf.exp(log_probs)
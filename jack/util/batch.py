@@ -195,3 +195,53 @@ def shuffle_and_batch(items: List[T], batch_size: int,
         todo = todo[batch_size:]
         items_batch = [items[i] for i in indices]
         yield items_batch
+
+
+class BatchBufferPool:
+    """Pool of reusable, preallocated arrays for batch creation.
+
+    For every key (usually a `TensorPort`) the pool keeps `depth` flat buffers which grow to the high-water-mark
+    size seen so far. Each request for a key hands out a zeroed, contiguous view of the next buffer in a ring, so
+    a batch stays valid until `depth` further batches have been requested. Choose `depth` larger than the number of
+    batches that can be alive at the same time (e.g., prefetch queue size + the batch currently being processed).
+    A depth of 0 disables pooling and simply allocates fresh arrays.
+    """
+
+    def __init__(self, depth: int = 2):
+        self.depth = depth
+        self._buffers = dict()
+        self._cursors = dict()
+
+    def get(self, key, shape, dtype=np.float32) -> np.ndarray:
+        """Returns a zeroed array of the given shape and dtype, backed by a pooled buffer.
+
+        Args:
+            key: identifies the pooled buffers, e.g., the port the array is created for.
+            shape: shape of the requested array.
+            dtype: numpy dtype of the requested array.
+
+        Returns:
+            A contiguous array view of the requested shape in which all entries are 0.
+        """
+        dtype = np.dtype(dtype)
+        if self.depth <= 0:
+            return np.zeros(shape, dtype)
+        size = int(np.prod(shape))
+        buffers = self._buffers.setdefault((key, dtype), [None] * self.depth)
+        cursor = self._cursors.get((key, dtype), 0)
+        self._cursors[(key, dtype)] = (cursor + 1) % self.depth
+        buffer = buffers[cursor]
+        if buffer is None or buffer.shape[0] < size:
+            # grow to the high-water-mark, fresh buffers are already zeroed
+            buffer = np.zeros([size], dtype)
+            buffers[cursor] = buffer
+            return buffer[:size].reshape(shape)
+        view = buffer[:size]
+        # only zero the region that is actually reused
+        view.fill(0)
+        return view.reshape(shape)
+
+    def clear(self):
+        """Releases all pooled buffers."""
+        self._buffers.clear()
+        self._cursors.clear()
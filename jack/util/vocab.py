@@ -222,13 +222,19 @@ class Vocab:
             os.mkdir(path)
         conf_file = os.path.join(path, "conf.yaml")
         emb_file = os.path.join(path, "emb.pkl")
+        projection_file = os.path.join(path, "projection.npz")
         remainder_file = os.path.join(path, "remainder.pkl")
         if self.emb is not None:
             with open(conf_file, "w") as f:
-                yaml.dump({"embedding_file": self.emb.filename, "emb_format": self.emb.emb_format}, f)
+                yaml.dump({"embedding_file": self.emb.filename, "emb_format": self.emb.emb_format,
+                           "compression": self.emb.compression}, f)
             if self.emb.filename is None:
                 with open(emb_file, "wb") as f:
                     pickle.dump(self.emb, f)
+            elif self.emb.projection is not None:
+                # embeddings in the file are projected again when loaded
+                mean, components = self.emb.projection
+                np.savez(projection_file, mean=mean, components=components)
         remaining = {k: self.__dict__[k] for k in self.__dict__ if k != "emb"}
         with open(remainder_file, "wb") as f:
             pickle.dump(remaining, f)
@@ -236,12 +242,18 @@ class Vocab:
     def load(self, path: str):
         conf_file = os.path.join(path, "conf.yaml")
         emb_file = os.path.join(path, "emb.pkl")
+        projection_file = os.path.join(path, "projection.npz")
         remainder_file = os.path.join(path, "remainder.pkl")
         if os.path.exists(conf_file):
             with open(conf_file, "r") as f:
                 config = yaml.load(f)
             if config["embedding_file"] is not None:
-                emb = load_embeddings(config["embedding_file"], typ=config.get("emb_format", None))
+                projection = None
+                if os.path.exists(projection_file):
+                    with np.load(projection_file) as arrays:
+                        projection = arrays["mean"], arrays["components"]
+                emb = load_embeddings(config["embedding_file"], typ=config.get("emb_format", None),
+                                      compression=config.get("compression"), projection=projection)
             elif os.path.exists(emb_file):
                 with open(emb_file, "rb") as f:
                     emb = pickle.load(f)
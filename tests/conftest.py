@@ -14,3 +14,41 @@ def pytest_collection_modifyitems(items):
             item.add_marker(pytest.mark.smalldata)
         elif "readme" in item.nodeid:
             item.add_marker(pytest.mark.readme)
+
+
+@pytest.fixture
+def xqa_reader_factory():
+    """Returns a function that creates an extractive QA reader set up on the SQuAD snippet with random embeddings of
+    the question words. Keyword arguments override the default config. The function returns the reader and the data.
+    """
+    import numpy as np
+    import tensorflow as tf
+
+    import jack.readers as readers
+    from jack.core import SharedResources
+    from jack.io.embeddings.embeddings import Embeddings
+    from jack.io.load import load_jack
+    from jack.readers.extractive_qa.util import tokenize
+    from jack.util.vocab import Vocab
+
+    tf.reset_default_graph()
+    data = load_jack('tests/test_data/squad/snippet_jtr.json')
+
+    def create(model="fastqa_reader", **config_overrides):
+        vocab = dict()
+        for question, _ in data:
+            for t in tokenize(question.question):
+                if t not in vocab:
+                    vocab[t] = len(vocab)
+        embeddings = Embeddings(vocab, np.random.random([len(vocab), 10]))
+        vocab = Vocab(emb=embeddings, init_from_embeddings=True)
+        # readers are scoped by their name, such that several readers can be created in the same graph
+        config = {"model": model, "name": model, "batch_size": 1, "repr_dim": 10,
+                  "repr_dim_input": embeddings.lookup.shape[1], "with_char_embeddings": True}
+        config.update(config_overrides)
+
+        reader = readers.readers[model](SharedResources(vocab, config))
+        reader.setup_from_data(data)
+        return reader, data
+
+    return create
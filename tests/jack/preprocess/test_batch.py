@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import numpy as np
+
 from jack.util import batch
 
 
@@ -53,3 +55,29 @@ def test_get_batches():
     batches = list(batch_generator)
 
     assert len(batches) == 3
+
+
+def test_batch_buffer_pool():
+    pool = batch.BatchBufferPool(depth=2)
+
+    first = pool.get('port', [2, 3], np.int32)
+    first[:] = 1
+    second = pool.get('port', [2, 2], np.int32)
+    second[:] = 2
+
+    assert first.shape == (2, 3) and first.dtype == np.int32
+    # first buffer is still valid because depth is 2
+    assert np.all(first == 1)
+
+    # third request reuses the memory of the first one, zeroing only the requested region
+    third = pool.get('port', [1, 4], np.int32)
+    assert np.all(third == 0)
+    assert np.shares_memory(first, third)
+
+    # larger requests grow the buffer to the new high-water-mark
+    fourth = pool.get('port', [4, 4], np.int32)
+    assert fourth.shape == (4, 4) and np.all(fourth == 0)
+
+    # depth 0 disables pooling
+    no_pool = batch.BatchBufferPool(depth=0)
+    assert not np.shares_memory(no_pool.get('port', [2]), no_pool.get('port', [2]))
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import tensorflow as tf
+
+from jack.readers.extractive_qa.bidaf import biattention
+
+
+def tiled_biattention(encoded_question, encoded_support, W):
+    # original BiDAF attention on tiled [batch, length1, length2, 6*embedding] features
+    question_length = tf.shape(encoded_question)[1]
+    support_length = tf.shape(encoded_support)[1]
+    support = tf.tile(tf.expand_dims(encoded_support, 1), [1, question_length, 1, 1])
+    question = tf.tile(tf.expand_dims(encoded_question, 2), [1, 1, support_length, 1])
+    features = tf.concat([support, question, question * support], 3)
+    S = tf.einsum('ijkl,l->ijk', features, W)
+    att_question = tf.nn.softmax(S, 2)
+    question_weighted = tf.einsum('ijk,ijkl->ikl', att_question, question)
+    support_attention = tf.nn.softmax(tf.reduce_max(S, 2), 1)
+    support_weighted = tf.einsum('ij,ijkl->il', support_attention, support)
+    return question_weighted, support_weighted
+
+
+def test_biattention():
+    tf.reset_default_graph()
+    rs = np.random.RandomState(0)
+    encoded_question = tf.constant(rs.randn(2, 4, 6).astype(np.float32))
+    encoded_support = tf.constant(rs.randn(2, 7, 6).astype(np.float32))
+    W = tf.constant(rs.randn(18).astype(np.float32))
+
+    with tf.Session() as sess:
+        decomposed, tiled = sess.run([biattention(encoded_question, encoded_support, W),
+                                      tiled_biattention(encoded_question, encoded_support, W)])
+
+    for d, t in zip(decomposed, tiled):
+        assert d.shape == t.shape
+        np.testing.assert_allclose(d, t, rtol=1e-5, atol=1e-5)
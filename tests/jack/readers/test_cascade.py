@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from jack.core.data_structures import Answer, QASetting
+from jack.readers.cascade import CascadeReader, answer_with_confidence
+
+
+class FixedReader:
+    """Answers each question with a fixed answer text and a confidence depending on the question."""
+
+    def __init__(self, text, scores):
+        self.text = text
+        self.scores = scores
+
+    def __call__(self, inputs):
+        return [Answer(self.text, score=self.scores.get(q.question, 0.0)) for q in inputs]
+
+
+def test_cascade_reader():
+    cheap = FixedReader("cheap", {"easy": 0.9, "hard": 0.2})
+    expensive = FixedReader("expensive", {})
+    cascade = CascadeReader([cheap, expensive], thresholds=[0.5])
+
+    answers = cascade([QASetting("easy"), QASetting("hard")])
+    assert [a.text for a in answers] == ["cheap", "expensive"]
+
+    dataset = [(QASetting("easy"), [Answer("cheap")]), (QASetting("hard"), [Answer("cheap")]),
+               (QASetting("easy"), [Answer("other")])]
+    report = cascade.evaluate(dataset, batch_size=2)
+    # only the low confidence instance is forwarded to the expensive reader
+    assert [r["read"] for r in report] == [3, 1]
+    assert [r["accepted"] for r in report] == [2, 1]
+    assert [r["accuracy"] for r in report] == [0.5, 0.0]
+
+
+def test_cascade_of_readers(xqa_reader_factory):
+    cbow_reader, data = xqa_reader_factory("cbow_xqa_reader")
+    fastqa_reader, _ = xqa_reader_factory("fastqa_reader")
+    questions = [question for question, _ in data]
+
+    for confidence in ["score", "margin"]:
+        answers, confidences = answer_with_confidence(cbow_reader, questions, confidence)
+        assert len(answers) == len(questions)
+        # CBOW answers are scored by the probability of their span
+        assert np.all(confidences > 0.0) and np.all(confidences <= 1.0)
+
+    cbow_answers, fastqa_answers = cbow_reader(questions), fastqa_reader(questions)
+    # all instances are accepted by the first stage with a threshold of 0 and forwarded with a threshold above 1
+    for threshold, expected in [(0.0, cbow_answers), (1.1, fastqa_answers)]:
+        cascade = CascadeReader([cbow_reader, fastqa_reader], thresholds=[threshold])
+        report = cascade.evaluate(data)
+        assert [a.text for a in cascade(questions)] == [a.text for a in expected]
+        assert report[0]["read"] == len(questions)
+        assert report[1]["read"] == (len(questions) if threshold > 1.0 else 0)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from jack.core.data_structures import QASetting, Answer
+from jack.readers.extractive_qa.util import CharIdTable, prepare_data, select_support_sentences, support_windows, \
+    token_end, unique_words_with_chars
+from jack.util.vocab import Vocab
+
+
+def test_char_id_table():
+    char_vocab = {c: i + 1 for i, c in enumerate("abcdefghijklmnopqrstuvwxyz")}
+    q_tokenized = [["what", "is", "a", "verylongwordthatgetscutoff"], ["who", "is"]]
+    s_tokenized = [["a", "cat", "is", "verylongwordthatgetscutoffhere"], ["nobody", "?"]]
+
+    table = CharIdTable(char_vocab, char_limit=20, initial_size=2)
+    for _ in range(2):
+        unique_word_chars, unique_word_lengths, question2unique, support2unique = \
+            table.unique_words_with_chars(q_tokenized, s_tokenized)
+        unique_words, expected_lengths, expected_q2u, expected_s2u = \
+            unique_words_with_chars(q_tokenized, s_tokenized, char_vocab)
+
+        assert len(unique_word_chars) == len(unique_words)
+        assert sorted(unique_word_lengths.tolist()) == sorted(expected_lengths)
+        # words are mapped to the same characters as before
+        for tokens, t2u, expected_t2u in zip(q_tokenized + s_tokenized, question2unique + support2unique,
+                                             expected_q2u + expected_s2u):
+            assert len(t2u) == len(tokens)
+            for u, expected_u in zip(t2u, expected_t2u):
+                expected_chars = unique_words[expected_u]
+                assert unique_word_lengths[u] == len(expected_chars)
+                assert unique_word_chars[u, :len(expected_chars)].tolist() == expected_chars
+                assert np.all(unique_word_chars[u, len(expected_chars):] == 0)
+
+    # cut words share the same row and the table grew beyond its initial size
+    assert table.row("verylongwordthatgetscutoff") == table.row("verylongwordthatgetscutoffhere")
+    assert len(table) == len(unique_words)
+
+
+def test_char_id_table_frozen_chars():
+    char_vocab = {c: i + 1 for i, c in enumerate("abcdefghijklmnopqrstuvwxyz")}
+    table = CharIdTable(char_vocab, frozen_ids={"is": 0, "a": 1})
+    q_tokenized = [["what", "is", "a"]]
+    s_tokenized = [["a", "cat", "is", "cat"]]
+
+    frozen_ids, unique_word_chars, unique_word_lengths, question2unique, support2unique = \
+        table.unique_words_with_frozen_chars(q_tokenized, s_tokenized)
+
+    assert sorted(frozen_ids.tolist()) == [0, 1]
+    assert sorted(unique_word_lengths.tolist()) == [3, 4]
+    # frozen words come first, the remaining words index the computed characters
+    words = q_tokenized[0] + s_tokenized[0]
+    for w, u in zip(words, np.concatenate(question2unique + support2unique)):
+        if w in table.frozen_ids:
+            assert frozen_ids[u] == table.frozen_ids[w]
+        else:
+            chars = unique_word_chars[u - len(frozen_ids)]
+            assert chars[:len(w)].tolist() == [char_vocab[c] for c in w]
+
+    frozen_ids, unique_word_chars, unique_word_lengths, _, _ = \
+        table.unique_words_with_frozen_chars([["is"]], [["a"]])
+    # a dummy word is kept if all words are frozen
+    assert len(frozen_ids) == 2 and unique_word_chars.shape == (1, 1)
+
+
+def test_char_id_table_max_size():
+    char_vocab = {c: i + 1 for i, c in enumerate("abcdefghijklmnopqrstuvwxyz")}
+    table = CharIdTable(char_vocab, words=["a", "cat"], initial_size=2, max_size=3, frozen_ids={"cat": 0})
+    table.unique_words_with_chars([["what", "is", "a"]], [["dog", "of", "cat"]])
+    assert len(table) == 6
+
+    # the table is cleared before the next batch, words given on construction keep their rows
+    unique_word_chars, unique_word_lengths, question2unique, _ = \
+        table.unique_words_with_chars([["is", "a"]], [["cat"]])
+    assert len(table) == 3 and table.row("a") == 0 and table.row("cat") == 1 and table.frozen[1] == 0
+    assert set(table.word2row) == {"a", "cat", "is"}
+    chars = unique_word_chars[question2unique[0][0]]
+    assert chars.tolist() == [char_vocab["i"], char_vocab["s"], 0]
+
+
+def test_prepare_data():
+    support = "The cat sat on the mat , the cat ."
+    qa_setting = QASetting(question="Where sat the cat ?", support=[support])
+    answers = [Answer("on the mat", span=(12, 22)), Answer("the mat", span=(15, 22)),
+               Answer("at on", span=(9, 14)), Answer("on the mat", span=(12, 22))]
+
+    _, _, _, _, support_tokens, _, _, support_length, word_in_question, token_offsets, answer_spans = \
+        prepare_data(qa_setting, answers, Vocab(), with_answers=True)
+
+    assert support_length == len(support_tokens) == 10
+    assert token_offsets == [0, 4, 8, 12, 15, 19, 23, 25, 29, 33]
+    assert word_in_question == [0.0, 1.0, 1.0, 0.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0]
+    # duplicate spans are removed, spans starting within a token are moved to the next token
+    assert answer_spans == [(3, 5), (4, 5), (3, 3)]
+
+
+def test_support_windows():
+    assert support_windows(5, 10, 5) == [(0, 5)]
+    assert support_windows(10, 4, 2) == [(0, 4), (2, 6), (4, 8), (6, 10)]
+    assert support_windows(11, 4, 3) == [(0, 4), (3, 7), (6, 10), (7, 11)]
+
+
+def test_select_support_sentences():
+    support = "The cat sat on the mat. Paris is the capital of France! Dogs bark.  Berlin is big?"
+    selected = select_support_sentences("What is the capital of France?", support, 8)
+
+    # offsets stay valid, only the most relevant sentence is kept
+    assert len(selected) == len(support)
+    assert selected.split() == "Paris is the capital of France!".split()
+    assert select_support_sentences("What is the capital of France?", support, 100) == support
+
+    offset = support.index("France")
+    assert support[offset:token_end(support, offset)] == "France"
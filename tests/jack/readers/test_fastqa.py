@@ -7,6 +7,7 @@ import jack.readers as readers
 from jack.core import SharedResources
 from jack.io.embeddings.embeddings import Embeddings
 from jack.io.load import load_jack
+from jack.readers.extractive_qa.shared import XQAPorts, freeze_char_embeddings
 from jack.readers.extractive_qa.util import tokenize
 from jack.util.vocab import Vocab
 
@@ -40,3 +41,52 @@ def test_fastqa():
     answers = fastqa_reader(questions)
 
     assert answers, "FastQA reader should produce answers"
+
+
+def test_fastqa_frozen_char_embeddings(xqa_reader_factory):
+    fastqa_reader, data = xqa_reader_factory()
+    questions = [question for question, _ in data]
+    shared_resources = fastqa_reader.shared_resources
+    answers = fastqa_reader(questions)
+
+    freeze_char_embeddings(fastqa_reader)
+    assert shared_resources.char_embedding_table.shape[1] == 10
+    frozen_answers = fastqa_reader(questions)
+
+    # precomputed character embeddings must not change predictions
+    for a, frozen_a in zip(answers, frozen_answers):
+        assert a.text == frozen_a.text
+        assert abs(a.score - frozen_a.score) < 1e-5
+
+
+def test_fastqa_support_windows(xqa_reader_factory):
+    fastqa_reader, data = xqa_reader_factory(with_char_embeddings=False, support_window_size=20,
+                                             support_window_stride=10)
+    questions = [question for question, _ in data]
+
+    batch = fastqa_reader.input_module(questions)
+    assert max(batch[XQAPorts.support_length]) <= 20
+    assert len(batch[XQAPorts.support2question]) > len(questions)
+    # windows of the shared support are fed only once
+    assert len(batch[XQAPorts.emb_support]) < len(batch[XQAPorts.emb_question])
+    assert len(batch[XQAPorts.question2support]) == len(batch[XQAPorts.emb_question])
+
+    # predictions of all windows are merged into a single answer per question
+    answers = fastqa_reader(questions)
+    assert len(answers) == len(questions)
+    for q, a in zip(questions, answers):
+        assert 0 <= a.span[0] <= a.span[1] <= len(q.support[0])
+
+
+def test_fastqa_nbest_spans(xqa_reader_factory):
+    fastqa_reader, data = xqa_reader_factory(with_char_embeddings=False, beam_size=2, num_best_spans=5,
+                                             max_span_length=4)
+    questions = [question for question, _ in data]
+
+    batch = fastqa_reader.input_module(questions)
+    output = fastqa_reader.model_module(batch, [XQAPorts.nbest_spans, XQAPorts.nbest_span_scores])
+    spans, scores = output[XQAPorts.nbest_spans], output[XQAPorts.nbest_span_scores]
+
+    assert spans.shape == (len(questions), 5, 2) and scores.shape == (len(questions), 5)
+    assert np.all(spans[:, :, 0] <= spans[:, :, 1]) and np.all(spans[:, :, 1] - spans[:, :, 0] < 4)
+    assert np.all(np.diff(scores, axis=1) <= 0)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+from jack.core.data_structures import Answer, QASetting
+from jack.readers.extractive_qa.multi_paragraph import EarlyStoppingReader, question_overlap, question_terms
+
+
+class ConfidentReader:
+    """Answers with the first word of the support, confident only for paragraphs mentioning Berlin."""
+
+    def __init__(self):
+        self.num_read = 0
+
+    def __call__(self, inputs):
+        self.num_read += len(inputs)
+        return [Answer(q.support[0].split()[0], span=(0, 1), score=0.9 if "Berlin" in q.support[0] else 0.1)
+                for q in inputs]
+
+
+def test_early_stopping_reader():
+    support = ["Dogs chase cats in the garden.",
+               "Paris is the capital of France.",
+               "The capital of Germany is Berlin.",
+               "Cats sleep a lot."]
+    questions = [QASetting("What is the capital of Germany?", support=support),
+                 QASetting("Where do dogs play?", support=support)]
+
+    reader = ConfidentReader()
+    answers = EarlyStoppingReader(reader, threshold=0.5, paragraphs_per_step=1)(questions)
+
+    # the most relevant paragraph is read first and answers confidently
+    assert answers[0].text == "The" and answers[0].doc_idx == 2
+    # the second question reads paragraphs until the confident one, the last paragraph is skipped
+    assert answers[1].score == 0.9 and answers[1].doc_idx == 2
+    assert reader.num_read == 1 + 3
+
+    reader = ConfidentReader()
+    answers = EarlyStoppingReader(reader, threshold=0.5, paragraphs_per_step=1, max_paragraphs=1)(questions)
+    assert answers[1].doc_idx == 0 and reader.num_read == 2
+
+
+def test_question_overlap():
+    # punctuation is no question term, as for the selection of support sentences
+    terms = question_terms("Where is Berlin, Germany?")
+    assert terms == {"where", "is", "berlin", "germany"}
+    assert question_overlap(terms, "Berlin is in Germany.") == 3
+    assert question_overlap(terms, "Yes, really?") == 0
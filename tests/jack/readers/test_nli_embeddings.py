@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+import tensorflow as tf
+
+from jack import readers
+from jack.core.data_structures import QASetting, Answer
+from jack.core.shared_resources import SharedResources
+from jack.core.tensorport import Ports
+from jack.io.embeddings import Embeddings
+from jack.util.vocab import Vocab
+
+
+def test_partially_trainable_embeddings(tmpdir):
+    candidates = ["entailment", "neutral", "contradiction"]
+    data = [(QASetting(question="A man is sleeping .", support=["A man sleeps on a very old sofa ."],
+                       atomic_candidates=candidates), [Answer("entailment")]),
+            (QASetting(question="Nobody sleeps .", support=["The man is sleeping ."],
+                       atomic_candidates=candidates), [Answer("contradiction")]),
+            (QASetting(question="A woman is in a room .", support=["Someone is there ."],
+                       atomic_candidates=candidates), [Answer("neutral")])]
+    questions = [q for q, _ in data]
+
+    # pretrained embeddings only for some of the words
+    pretrained = ["a", "man", "is", "sleeping", "woman", "room", "."]
+    embeddings = Embeddings({w: i for i, w in enumerate(pretrained)},
+                            np.random.RandomState(0).randn(len(pretrained), 10).astype(np.float32))
+
+    for share_embeddings in [False, True]:
+        tf.reset_default_graph()
+        config = {"model": "dam_snli_reader", "repr_dim_input": 10, "dropout": 0.0, "embedding_mode": "pretrained",
+                  "pretrained_projection": True, "share_embeddings": share_embeddings}
+        reader = readers.dam_snli_reader(SharedResources(Vocab(emb=embeddings), config))
+        reader.train(tf.train.AdamOptimizer(0.1), data, batch_size=3, max_epochs=2)
+
+        vocab = reader.shared_resources.vocab
+        model_module = reader.model_module
+        # no variable is of the size of the vocab, pretrained embeddings are not copied into the graph
+        num_oov = len(vocab) - len(pretrained)
+        embedding_variables = [v for v in model_module.variables if v.op.name.split('/')[-1].startswith("emb")]
+        assert sorted(v.get_shape()[0].value for v in embedding_variables) == \
+            sorted(([num_oov, 10] if share_embeddings else [num_oov, num_oov, 10, 10]))
+
+        # pretrained embeddings are not changed by training, only their projection
+        projection = [v for v in embedding_variables if v.op.name.endswith(("emb_projection", "emb_Q_projection"))]
+        word_ids = np.array([[vocab.get_id(w) for w in pretrained]])
+        embedded, projection = reader.session.run([model_module.embed_question(tf.constant(word_ids)), projection[0]])
+        np.testing.assert_allclose(embedded[0], embeddings.lookup.dot(projection), rtol=1e-5, atol=1e-5)
+
+        batch = reader.input_module(questions)
+        logits = model_module(batch, [Ports.Prediction.logits])[Ports.Prediction.logits]
+
+        path = os.path.join(str(tmpdir), "dam_{}".format(share_embeddings))
+        reader.store(path)
+        tf.reset_default_graph()
+        loaded = readers.reader_from_file(path)
+        loaded_logits = loaded.model_module(batch, [Ports.Prediction.logits])[Ports.Prediction.logits]
+        np.testing.assert_allclose(loaded_logits, logits, rtol=1e-5, atol=1e-5)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+import tensorflow as tf
+
+from jack import readers
+from jack.core.data_structures import QASetting, Answer
+from jack.core.shared_resources import SharedResources
+from jack.core.tensorport import Ports
+from jack.io.embeddings import Embeddings
+from jack.readers.extractive_qa.util import tokenize
+from jack.readers.natural_language_inference.numpy_dam import numpy_dam_reader_from_file
+from jack.util.vocab import Vocab
+
+
+candidates = ["entailment", "neutral", "contradiction"]
+data = [(QASetting(question="A man is sleeping .", support=["A man sleeps on a very old sofa ."],
+                   atomic_candidates=candidates), [Answer("entailment")]),
+        (QASetting(question="Nobody sleeps .", support=["The man is sleeping ."],
+                   atomic_candidates=candidates), [Answer("contradiction")]),
+        (QASetting(question="A woman is in a room .", support=["Someone is there ."],
+                   atomic_candidates=candidates), [Answer("neutral")])]
+questions = [q for q, _ in data]
+
+
+def check_numpy_dam(tmpdir, shared_resources):
+    tf.reset_default_graph()
+    dam_reader = readers.dam_snli_reader(shared_resources)
+    dam_reader.setup_from_data(data)
+    # random weights such that logits are not all equal
+    dam_reader.session.run([v.assign(tf.random_normal(tf.shape(v), stddev=0.5, seed=1))
+                            for v in dam_reader.model_module.variables])
+
+    path = os.path.join(str(tmpdir), "dam")
+    dam_reader.store(path)
+    numpy_reader = numpy_dam_reader_from_file(path)
+
+    batch = dam_reader.input_module(questions)
+    logits = dam_reader.model_module(batch, [Ports.Prediction.logits])[Ports.Prediction.logits]
+    numpy_logits = numpy_reader.model_module(batch, [Ports.Prediction.logits])[Ports.Prediction.logits]
+    np.testing.assert_allclose(numpy_logits, logits, rtol=1e-4, atol=1e-4)
+    assert [a.text for a in numpy_reader(questions)] == [a.text for a in dam_reader(questions)]
+
+    # readers stored with the NumPy engine keep their weights in a numpy archive
+    numpy_path = os.path.join(str(tmpdir), "numpy_dam")
+    numpy_reader.store(numpy_path)
+    assert os.path.exists(os.path.join(numpy_path, "model_module.npz"))
+    reloaded_logits = numpy_dam_reader_from_file(numpy_path).model_module(batch)[Ports.Prediction.logits]
+    np.testing.assert_allclose(reloaded_logits, numpy_logits)
+
+
+def test_numpy_dam(tmpdir):
+    vocab = dict()
+    for q in questions:
+        for t in tokenize(q.question) + tokenize(q.support[0]):
+            vocab.setdefault(t.lower(), len(vocab))
+    embeddings = Embeddings(vocab, np.random.random([len(vocab), 10]))
+    shared_resources = SharedResources(Vocab(emb=embeddings, init_from_embeddings=True),
+                                       {"model": "dam_snli_reader", "repr_dim_input": 10, "dropout": 0.0})
+    check_numpy_dam(tmpdir, shared_resources)
+
+
+def test_numpy_dam_shared_pretrained_embeddings(tmpdir):
+    # pretrained embeddings only for some of the words
+    pretrained = ["a", "man", "is", "sleeping", "woman", "room", "."]
+    embeddings = Embeddings({w: i for i, w in enumerate(pretrained)},
+                            np.random.RandomState(0).randn(len(pretrained), 10).astype(np.float32))
+    shared_resources = SharedResources(Vocab(emb=embeddings), {
+        "model": "dam_snli_reader", "repr_dim_input": 10, "dropout": 0.0, "embedding_mode": "pretrained",
+        "pretrained_projection": True, "share_embeddings": True})
+    check_numpy_dam(tmpdir, shared_resources)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+import tensorflow as tf
+
+import jack.readers as readers
+from jack.eval.kbp import compute_ranks
+from jack.io.load import loaders
+from jack.readers.knowledge_base_population.numpy_scoring import numpy_kge_reader_from_file
+from jack.readers.knowledge_base_population.shared import KBPPorts
+
+
+def test_numpy_kge(tmpdir):
+    data = loaders['jack']('tests/test_data/WN18/wn18-snippet.jack.json')[:200]
+    questions = [question for question, _ in data]
+
+    for model_name in ['transe', 'distmult', 'complex']:
+        tf.reset_default_graph()
+        config = {'batch_size': 1, 'repr_dim': 10, 'model': '{}_reader'.format(model_name)}
+        reader = readers.readers[config['model']](config)
+        reader.setup_from_data(data)
+        # embeddings with norms above 1 such that the maximum norm of entities matters
+        reader.session.run([v.assign(tf.random_normal(tf.shape(v), seed=1)) for v in reader.model_module.variables])
+
+        path = os.path.join(str(tmpdir), model_name)
+        reader.store(path)
+        numpy_reader = numpy_kge_reader_from_file(path)
+
+        batch = reader.input_module(questions)
+        logits = reader.model_module(batch)[KBPPorts.triple_logits]
+        numpy_logits = numpy_reader.model_module(batch)[KBPPorts.triple_logits]
+        np.testing.assert_allclose(numpy_logits, logits, rtol=1e-4, atol=1e-4)
+
+        # readers stored with NumPy scoring keep their embeddings as .npy files that can be memory-mapped
+        numpy_path = os.path.join(str(tmpdir), "numpy_" + model_name)
+        numpy_reader.store(numpy_path)
+        mmap_reader = numpy_kge_reader_from_file(numpy_path, mmap=True)
+        assert isinstance(mmap_reader.model_module.scorer.entity_embeddings, np.memmap)
+        np.testing.assert_allclose(mmap_reader.model_module(batch)[KBPPorts.triple_logits], numpy_logits)
+
+        triples = [tuple(q.question.split()) for q in questions[:10]]
+        entity_set = {s for s, _, _ in triples} | {o for _, _, o in triples}
+        ranks, _ = compute_ranks(mmap_reader.model_module.scorer, triples, entity_set)
+        assert all(1 <= r <= len(entity_set) for r in ranks[0] + ranks[1])
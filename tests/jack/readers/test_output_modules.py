@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from jack.core.data_structures import Answer, QASetting
+from jack.core.shared_resources import SharedResources
+from jack.readers.extractive_qa.shared import XQAOutputModule
+from jack.readers.extractive_qa.util import token_end
+from jack.readers.knowledge_base_population.model_f import ModelFOutputModule
+from jack.readers.knowledge_base_population.models import KnowledgeGraphEmbeddingOutputModule
+from jack.readers.multiple_choice.shared import SimpleMCOutputModule
+from jack.util.vocab import Vocab
+
+
+def _np_softmax(x):
+    e_x = np.exp(x - np.max(x))
+    return e_x / e_x.sum(axis=0)
+
+
+def per_instance_xqa_answers(questions, span_prediction, token_char_offsets, start_scores, end_scores,
+                             support2question, question2support):
+    # former per-instance implementation of `XQAOutputModule`
+    answers = [None] * len(questions)
+    for i, q_idx in enumerate(support2question):
+        q = questions[q_idx]
+        s = question2support[i]
+        start, end = span_prediction[i, 0], span_prediction[i, 1]
+        char_start = token_char_offsets[s, start]
+        char_end = token_end(q.support[0], token_char_offsets[s, end])
+        answer = q.support[0][char_start: char_end].rstrip()
+        score = _np_softmax(start_scores[i])[start] * _np_softmax(end_scores[i])[end]
+        if answers[q_idx] is None or score > answers[q_idx].score:
+            answers[q_idx] = Answer(answer, span=(char_start, char_start + len(answer)), score=score)
+    return answers
+
+
+def test_xqa_output_module():
+    support = "The cat sat on the mat ."
+    offsets = [0, 4, 8, 12, 15, 19, 23]
+    questions = [QASetting("Where sat the cat ?", support=[support]), QASetting("Who sat ?", support=[support])]
+    # the first question has two windows of the support, the second one window
+    support2question = np.array([0, 0, 1])
+    question2support = np.array([0, 1, 2])
+    token_char_offsets = np.array([offsets[:4], offsets[3:], offsets[:4]])
+    span_prediction = np.array([[0, 1], [0, 2], [1, 1]])
+
+    rs = np.random.RandomState(0)
+    start_scores = rs.randn(3, 4)
+    end_scores = rs.randn(3, 4)
+    # the second window of the first question predicts its span confidently
+    start_scores[1, 0] = end_scores[1, 2] = 10.0
+
+    args = (questions, span_prediction, token_char_offsets, start_scores, end_scores, support2question,
+            question2support)
+    answers = XQAOutputModule(SharedResources(Vocab(), {}))(*args)
+    expected = per_instance_xqa_answers(*args)
+
+    assert answers[0].text == "on the mat" and answers[0].span == (12, 22)
+    for a, e in zip(answers, expected):
+        assert a.text == e.text and a.span == e.span
+        # the log-sum-exp score is the product of the start and end probabilities
+        np.testing.assert_allclose(a.score, e.score, rtol=1e-6)
+
+
+def test_candidate_output_modules():
+    candidates = ["entailment", "neutral", "contradiction"]
+    questions = [QASetting("q{}".format(i), atomic_candidates=candidates) for i in range(4)]
+    logits = np.random.RandomState(0).randn(4, 3).astype(np.float32)
+
+    for output_module in [SimpleMCOutputModule(), ModelFOutputModule()]:
+        answers = output_module(questions, logits)
+        # former per-instance implementation
+        for i, (q, a) in enumerate(zip(questions, answers)):
+            winning_index = np.argmax(logits[i])
+            assert a.text == q.atomic_candidates[winning_index]
+            assert a.score == logits[i, winning_index]
+
+    triple_logits = np.random.RandomState(1).randn(4).astype(np.float32)
+    answers = KnowledgeGraphEmbeddingOutputModule()(questions, triple_logits)
+    assert [a.text for a in answers] == [None] * 4
+    assert [a.score for a in answers] == [triple_logits[i] for i in range(4)]
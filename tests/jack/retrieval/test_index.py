@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from jack.core.data_structures import Answer, QASetting
+from jack.retrieval import InvertedIndex, RetrievalReader
+
+documents = ["The cat sat on the mat.",
+             "Dogs chase cats in the garden.",
+             "Paris is the capital of France.",
+             "The capital of Germany is Berlin, which is a large city."]
+
+
+def test_inverted_index(tmpdir):
+    index = InvertedIndex.build(documents)
+    assert index.num_documents == 4
+
+    for scoring in ["bm25", "tfidf"]:
+        assert index.retrieve("What is the capital of France?", k=1, scoring=scoring)[0][0] == 2
+        results = index.retrieve("capital", k=10, scoring=scoring)
+        assert sorted(doc_id for doc_id, _ in results) == [2, 3]
+    assert index.retrieve("unknown words only", k=3) == []
+    assert index.retrieve("capital", k=0) == [] and index.retrieve("capital", k=-1) == []
+    assert len(index.retrieve("the", k=100)) == 4
+
+    path = str(tmpdir.join("index.npz"))
+    index.store(path)
+    loaded = InvertedIndex.load(path)
+    assert loaded.documents == documents
+    assert loaded.term2id == index.term2id
+    np.testing.assert_allclose(loaded.scores("the cat")[1], index.scores("the cat")[1])
+
+
+def test_retrieval_reader():
+    class FirstWordReader:
+        def __call__(self, inputs):
+            return [Answer(q.support[0].split()[0], span=(0, 1), score=float(len(q.support[0]))) for q in inputs]
+
+    reader = RetrievalReader(InvertedIndex.build(documents), FirstWordReader(), k=2, batch_size=1)
+    answers = reader([QASetting("What is the capital?"), QASetting("Nothing matches")])
+    # the longest retrieved document scores best
+    assert answers[0].text == "The" and answers[0].doc_idx == 3
+    assert answers[1].text == ""
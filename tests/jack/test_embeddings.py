@@ -1,6 +1,9 @@
-from jack.io.embeddings import load_embeddings
+import os
+
 import numpy as np
 
+from jack.io.embeddings import load_embeddings
+
 
 def test_memory_maps():
     import tempfile
@@ -8,7 +11,7 @@ def test_memory_maps():
     embeddings_file = "data/GloVe/glove.the.50d.txt"
     embeddings = load_embeddings(embeddings_file, 'glove')
     with tempfile.TemporaryDirectory() as tmp_dir:
-        prefix = tmp_dir + "_memmap_emb"
+        prefix = os.path.join(tmp_dir, "memmap_emb")
         save_as_memory_map(prefix, embeddings)
         loaded_embeddings = load_memory_map(prefix)
         assert loaded_embeddings.shape == embeddings.shape
@@ -16,3 +19,96 @@ def test_memory_maps():
         assert loaded_embeddings.vocabulary[b"the"] == 0
         assert b"foo" not in loaded_embeddings.vocabulary
         assert np.isclose(loaded_embeddings.get(b"the"), embeddings.get(b"the"), 1.e-5).all()
+
+
+def test_compressed_embeddings():
+    import tempfile
+    from jack.io.embeddings import compress_embeddings
+    from jack.io.embeddings.memory_map import save_as_memory_map, load_memory_map
+    embeddings_file = "data/GloVe/glove.the.50d.txt"
+    embeddings = load_embeddings(embeddings_file, 'glove')
+    for compression in ["float16", "int8"]:
+        compressed = compress_embeddings(embeddings, compression)
+        assert compressed.compression == compression
+        assert compressed.shape == embeddings.shape
+        if compression == "int8":
+            # the error of every row is bounded by half of its scale
+            tolerance = compressed.scales[:, None] / 2 + 1.e-6
+        else:
+            tolerance = np.abs(embeddings.lookup) * 1.e-3 + 1.e-6
+        assert np.all(np.abs(compressed.gather(np.arange(embeddings.shape[0])) - embeddings.lookup) <= tolerance)
+        assert np.array_equal(compressed.get(b"the"), compressed.gather(0))
+        assert np.array_equal(compressed.gather(np.array([0, 0])), compressed.gather(np.array([0]))[[0, 0]])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            prefix = os.path.join(tmp_dir, "memmap_emb")
+            save_as_memory_map(prefix, compressed)
+            loaded_embeddings = load_memory_map(prefix)
+            assert loaded_embeddings.compression == compression
+            assert np.array_equal(loaded_embeddings.get(b"the"), compressed.get(b"the"))
+            assert load_embeddings(prefix, "mem_map", compression=compression).compression == compression
+
+            # full precision memory maps are compressed when loading
+            save_as_memory_map(prefix, embeddings)
+            loaded_embeddings = load_embeddings(prefix, "mem_map", compression=compression)
+            assert loaded_embeddings.compression == compression
+            assert np.array_equal(loaded_embeddings.get(b"the"), compressed.get(b"the"))
+
+
+def test_reduced_embeddings():
+    import tempfile
+    from jack.io.embeddings import Embeddings, reduce_embeddings
+    from jack.util.vocab import Vocab
+    rs = np.random.RandomState(0)
+    lookup = rs.randn(100, 8).dot(rs.randn(8, 8)) + 1.0
+    reduced = reduce_embeddings(Embeddings({i: i for i in range(100)}, lookup), 3, remove_top_components=1)
+
+    mean, components = reduced.projection
+    assert reduced.shape == (100, 3)
+    assert np.allclose(components.T.dot(components), np.eye(3), atol=1.e-5)
+    # projections onto the 2nd to 4th principal components have decreasing variance
+    variances = reduced.lookup.var(axis=0)
+    assert np.all(variances[:-1] >= variances[1:])
+    assert np.allclose(reduced.lookup, (lookup - lookup.mean(axis=0)).dot(components), atol=1.e-4)
+
+    # compressed embeddings are decompressed for fitting and projecting
+    from jack.io.embeddings import compress_embeddings
+    compressed = compress_embeddings(Embeddings({i: i for i in range(100)}, lookup), "int8")
+    reduced_compressed = reduce_embeddings(compressed, 3, remove_top_components=1)
+    expected = reduce_embeddings(Embeddings({i: i for i in range(100)}, compressed.gather(np.arange(100))), 3,
+                                 remove_top_components=1)
+    assert reduced_compressed.compression is None
+    assert np.allclose(reduced_compressed.lookup, expected.lookup, atol=1.e-4)
+
+    # the projection is stored with the vocab and applied to the embeddings file when loading
+    embeddings = reduce_embeddings(load_embeddings("data/GloVe/glove.the.50d.txt", 'glove'), 5)
+    vocab = Vocab(emb=embeddings)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        vocab.store(tmp_dir + "/vocab")
+        loaded_vocab = Vocab()
+        loaded_vocab.load(tmp_dir + "/vocab")
+        assert loaded_vocab.emb.shape == (1, 5)
+        assert np.allclose(loaded_vocab.emb.get(b"the"), embeddings.get(b"the"))
+
+        # also for memory-mapped embeddings files
+        from jack.io.embeddings.memory_map import save_as_memory_map, load_memory_map
+        prefix = os.path.join(tmp_dir, "memmap_emb")
+        save_as_memory_map(prefix, Embeddings({i: i for i in range(100)}, lookup))
+        embeddings = reduce_embeddings(load_memory_map(prefix), 3)
+        vocab = Vocab(emb=embeddings)
+        vocab.store(os.path.join(tmp_dir, "memmap_vocab"))
+        loaded_vocab = Vocab()
+        loaded_vocab.load(os.path.join(tmp_dir, "memmap_vocab"))
+        assert loaded_vocab.emb.shape == (100, 3)
+        assert np.allclose(loaded_vocab.emb.get(7), embeddings.get(7), atol=1.e-5)
+
+        # compressed memory maps are projected after decompression
+        int8_prefix = os.path.join(tmp_dir, "int8_memmap_emb")
+        save_as_memory_map(int8_prefix, compress_embeddings(Embeddings({i: i for i in range(100)}, lookup), "int8"))
+        embeddings = reduce_embeddings(load_memory_map(int8_prefix), 3)
+        vocab = Vocab(emb=embeddings)
+        vocab.store(os.path.join(tmp_dir, "int8_memmap_vocab"))
+        loaded_vocab = Vocab()
+        loaded_vocab.load(os.path.join(tmp_dir, "int8_memmap_vocab"))
+        assert loaded_vocab.emb.shape == (100, 3) and loaded_vocab.emb.compression is None
+        assert np.allclose(loaded_vocab.emb.get(7), embeddings.get(7), atol=1.e-5)
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import jack.readers as readers
+from jack.core.inference_graph import export_reader
+
+
+def test_export_reader(tmpdir, xqa_reader_factory):
+    fastqa_reader, data = xqa_reader_factory()
+    questions = [question for question, _ in data]
+    answers = fastqa_reader(questions)
+
+    path = os.path.join(str(tmpdir), "exported")
+    export_reader(fastqa_reader, path)
+    exported_reader = readers.reader_from_export(path)
+
+    # the inference graph contains no variables and only a part of the original graph
+    operations = exported_reader.model_module.tf_session.graph.get_operations()
+    assert not any(op.type == "VariableV2" for op in operations)
+    assert len(operations) < len(fastqa_reader.session.graph.get_operations())
+    # inputs with default keep their default, e.g., frozen character embeddings that are not fed without freezing
+    assert [op.type for op in operations if op.name.endswith("frozen_char_embeddings")] == ["PlaceholderWithDefault"]
+
+    exported_answers = exported_reader(questions)
+    for a, exported_a in zip(answers, exported_answers):
+        assert a.text == exported_a.text
+        assert abs(a.score - exported_a.score) < 1e-5
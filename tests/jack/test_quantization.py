@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+import tensorflow as tf
+
+import jack.readers as readers
+from jack.core.quantization import dequantize_weights, quantize_reader, quantize_weights
+
+
+def test_quantize_weights():
+    weights = np.random.RandomState(0).randn(5, 3).astype(np.float32)
+    weights[:, 1] *= 100.0
+    values, scales = quantize_weights(weights, axis=-1)
+
+    assert values.dtype == np.int8 and scales.shape == (1, 3)
+    # the error of every channel is bounded by half of its scale
+    assert np.all(np.abs(dequantize_weights(values, scales) - weights) <= scales / 2 + 1e-6)
+    assert quantize_weights(weights, axis=0)[1].shape == (5, 1)
+
+
+def test_quantize_reader(tmpdir, xqa_reader_factory):
+    fastqa_reader, data = xqa_reader_factory()
+    questions = [question for question, _ in data]
+    path = os.path.join(str(tmpdir), "reader")
+    quantized_path = os.path.join(str(tmpdir), "quantized")
+    fastqa_reader.store(path)
+
+    quantize_reader(path, quantized_path, min_size=1)
+    with tf.Graph().as_default():
+        quantized_reader = readers.reader_from_file(quantized_path)
+        int8_variables = [v for v in quantized_reader.model_module.variables if v.dtype.base_dtype == tf.int8]
+        assert len(int8_variables) > 0
+        assert len(quantized_reader(questions)) == len(questions)
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import tensorflow as tf
+
+from jack.tf_util.attention import attention_softmax3d, chunked_attention, intra_attention
+from jack.tf_util.masking import mask_3d
+
+
+def test_chunked_attention():
+    tf.reset_default_graph()
+    rs = np.random.RandomState(0)
+    queries = tf.constant(rs.randn(2, 7, 4).astype(np.float32))
+    keys = tf.constant(rs.randn(2, 9, 4).astype(np.float32))
+    values = tf.constant(rs.randn(2, 9, 3).astype(np.float32))
+    key_lengths = tf.constant([9, 5])
+
+    scores = mask_3d(tf.matmul(queries, keys, transpose_b=True), key_lengths, -np.inf)
+    expected = tf.matmul(attention_softmax3d(scores), values)
+    attended = chunked_attention(queries, keys, values, key_lengths=key_lengths, chunk_size=4)
+
+    with tf.Session() as sess:
+        expected, attended = sess.run([expected, attended])
+    assert attended.shape == (2, 7, 3)
+    np.testing.assert_allclose(attended, expected, rtol=1e-5, atol=1e-5)
+
+
+def test_chunked_intra_attention():
+    tf.reset_default_graph()
+    sequence = tf.constant(np.random.RandomState(1).randn(2, 11, 4).astype(np.float32))
+    with tf.variable_scope('full'):
+        expected = intra_attention(sequence)
+    with tf.variable_scope('full', reuse=True):
+        attended = intra_attention(sequence, reuse=True, chunk_size=3)
+
+    with tf.Session() as sess:
+        # non-zero distance biases
+        sess.run([v.assign(tf.range(10, dtype=tf.float32) * 0.1) for v in tf.global_variables()])
+        expected, attended = sess.run([expected, attended])
+    np.testing.assert_allclose(attended, expected, rtol=1e-5, atol=1e-5)
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+import tensorflow as tf
+
+from jack.tf_util.rnn import dynamic_bidirectional_lstm, fused_bidirectional_lstm, restore_unfused_lstm_checkpoint
+
+
+def _encode(encoder, inputs, lengths):
+    initial_state = tuple(tf.contrib.rnn.LSTMStateTuple(tf.ones([2, 3]) * 0.1, tf.ones([2, 3]) * -0.1)
+                          for _ in range(2))
+    outputs, states = encoder(inputs, lengths, 3, initial_state=initial_state, scope="encoder")
+    return list(outputs) + [s.h for s in states]
+
+
+def test_fused_bidirectional_lstm_from_unfused_checkpoint(tmpdir):
+    inputs = np.random.RandomState(0).randn(2, 5, 4).astype(np.float32)
+    lengths = np.array([5, 3], np.int32)
+    path = os.path.join(str(tmpdir), "model")
+
+    tf.reset_default_graph()
+    with tf.Session() as sess:
+        expected = _encode(dynamic_bidirectional_lstm, tf.constant(inputs), tf.constant(lengths))
+        sess.run(tf.global_variables_initializer())
+        tf.train.Saver().save(sess, path)
+        expected = sess.run(expected)
+
+    tf.reset_default_graph()
+    with tf.Session() as sess:
+        outputs = _encode(fused_bidirectional_lstm, tf.constant(inputs), tf.constant(lengths))
+        restore_unfused_lstm_checkpoint(sess, path, tf.global_variables())
+        outputs = sess.run(outputs)
+
+    for output, expected_output in zip(outputs, expected):
+        # outputs beyond sequence lengths are not defined for fused cells
+        if output.ndim == 3:
+            output[1, 3:] = expected_output[1, 3:] = 0.0
+        np.testing.assert_allclose(output, expected_output, rtol=1e-5, atol=1e-5)
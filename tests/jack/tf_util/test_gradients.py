@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import tensorflow as tf
+
+from jack.tf_util.gradients import clip_gradient, regularize_gradient
+
+
+def test_sparse_gradients():
+    tf.reset_default_graph()
+    rs = np.random.RandomState(0)
+    embeddings = tf.Variable(rs.randn(10, 3).astype(np.float32))
+    ids = tf.constant([1, 4, 4])
+    loss = tf.reduce_sum(tf.square(tf.nn.embedding_lookup(embeddings, ids)))
+    grad = tf.gradients(loss, embeddings)[0]
+    assert isinstance(grad, tf.IndexedSlices)
+
+    clipped = clip_gradient(grad, (-0.5, 0.5))
+    clipped_by_norm = clip_gradient(grad, 1.0, tf.clip_by_norm)
+    regularized = regularize_gradient(grad, embeddings, 0.1)
+    for g in [clipped, clipped_by_norm, regularized]:
+        assert isinstance(g, tf.IndexedSlices)
+
+    with tf.Session() as sess:
+        sess.run(tf.global_variables_initializer())
+        emb, dense, clipped, clipped_by_norm, regularized = sess.run(
+            [embeddings, tf.convert_to_tensor(grad), tf.convert_to_tensor(clipped),
+             tf.convert_to_tensor(clipped_by_norm), tf.convert_to_tensor(regularized)])
+
+    # sparse gradients are clipped like their dense counterparts, also for ids looked up twice
+    np.testing.assert_allclose(clipped, np.clip(dense, -0.5, 0.5), rtol=1e-5)
+    np.testing.assert_allclose(clipped_by_norm, dense * min(1.0, 1.0 / np.linalg.norm(dense)), rtol=1e-5)
+    assert np.abs(clipped).max() <= 0.5 and np.linalg.norm(clipped_by_norm) <= 1.0 + 1e-5
+    # only rows looked up in the batch are regularized
+    expected = dense.copy()
+    expected[[1, 4]] += 0.1 * emb[[1, 4]]
+    np.testing.assert_allclose(regularized, expected, rtol=1e-5)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import tensorflow as tf
+
+from jack.tf_util.misc import jit_scope
+
+
+def test_jit_scope():
+    tf.reset_default_graph()
+    rs = np.random.RandomState(0)
+    inputs = rs.randn(3, 4).astype(np.float32)
+    weights = rs.randn(4, 2).astype(np.float32)
+
+    x = tf.constant(inputs)
+    with jit_scope(False):
+        expected = tf.tanh(tf.matmul(x, weights)) * 2.0
+    with jit_scope(True):
+        compiled = tf.tanh(tf.matmul(x, weights)) * 2.0
+
+    assert "_XlaCompile" in compiled.op.node_def.attr
+    assert compiled.op.node_def.attr["_XlaCompile"].b
+    assert not any(a.startswith("_Xla") for a in expected.op.node_def.attr)
+
+    session_config = tf.ConfigProto()
+    session_config.graph_options.optimizer_options.global_jit_level = tf.OptimizerOptions.ON_1
+    with tf.Session(config=session_config) as sess:
+        expected, compiled = sess.run([expected, compiled])
+    np.testing.assert_allclose(compiled, expected, rtol=1e-5, atol=1e-5)
+
+
+def test_session_xla_marks_model_ops(xqa_reader_factory):
+    # global_jit_level only clusters GPU ops, so 'session' marks the ops of the model for CPUs as well
+    reader, _ = xqa_reader_factory(with_char_embeddings=False, xla="session")
+    operations = reader.session.graph.get_operations()
+    assert any(op.node_def.attr["_XlaCompile"].b for op in operations if "_XlaCompile" in op.node_def.attr)
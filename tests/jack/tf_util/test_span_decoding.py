@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import tensorflow as tf
+
+from jack.tf_util.xqa import nbest_spans
+
+
+def _log_softmax(x):
+    x = x - x.max(axis=1, keepdims=True)
+    return x - np.log(np.exp(x).sum(axis=1, keepdims=True))
+
+
+def test_nbest_spans():
+    tf.reset_default_graph()
+    rs = np.random.RandomState(0)
+    start_scores = rs.randn(3, 12).astype(np.float32)
+    end_scores = rs.randn(3, 12).astype(np.float32)
+    n, max_span_length = 5, 4
+
+    spans, scores = nbest_spans(tf.constant(start_scores), tf.constant(end_scores), n, max_span_length)
+    with tf.Session() as sess:
+        spans, scores = sess.run([spans, scores])
+
+    assert spans.shape == (3, n, 2) and scores.shape == (3, n)
+    # compare to all spans of the full L x L matrix
+    span_log_probs = _log_softmax(start_scores)[:, :, None] + _log_softmax(end_scores)[:, None, :]
+    for b in range(3):
+        candidates = sorted(((span_log_probs[b, i, j], i, j) for i in range(12) for j in range(12)
+                             if 0 <= j - i < max_span_length), reverse=True)[:n]
+        assert [(i, j) for _, i, j in candidates] == [tuple(s) for s in spans[b]]
+        np.testing.assert_allclose(scores[b], np.exp([s for s, _, _ in candidates]), rtol=1e-5)
+
+
+def test_nbest_spans_with_start_pointer():
+    tf.reset_default_graph()
+    rs = np.random.RandomState(1)
+    # two beams per instance with ends conditioned on their start
+    start_scores = np.repeat(rs.randn(2, 6).astype(np.float32), 2, axis=0)
+    end_scores = rs.randn(4, 6).astype(np.float32)
+    start_pointer = np.array([1, 4, 0, 2], np.int32)
+
+    spans, scores = nbest_spans(tf.constant(start_scores), tf.constant(end_scores), 3, 3,
+                                start_pointer=tf.constant(start_pointer), beam_size=2)
+    with tf.Session() as sess:
+        spans, scores = sess.run([spans, scores])
+
+    assert spans.shape == (2, 3, 2)
+    for b in range(2):
+        assert set(spans[b, :, 0]) <= set(start_pointer[2 * b:2 * b + 2])
+        assert np.all(spans[b, :, 1] - spans[b, :, 0] < 3) and np.all(spans[b, :, 1] >= spans[b, :, 0])
+        assert np.all(np.diff(scores[b]) <= 0)